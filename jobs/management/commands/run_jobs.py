@@ -0,0 +1,50 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs until interrupted. Start one per host, or "
+        "several; they share the queue in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "JOBS_WORKER_CONCURRENCY", 2),
+            help="Jobs run at once by this worker.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=getattr(settings, "JOBS_POLL_INTERVAL", 1.0),
+            help="Seconds between checks for new jobs when idle.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are runnable now, one at a time, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(options["concurrency"], options["poll_interval"])
+        if options["once"]:
+            count = worker.run_once()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping after the running jobs finish...")
+            worker.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(
+            f"Worker {worker.name} running up to {worker.concurrency} jobs at once."
+        )
+        worker.run()
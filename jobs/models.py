@@ -0,0 +1,55 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``python manage.py run_jobs``."""
+
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("SUCCEEDED", "Succeeded"),
+        ("FAILED", "Failed"),
+    ]
+    FINISHED = ("SUCCEEDED", "FAILED")
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=100, blank=True, default="")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest runnable job.
+            models.Index(fields=["status", "run_after", "id"], name="job_queue_idx"),
+            # Job list endpoint: the caller's most recent jobs.
+            models.Index(fields=["created_by", "-id"], name="job_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def set_progress(self, done, total=None):
+        """Record progress; also tells the queue the worker is still alive."""
+        self.progress_done = done
+        fields = {"progress_done": done, "heartbeat_at": timezone.now()}
+        if total is not None:
+            self.progress_total = fields["progress_total"] = total
+        Job.objects.filter(pk=self.pk).update(**fields)
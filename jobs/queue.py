@@ -0,0 +1,180 @@
+"""Database-backed job queue.
+
+Handlers register under a kind in their app's ``jobs.py``::
+
+    @register("users.delete_employee")
+    def delete_employee(job):
+        ...
+
+``submit`` stores a job and returns at once; ``run_jobs`` workers claim
+runnable jobs oldest first and call the handler with the ``Job``. What the
+handler returns becomes the job's ``result``. A handler that raises is
+retried after ``JOBS_RETRY_BACKOFF_SECONDS``, doubled on each attempt, until
+``max_attempts`` is used up; raising ``JobError`` fails the job at once.
+Handlers must therefore be safe to run again after a partial failure.
+
+Running jobs are leased: a worker that stops sending heartbeats for
+``JOBS_LEASE_SECONDS`` loses its jobs to the next worker. At most
+``JOBS_CONCURRENCY_LIMITS[kind]`` jobs of a kind run at once across all
+workers. On SQLite, claims are serialized by the write lock: with the
+server profile's ``BEGIN IMMEDIATE`` they wait for it, otherwise a claim
+that races another fails with "database is locked" and the worker retries
+it. On databases with row locking, simultaneous claims can briefly exceed
+a limit.
+"""
+
+import logging
+import os
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+class JobError(Exception):
+    """Fail the job without retrying it."""
+
+
+def register(kind):
+    def decorator(handler):
+        _handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+def submit(kind, payload=None, created_by_id=None, max_attempts=None):
+    if kind not in _handlers:
+        raise LookupError(f"No job handler is registered for {kind!r}.")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by_id=created_by_id,
+        max_attempts=max_attempts or getattr(settings, "JOBS_MAX_ATTEMPTS", 3),
+    )
+
+
+def get_files_dir():
+    default = os.path.join(tempfile.gettempdir(), "todo_app_jobs")
+    return str(getattr(settings, "JOBS_FILES_DIR", None) or default)
+
+
+def file_path(name):
+    """Path of a file produced by a job, from the name kept in its result."""
+    return os.path.join(get_files_dir(), os.path.basename(name))
+
+
+def claim(worker):
+    """Mark the oldest runnable job as running on ``worker`` and return it."""
+    now = timezone.now()
+    limits = getattr(settings, "JOBS_CONCURRENCY_LIMITS", {})
+    with transaction.atomic():
+        blocked = []
+        if limits:
+            running = dict(
+                Job.objects.filter(status="RUNNING", kind__in=list(limits))
+                .values("kind")
+                .annotate(count=Count("id"))
+                .values_list("kind", "count")
+            )
+            blocked = [kind for kind, limit in limits.items() if running.get(kind, 0) >= limit]
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="QUEUED", run_after__lte=now)
+            .exclude(kind__in=blocked)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "RUNNING"
+        job.attempts += 1
+        job.worker = worker
+        job.started_at = job.heartbeat_at = now
+        job.save(update_fields=["status", "attempts", "worker", "started_at", "heartbeat_at"])
+    return job
+
+
+def _current(job):
+    """The job's row, unless its lease passed to another worker meanwhile."""
+    return Job.objects.filter(pk=job.pk, status="RUNNING", attempts=job.attempts)
+
+
+def run(job):
+    """Run a claimed job and record how it ended."""
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise JobError(f"No job handler is registered for {job.kind!r}.")
+        result = handler(job)
+    except Exception as error:
+        fail(job, error)
+        return job
+    job.status = "SUCCEEDED"
+    job.result = result
+    job.error = ""
+    job.finished_at = timezone.now()
+    _current(job).update(
+        status=job.status, result=result, error="", finished_at=job.finished_at
+    )
+    return job
+
+
+def fail(job, error):
+    logger.error("Job %s (%s) failed", job.pk, job.kind, exc_info=error)
+    job.error = "".join(traceback.format_exception_only(error)).strip()
+    now = timezone.now()
+    if isinstance(error, JobError) or job.attempts >= job.max_attempts:
+        job.status = "FAILED"
+        job.finished_at = now
+        _current(job).update(status=job.status, error=job.error, finished_at=now)
+        return
+    backoff = getattr(settings, "JOBS_RETRY_BACKOFF_SECONDS", 10)
+    job.status = "QUEUED"
+    job.run_after = now + timedelta(seconds=backoff * 2 ** (job.attempts - 1))
+    _current(job).update(
+        status=job.status, error=job.error, run_after=job.run_after, worker=""
+    )
+
+
+def heartbeat(job_ids):
+    Job.objects.filter(id__in=job_ids, status="RUNNING").update(heartbeat_at=timezone.now())
+
+
+def requeue_stale(lease_seconds):
+    """Give up on running jobs whose worker went quiet; return how many."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status="RUNNING", heartbeat_at__lt=now - timedelta(seconds=lease_seconds)
+    )
+    error = "The worker running this job stopped responding."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="FAILED", error=error, finished_at=now
+    )
+    requeued = stale.update(status="QUEUED", error=error, run_after=now, worker="")
+    return failed + requeued
+
+
+def purge_finished(retention_days):
+    """Delete finished jobs, and the files they produced, past the retention."""
+    jobs = Job.objects.filter(
+        status__in=Job.FINISHED,
+        finished_at__lt=timezone.now() - timedelta(days=retention_days),
+    )
+    for result in jobs.filter(result__isnull=False).values_list("result", flat=True):
+        if isinstance(result, dict) and result.get("file"):
+            try:
+                os.remove(file_path(result["file"]))
+            except FileNotFoundError:
+                pass
+    return jobs.delete()[0]
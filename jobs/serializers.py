@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "attempts",
+            "max_attempts",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def get_progress(self, job):
+        total = job.progress_total
+        percent = None
+        if job.status == "SUCCEEDED":
+            percent = 100
+        elif total:
+            percent = min(100, job.progress_done * 100 // total)
+        return {"done": job.progress_done, "total": total, "percent": percent}
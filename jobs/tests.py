@@ -0,0 +1,246 @@
+import gzip
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tasks.models import Task
+from users.models import CustomUser, PendingImport
+from . import queue
+from .models import Job
+from .worker import Worker
+
+
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+
+    def setUp(self):
+        self.calls = []
+        handlers = {"test.echo": self.echo, "test.flaky": self.flaky, "test.broken": self.broken}
+        patcher = mock.patch.dict(queue._handlers, handlers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def echo(self, job):
+        job.set_progress(1, 1)
+        return job.payload
+
+    def flaky(self, job):
+        self.calls.append(job.attempts)
+        if job.attempts < 2:
+            raise RuntimeError("try again")
+        return "done"
+
+    def broken(self, job):
+        raise queue.JobError("bad payload")
+
+    def test_worker_runs_submitted_jobs(self):
+        job = queue.submit("test.echo", {"value": 1}, created_by_id=self.employer.id)
+        self.assertEqual(job.status, "QUEUED")
+
+        self.assertEqual(Worker(name="test").run_once(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "SUCCEEDED")
+        self.assertEqual(job.result, {"value": 1})
+        self.assertEqual((job.progress_done, job.progress_total), (1, 1))
+        self.assertEqual(job.attempts, 1)
+
+    def test_unknown_kinds_are_rejected(self):
+        with self.assertRaises(LookupError):
+            queue.submit("test.missing")
+
+    @override_settings(JOBS_RETRY_BACKOFF_SECONDS=30)
+    def test_failed_jobs_are_retried_after_a_backoff(self):
+        job = queue.submit("test.flaky")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            Worker(name="test").run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "QUEUED")
+        self.assertIn("try again", job.error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+        # Not runnable until the backoff has passed.
+        self.assertEqual(Worker(name="test").run_once(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        Worker(name="test").run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "SUCCEEDED")
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(job.error, "")
+
+    @override_settings(JOBS_RETRY_BACKOFF_SECONDS=0)
+    def test_jobs_fail_after_their_last_attempt(self):
+        job = queue.submit("test.flaky", max_attempts=1)
+        with self.assertLogs("jobs.queue", "ERROR"):
+            Worker(name="test").run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "FAILED")
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_errors_are_not_retried(self):
+        job = queue.submit("test.broken")
+        with self.assertLogs("jobs.queue", "ERROR"):
+            Worker(name="test").run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("bad payload", job.error)
+
+    def test_worker_retries_after_database_errors(self):
+        worker = Worker(name="test", poll_interval=0.01)
+        claims = []
+
+        def claim(name):
+            claims.append(name)
+            if len(claims) == 1:
+                raise OperationalError("database is locked")
+            worker.stop()
+            return None
+
+        with mock.patch.object(queue, "claim", side_effect=claim), mock.patch(
+            "jobs.worker.close_old_connections"
+        ), self.assertLogs("jobs.worker", "ERROR"):
+            worker.run()
+
+        self.assertEqual(claims, ["test", "test"])
+
+    @override_settings(JOBS_CONCURRENCY_LIMITS={"test.echo": 1})
+    def test_concurrency_limit_per_kind(self):
+        first = queue.submit("test.echo")
+        second = queue.submit("test.echo")
+        other = queue.submit("test.flaky")
+
+        self.assertEqual(queue.claim("a").pk, first.pk)
+        # The second echo waits for the first; other kinds go ahead.
+        self.assertEqual(queue.claim("b").pk, other.pk)
+        self.assertIsNone(queue.claim("b"))
+
+        queue.run(Job.objects.get(pk=first.pk))
+        self.assertEqual(queue.claim("b").pk, second.pk)
+
+    def test_stale_jobs_are_requeued(self):
+        job = queue.submit("test.echo")
+        claimed = queue.claim("gone")
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(queue.requeue_stale(60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "QUEUED")
+
+        # The first worker's late result is discarded; the retry's counts.
+        queue.run(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "QUEUED")
+        Worker(name="test").run_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("SUCCEEDED", 2))
+
+    def test_purge_removes_old_jobs(self):
+        old = queue.submit("test.echo")
+        Job.objects.filter(pk=old.pk).update(
+            status="SUCCEEDED", finished_at=timezone.now() - timedelta(days=30)
+        )
+        recent = queue.submit("test.echo")
+
+        self.assertEqual(queue.purge_finished(7), 1)
+        self.assertEqual(list(Job.objects.values_list("pk", flat=True)), [recent.pk])
+
+
+class JobEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.other_employer = CustomUser.objects.create_employer("9000000003", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        Task.objects.bulk_create(
+            [
+                Task(title=f"Task {i}", created_by=cls.employer, assigned_to=cls.employee)
+                for i in range(3)
+            ]
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+        files_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(files_dir.cleanup)
+        settings_override = override_settings(JOBS_FILES_DIR=files_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def run_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Worker(name="test").run_once()
+
+    def test_employee_deletion_runs_as_a_job(self):
+        response = self.client.delete(f"/api/users/employer/employee/{self.employee.id}/")
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(CustomUser.objects.filter(pk=self.employee.pk).exists())
+
+        self.run_jobs()
+
+        self.assertFalse(CustomUser.objects.filter(pk=self.employee.pk).exists())
+        self.assertFalse(Task.objects.exists())
+        response = self.client.get(response.data["status_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "SUCCEEDED")
+        self.assertEqual(response.data["progress"]["percent"], 100)
+
+    def test_jobs_are_private_to_their_creator(self):
+        job = queue.submit("users.delete_employee", {"employee_id": 0}, self.employer.id)
+
+        self.assertEqual([row["id"] for row in self.client.get("/api/jobs/").data], [job.id])
+        self.client.force_authenticate(self.other_employer)
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/").data, [])
+
+    @override_settings(EMPLOYEE_IMPORT_BACKGROUND_ROWS=2)
+    def test_large_imports_run_as_a_job(self):
+        rows = [
+            {"phone_number": f"98000000{i:02d}", "password": "Secret@123"} for i in range(3)
+        ]
+        response = self.client.post(
+            "/api/users/employer/employee/import/", rows, format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        # Not even the queued job holds a plain password.
+        self.assertNotIn("Secret@123", str(Job.objects.get(pk=response.data["job_id"]).payload))
+        self.assertTrue(PendingImport.objects.filter(job_id=response.data["job_id"]).exists())
+
+        self.run_jobs()
+
+        job = Job.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.status, "SUCCEEDED")
+        self.assertEqual(len(job.result["employee_ids"]), 3)
+        employee = CustomUser.objects.get(phone_number="9800000001")
+        self.assertTrue(employee.check_password("Secret@123"))
+        self.assertFalse(PendingImport.objects.exists())
+
+    def test_background_export_is_downloaded_from_the_job(self):
+        response = self.client.post(
+            "/api/tasks/employer/tasks/export/", {"compress": "gzip"}, format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        download_url = response.data["download_url"]
+        self.assertEqual(self.client.get(download_url).status_code, 409)
+
+        self.run_jobs()
+
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("9000000002", lines[1])
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import queue
+from .models import Job
+from .serializers import JobSerializer
+
+
+def get_own_job(request, job_id):
+    return Job.objects.filter(id=job_id, created_by_id=request.user.id).first()
+
+
+class JobListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """The caller's most recent jobs, newest first."""
+        jobs = Job.objects.filter(created_by_id=request.user.id).order_by("-id")[
+            : getattr(settings, "JOBS_LIST_LIMIT", 50)
+        ]
+        return Response(JobSerializer(jobs, many=True).data, status=status.HTTP_200_OK)
+
+
+class JobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        """Status and progress of one of the caller's jobs."""
+        job = get_own_job(request, job_id)
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class JobDownloadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        """Download the file a finished job produced."""
+        job = get_own_job(request, job_id)
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != "SUCCEEDED" or not (job.result or {}).get("file"):
+            return Response(
+                {"error": "This job has no file to download."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            file = open(queue.file_path(job.result["file"]), "rb")
+        except FileNotFoundError:
+            return Response(
+                {"error": "The file of this job has expired."},
+                status=status.HTTP_410_GONE,
+            )
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=job.result.get("filename"),
+            content_type=job.result.get("content_type"),
+        )
@@ -0,0 +1,106 @@
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600
+
+
+class Worker:
+    """Run queued jobs on up to ``concurrency`` threads."""
+
+    def __init__(self, concurrency=None, poll_interval=None, name=None):
+        self.concurrency = concurrency or getattr(settings, "JOBS_WORKER_CONCURRENCY", 2)
+        self.poll_interval = poll_interval or getattr(settings, "JOBS_POLL_INTERVAL", 1.0)
+        self.lease_seconds = getattr(settings, "JOBS_LEASE_SECONDS", 60)
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+
+    def execute(self, job):
+        # Each thread keeps its own connections, recycled as requests do.
+        close_old_connections()
+        try:
+            return queue.run(job)
+        except DatabaseError:
+            # Its lease runs out and the job is requeued.
+            logger.exception("Could not record the outcome of job %s", job.pk)
+        finally:
+            close_old_connections()
+
+    def run_once(self):
+        """Run runnable jobs one after another until none is left; return the count."""
+        count = 0
+        queue.requeue_stale(self.lease_seconds)
+        while not self.stopping.is_set() and (job := queue.claim(self.name)):
+            queue.run(job)
+            count += 1
+        return count
+
+    def run(self):
+        """Poll for jobs until ``stop`` is called, then let running ones finish.
+
+        Database errors, such as a locked SQLite database, are logged and
+        the poll is retried after a delay that doubles with each failure,
+        capped so heartbeats still arrive within the lease.
+        """
+        running = {}
+        last_heartbeat = last_purge = 0.0
+        failures = 0
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            while not self.stopping.is_set():
+                try:
+                    now = time.monotonic()
+                    if now - last_heartbeat >= self.lease_seconds / 3:
+                        if running:
+                            queue.heartbeat(list(running.values()))
+                        queue.requeue_stale(self.lease_seconds)
+                        last_heartbeat = now
+                    if now - last_purge >= PURGE_INTERVAL:
+                        purged = queue.purge_finished(
+                            getattr(settings, "JOBS_RETENTION_DAYS", 7)
+                        )
+                        if purged:
+                            logger.info("Purged %s finished jobs", purged)
+                        last_purge = now
+
+                    while len(running) < self.concurrency and (job := queue.claim(self.name)):
+                        running[pool.submit(self.execute, job)] = job.pk
+                except DatabaseError:
+                    failures += 1
+                    delay = min(self.poll_interval * 2**failures, self.lease_seconds / 3)
+                    logger.exception("Job queue unavailable; retrying in %.1fs", delay)
+                    close_old_connections()
+                    self.stopping.wait(delay)
+                    continue
+                failures = 0
+                close_old_connections()
+
+                if running:
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.pop(future)
+                else:
+                    self.stopping.wait(self.poll_interval)
+            while running:
+                # Keep the leases of jobs that are still finishing.
+                done, _ = wait(running, timeout=self.lease_seconds / 3, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                if running:
+                    try:
+                        queue.heartbeat(list(running.values()))
+                    except DatabaseError:
+                        logger.exception("Could not renew the leases of running jobs")
+                        close_old_connections()
+
+    def stop(self):
+        self.stopping.set()
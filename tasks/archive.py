@@ -0,0 +1,71 @@
+"""Cold storage for completed tasks.
+
+``archive_completed`` moves ``COMPLETED`` tasks that have not changed for a
+while from ``Task`` to ``ArchivedTask`` on the same shard, so the hot table
+and its indexes only grow with live work. Each chunk is copied and deleted
+in one transaction, and its tombstones are logged once it commits: an
+interrupted run leaves every task in exactly one of the two tables, and
+rerunning it carries on with the rest.
+
+The move bypasses model signals. ``TaskStat`` keeps counting archived
+tasks; sync clients get a tombstone, since the task leaves the lists they
+mirror; search, which indexes ``tasks_task`` only, stops finding it.
+"""
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .cache import invalidate_task_lists
+from .models import ArchivedTask, Task, TaskShardAssignment
+from .sync import record_changes
+
+COLUMNS = [field.column for field in Task._meta.concrete_fields]
+
+
+def _moving_employers():
+    # Their rows are being copied to another shard; leave them where they are.
+    return list(
+        TaskShardAssignment.objects.filter(moving=True).values_list("employer_id", flat=True)
+    )
+
+
+def archive_completed(using, cutoff, chunk_size):
+    """Archive tasks completed before ``cutoff``; yield the size of each chunk."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in COLUMNS)
+    # One parameter per id, plus the archive time.
+    chunk_size = min(chunk_size, (connection.features.max_query_params or chunk_size + 1) - 1)
+
+    last_id = 0
+    while True:
+        with transaction.atomic(using=using):
+            # Walks the primary key once over the whole run, whatever the
+            # share of archivable rows.
+            rows = list(
+                Task.objects.using(using)
+                .select_for_update()
+                .filter(id__gt=last_id, status="COMPLETED", updated_at__lt=cutoff)
+                .exclude(created_by_id__in=_moving_employers())
+                .order_by("id")
+                .values_list("id", "created_by_id", "assigned_to_id")[:chunk_size]
+            )
+            if not rows:
+                return
+            ids = [row[0] for row in rows]
+            last_id = ids[-1]
+            placeholders = ", ".join(["%s"] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {quote(ArchivedTask._meta.db_table)} ({columns}, archived_at) "
+                    f"SELECT {columns}, %s FROM {quote(Task._meta.db_table)} "
+                    f"WHERE id IN ({placeholders})",
+                    [connection.ops.adapt_datetimefield_value(timezone.now()), *ids],
+                )
+                cursor.execute(
+                    f"DELETE FROM {quote(Task._meta.db_table)} WHERE id IN ({placeholders})",
+                    ids,
+                )
+            record_changes([(*row, True) for row in rows], shard=using)
+            invalidate_task_lists({user_id for row in rows for user_id in row[1:]}, using=using)
+        yield len(rows)
@@ -0,0 +1,89 @@
+"""Versioned read-through cache for the task list endpoints.
+
+Every user has a generation counter. Cached list payloads are keyed by the
+generation that was current when they were built, so bumping the counter
+makes all of that user's entries unreachable at once; they are never served
+again and age out of the backend through its normal LRU eviction.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_cache():
+    return caches[getattr(settings, "TASK_LIST_CACHE_ALIAS", "default")]
+
+
+def _generation_key(user_id):
+    return f"tasks:generation:{user_id}"
+
+
+def get_generation(user_id):
+    cache = get_cache()
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # A missing counter (never set, or evicted) restarts from a fresh
+        # value so entries cached under an older generation stay unreachable.
+        generation = time.time_ns()
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generations(user_ids):
+    cache = get_cache()
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        key = _generation_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_task_lists(user_ids, using=None):
+    """Bump the users' generations once the current transaction commits.
+
+    Bumping before the commit would let a concurrent reader cache the
+    pre-commit rows under the new generation.
+    """
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: bump_generations(user_ids), using=using)
+
+
+def get_or_build(scope, request, build):
+    """Return the cached payload for ``request`` or build and store it."""
+    cache = get_cache()
+    user_id = request.user.id
+    url_hash = hashlib.md5(
+        request.build_absolute_uri().encode(), usedforsecurity=False
+    ).hexdigest()
+    key = f"tasks:list:{scope}:{user_id}:{get_generation(user_id)}:{url_hash}"
+
+    payload = cache.get(key)
+    if payload is not None:
+        _record("hits")
+        return payload
+
+    _record("misses")
+    payload = build()
+    cache.set(key, payload, timeout=getattr(settings, "TASK_LIST_CACHE_TIMEOUT", 300))
+    return payload
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,52 @@
+"""Cheap HTTP validators for the task list endpoints.
+
+The ETag of a list is derived from one aggregate per shard over the
+caller's tasks, ``max(updated_at)`` plus the row count, which an index on
+``(owner, status, updated_at)`` answers without reading the table. Inserts
+and updates move the maximum, deletes change the count.
+
+There is no Last-Modified: deleting, archiving or reassigning a task away
+lowers the count without moving ``max(updated_at)`` forward, so
+If-Modified-Since would keep answering 304 for a list that lost rows.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def get_etag(request, *querysets):
+    """Return the ETag of the union of ``querysets`` (one per task shard the
+    list is read from)."""
+    count = 0
+    last_modified = None
+    for queryset in querysets:
+        state = queryset.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        count += state["count"]
+        if state["last_modified"] and (
+            last_modified is None or state["last_modified"] > last_modified
+        ):
+            last_modified = state["last_modified"]
+    fingerprint = "|".join(
+        [
+            str(request.user.id),
+            str(count),
+            last_modified.isoformat() if last_modified else "",
+            request.get_full_path(),
+        ]
+    )
+    return quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+
+
+def get_not_modified_response(request, etag):
+    """Return a 304 response if the client's copy is current, else ``None``."""
+    return get_conditional_response(request, etag=etag)
+
+
+def set_etag(response, etag):
+    response["ETag"] = etag
+    # Clients may keep the body but must revalidate before reusing it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
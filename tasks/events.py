@@ -0,0 +1,123 @@
+"""Publish/subscribe of task change events for the push endpoint.
+
+Write paths call ``publish_task_events`` and the events are handed to the
+configured broker once the transaction commits. ``InProcessBroker`` fans
+them out to the event-stream connections of the current process. A broker
+backed by e.g. Redis pub/sub implements the same three methods so events
+reach connections held by other worker processes.
+"""
+
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class BaseBroker:
+    def subscribe(self, user_id):
+        """Return an ``asyncio.Queue`` receiving ``user_id``'s events.
+
+        Must be called from the event loop that will consume the queue.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, user_id, queue):
+        raise NotImplementedError
+
+    def publish(self, user_ids, event):
+        """Deliver ``event`` to every subscriber of ``user_ids``; thread-safe."""
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Fan-out to subscribers living in this process.
+
+    Each subscriber gets a bounded queue. A subscriber that falls behind has
+    its backlog replaced by a single ``resync`` event, telling the client
+    to catch up through the delta sync endpoint instead.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, "TASK_EVENT_QUEUE_SIZE", 100)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update(
+                {subscriber for subscriber in subscribers if subscriber[1] is queue}
+            )
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [
+                subscriber
+                for user_id in set(user_ids)
+                for subscriber in self._subscribers.get(user_id, ())
+            ]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                continue
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"event": "resync"})
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            broker_class = import_string(
+                getattr(settings, "TASK_EVENT_BROKER", "tasks.events.InProcessBroker")
+            )
+            _broker = broker_class()
+        return _broker
+
+
+def publish_task_events(events, using=None):
+    """Publish ``(user_ids, event)`` pairs once the transaction commits."""
+    events = list(events)
+    if not events:
+        return
+
+    def publish():
+        broker = get_broker()
+        for user_ids, event in events:
+            broker.publish(user_ids, event)
+
+    transaction.on_commit(publish, using=using)
+
+
+def task_event(kind, task_id, status=None):
+    event = {"event": f"task.{kind}", "task_id": task_id}
+    if status is not None:
+        event["status"] = status
+    return event
@@ -0,0 +1,102 @@
+"""Query-parameter filtering and ordering for the task list endpoints.
+
+Every ordering in ``ORDERINGS`` has an ``(owner, field, id)`` index behind
+it, so a page is read in index order whatever filters are combined with it
+and never needs a sort.
+
+Supported parameters:
+
+- ``status``: one of ``Task.STATUS_CHOICES``.
+- ``assigned_to``: employee id (employer lists only).
+- ``created_after``/``created_before``, ``updated_after``/``updated_before``:
+  ISO 8601 datetimes or dates; ``after`` is inclusive, ``before`` exclusive.
+- ``ordering``: one of ``ORDERINGS``, ``-created_at`` by default.
+- ``include_archived``: ``true`` to also list tasks moved to ``ArchivedTask``.
+"""
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Task
+
+ORDERINGS = ("-created_at", "created_at", "-updated_at", "updated_at")
+DEFAULT_ORDERING = "-created_at"
+
+ARCHIVED_STATUSES = ("COMPLETED",)
+
+DATE_RANGES = {
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+    "updated_after": "updated_at__gte",
+    "updated_before": "updated_at__lt",
+}
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_moment(name, value):
+    error = InvalidFilter(f"{name} must be an ISO 8601 date or datetime.")
+    try:
+        # Both raise ValueError on well-formed but impossible dates.
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        raise error
+    if moment is None:
+        if day is None:
+            raise error
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_tasks(tasks, params, allow_assignee=False):
+    """Apply the filters in ``params`` to ``tasks``; return ``(tasks, ordering)``.
+
+    Raises ``InvalidFilter`` with a message for the client on bad input.
+    """
+    conditions = {}
+
+    task_status = params.get("status")
+    if task_status:
+        if task_status not in dict(Task.STATUS_CHOICES):
+            raise InvalidFilter(
+                f"status must be one of: {', '.join(dict(Task.STATUS_CHOICES))}."
+            )
+        conditions["status"] = task_status
+
+    if allow_assignee and params.get("assigned_to"):
+        try:
+            conditions["assigned_to_id"] = int(params["assigned_to"])
+        except ValueError:
+            raise InvalidFilter("assigned_to must be an employee id.")
+
+    for name, lookup in DATE_RANGES.items():
+        value = params.get(name)
+        if value:
+            conditions[lookup] = parse_moment(name, value)
+
+    ordering = params.get("ordering") or DEFAULT_ORDERING
+    if ordering not in ORDERINGS:
+        raise InvalidFilter(f"ordering must be one of: {', '.join(ORDERINGS)}.")
+
+    return tasks.filter(**conditions), ordering
+
+
+def include_archived(params):
+    """Whether the list should also read archived tasks.
+
+    Only completed tasks are archived, so a filter on another status never
+    needs to.
+    """
+    value = params.get("include_archived", "").lower()
+    if value in ("", "0", "false", "no"):
+        return False
+    if value not in ("1", "true", "yes"):
+        raise InvalidFilter("include_archived must be true or false.")
+    return params.get("status") in (None, "", *ARCHIVED_STATUSES)
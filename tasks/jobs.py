@@ -0,0 +1,51 @@
+"""Background jobs of the tasks app."""
+
+import os
+
+from django.conf import settings
+
+from jobs import queue
+from jobs.queue import register
+from .export import EXPORT_FORMATS, employer_export_querysets, export_rows, gzip_chunks
+
+
+@register("tasks.export")
+def export_tasks(job):
+    """Write an employer's tasks, archived ones included, to a file downloaded from the job."""
+    encode, content_type, extension = EXPORT_FORMATS[job.payload["export_format"]]
+    chunk_size = getattr(settings, "TASK_EXPORT_CHUNK_SIZE", 2000)
+    querysets = employer_export_querysets(job.payload["employer_id"])
+    job.set_progress(0, sum(queryset.count() for queryset in querysets))
+
+    exported = 0
+
+    def counted(rows):
+        nonlocal exported
+        for row in rows:
+            yield row
+            exported += 1
+            if exported % chunk_size == 0:
+                job.set_progress(exported)
+
+    chunks = encode(counted(export_rows(querysets, chunk_size)))
+    filename = f"tasks.{extension}"
+    if job.payload.get("compress") == "gzip":
+        chunks = gzip_chunks(chunks)
+        content_type = "application/gzip"
+        filename += ".gz"
+
+    name = f"job-{job.pk}-{filename}"
+    path = queue.file_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written aside and renamed, so a retry never serves a partial file.
+    with open(f"{path}.part", "wb") as file:
+        for chunk in chunks:
+            file.write(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+    os.replace(f"{path}.part", path)
+    job.set_progress(exported)
+    return {
+        "file": name,
+        "filename": filename,
+        "content_type": content_type,
+        "rows": exported,
+    }
@@ -0,0 +1,109 @@
+"""Shared pieces of the ``generate_load_data`` and ``benchmark_api`` commands.
+
+Generated accounts use predictable phone numbers so that the benchmark can
+log in as them without a side channel: employer ``n`` is
+``employer_phone(n)``, employee ``n`` is ``employee_phone(n)``, and both use
+``LOAD_PASSWORD`` unless overridden.
+"""
+
+import math
+import sys
+
+LOAD_PASSWORD = "Load@1234"
+
+EMPLOYER_PREFIX = "7"
+EMPLOYEE_PREFIX = "8"
+
+
+def employer_phone(number):
+    return f"{EMPLOYER_PREFIX}{number:09d}"
+
+
+def employee_phone(number):
+    return f"{EMPLOYEE_PREFIX}{number:09d}"
+
+
+def phone_range(prefix):
+    """Return the bounds of every generated number with ``prefix``."""
+    return f"{prefix}000000000", f"{prefix}999999999"
+
+
+def source_address(hostname, number):
+    """Local address for simulated client ``number`` to connect from.
+
+    On Linux all of 127.0.0.0/8 reaches the loopback interface, so against a
+    local server each client gets an address of its own, the way distinct
+    users would, and per-IP limits such as the login throttle tell them
+    apart. Elsewhere, ``None`` leaves the choice to the OS.
+    """
+    if not sys.platform.startswith("linux") or not hostname.startswith("127."):
+        return None
+    number += 1
+    return (f"127.1.{number // 254 % 256}.{number % 254 + 1}", 0)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, elapsed):
+    """Summarize ``(scenario, seconds, ok)`` samples of a run of ``elapsed`` seconds."""
+    by_scenario = {}
+    for scenario, seconds, ok in samples:
+        by_scenario.setdefault(scenario, []).append((seconds, ok))
+    by_scenario["all"] = [(seconds, ok) for _, seconds, ok in samples]
+
+    summary = {}
+    for scenario, results in sorted(by_scenario.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in results)
+        summary[scenario] = {
+            "requests": len(results),
+            "errors": sum(1 for _, ok in results if not ok),
+            "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50_ms": _round(percentile(latencies, 0.50)),
+            "p95_ms": _round(percentile(latencies, 0.95)),
+            "p99_ms": _round(percentile(latencies, 0.99)),
+            "max_ms": _round(latencies[-1] if latencies else None),
+        }
+    return summary
+
+
+def compare(baseline, current, threshold):
+    """Return per-scenario changes and the regressions beyond ``threshold``.
+
+    A scenario regresses when its p95 latency grows, or its throughput
+    shrinks, by more than ``threshold`` (a fraction) relative to the baseline.
+    """
+    changes = {}
+    regressions = []
+    for scenario, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(scenario)
+        if after is None:
+            continue
+        change = {
+            field: _relative_change(before.get(field), after.get(field))
+            for field in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+        }
+        changes[scenario] = change
+        if change["p95_ms"] is not None and change["p95_ms"] > threshold:
+            regressions.append(f"{scenario}: p95 latency up {change['p95_ms']:.1%}")
+        if change["throughput_rps"] is not None and -change["throughput_rps"] > threshold:
+            regressions.append(
+                f"{scenario}: throughput down {-change['throughput_rps']:.1%}"
+            )
+    return changes, regressions
+
+
+def _relative_change(before, after):
+    if not before or after is None:
+        return None
+    return round((after - before) / before, 4)
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
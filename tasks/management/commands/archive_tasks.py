@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from tasks import sharding
+from tasks.archive import archive_completed
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed tasks that have not changed for a while to the "
+        "archive table, in chunks. Safe to interrupt and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=getattr(settings, "TASK_ARCHIVE_AFTER_DAYS", 90),
+            help="Archive tasks completed more than this many days ago.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=getattr(settings, "TASK_ARCHIVE_CHUNK_SIZE", 500),
+            help="Tasks moved per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to wait between chunks, leaving room for other writers.",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help=(
+                "Then VACUUM SQLite shards: deleted rows leave half-empty pages "
+                "that new tasks, appended at the end, never reuse. Locks the "
+                "database while it runs."
+            ),
+        )
+        parser.add_argument(
+            "--database",
+            action="append",
+            help="Task shard to archive (repeatable; default: every shard).",
+        )
+
+    def handle(self, *args, **options):
+        shards = options["database"] or sharding.get_shards()
+        unknown = set(shards) - set(sharding.get_shards())
+        if unknown:
+            raise CommandError(f"Not task shards: {', '.join(sorted(unknown))}.")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        total = 0
+        for shard in shards:
+            archived = 0
+            for count in archive_completed(shard, cutoff, options["chunk_size"]):
+                archived += count
+                self.stdout.write(f"{shard}: archived {archived} tasks so far.")
+                time.sleep(options["pause"])
+            self.stdout.write(f"{shard}: archived {archived} tasks.")
+            total += archived
+            if options["vacuum"] and connections[shard].vendor == "sqlite":
+                with connections[shard].cursor() as cursor:
+                    cursor.execute("VACUUM")
+                self.stdout.write(f"{shard}: vacuumed.")
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {total} tasks completed before {cutoff:%Y-%m-%d}.")
+        )
@@ -0,0 +1,366 @@
+import base64
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks.loadtest import (
+    LOAD_PASSWORD,
+    compare,
+    employee_phone,
+    employer_phone,
+    source_address,
+    summarize,
+)
+
+# Relative frequency of each workflow in the request mix.
+WORKFLOWS = {
+    "employer_list": 30,
+    "employee_list": 20,
+    "task_crud": 15,
+    "task_stats": 10,
+    "status_update": 10,
+    "employee_crud": 5,
+    "login": 5,
+    "token_refresh": 5,
+}
+
+
+def token_claims(token):
+    """Decode a JWT payload without verifying it; only used to read ids."""
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+class Client:
+    """One simulated user session on its own keep-alive connection."""
+
+    def __init__(self, base_url, number, options, deadline, run_id):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        address = source_address(parts.hostname, number)
+        self.connect = lambda: connection_class(
+            parts.hostname, parts.port, timeout=30, source_address=address
+        )
+        self.connection = self.connect()
+        self.prefix = parts.path.rstrip("/")
+        self.number = number
+        self.options = options
+        self.deadline = deadline
+        self.run_id = run_id
+        self.rng = random.Random(options["seed"] * 1000003 + number)
+        self.samples = []
+        self.employee_tasks = []
+        self.created_employees = 0
+
+    def call(self, scenario, method, path, body=None, token=None, expect=(200,)):
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status_code = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self.connect()
+            data, status_code = b"", None
+        self.samples.append((scenario, time.perf_counter() - start, status_code in expect))
+
+        try:
+            return status_code, json.loads(data) if data else None
+        except ValueError:
+            return status_code, None
+
+    def login(self, phone_number):
+        status_code, data = self.call(
+            "login",
+            "POST",
+            "/api/users/login/",
+            {"phone_number": phone_number, "password": self.options["password"]},
+        )
+        if status_code != 200:
+            raise CommandError(f"Could not log in as {phone_number} (HTTP {status_code}).")
+        return data["access"], data["refresh"]
+
+    def run(self):
+        employer_phone_number = employer_phone(self.number % self.options["employers"])
+        employee_phone_number = employee_phone(self.number % self.options["employees"])
+        self.employer_token, self.employer_refresh = self.login(employer_phone_number)
+        self.employee_token, _ = self.login(employee_phone_number)
+        self.employee_id = token_claims(self.employee_token)["user_id"]
+
+        names = self.options["workflows"]
+        weights = [WORKFLOWS[name] for name in names]
+        while time.monotonic() < self.deadline:
+            workflow = self.rng.choices(names, weights=weights)[0]
+            getattr(self, f"do_{workflow}")()
+        self.connection.close()
+
+    def do_login(self):
+        status_code, _ = self.call(
+            "login",
+            "POST",
+            "/api/users/login/",
+            {
+                "phone_number": employer_phone(self.rng.randrange(self.options["employers"])),
+                "password": self.options["password"],
+            },
+            expect=(200, 429),
+        )
+        if status_code == 429:
+            # Turned away by the login throttle before any hashing; keep these
+            # apart so they do not pass for fast logins.
+            self.samples[-1] = ("login_throttled", *self.samples[-1][1:])
+
+    def do_token_refresh(self):
+        status_code, data = self.call(
+            "token_refresh",
+            "POST",
+            "/api/users/token/refresh/",
+            {"refresh": self.employer_refresh},
+        )
+        if status_code == 200:
+            self.employer_token = data["access"]
+            self.employer_refresh = data.get("refresh", self.employer_refresh)
+
+    def do_employer_list(self):
+        status_code, data = self.call(
+            "employer_task_list", "GET", "/api/tasks/employer/tasks/", token=self.employer_token
+        )
+        if status_code == 200 and data["next"] and self.rng.random() < 0.3:
+            parts = urlsplit(data["next"])
+            self.call(
+                "employer_task_list_next_page",
+                "GET",
+                f"{parts.path}?{parts.query}",
+                token=self.employer_token,
+            )
+
+    def do_employee_list(self):
+        status_code, data = self.call(
+            "employee_task_list", "GET", "/api/tasks/tasks/", token=self.employee_token
+        )
+        if status_code == 200:
+            self.employee_tasks = [task["id"] for task in data["results"]]
+
+    def do_task_stats(self):
+        self.call(
+            "employer_task_stats", "GET", "/api/tasks/employer/tasks/stats/", token=self.employer_token
+        )
+
+    def do_task_crud(self):
+        status_code, data = self.call(
+            "create_task",
+            "POST",
+            "/api/tasks/employer/task/create/",
+            {
+                "title": f"Benchmark task {self.number}",
+                "description": "Created by benchmark_api",
+                "assigned_to": self.employee_id,
+            },
+            token=self.employer_token,
+            expect=(201,),
+        )
+        if status_code != 201:
+            return
+        task_id = data["task_id"]
+        self.call(
+            "update_task",
+            "PUT",
+            f"/api/tasks/employer/task/{task_id}/edit/",
+            {"status": "IN_PROGRESS"},
+            token=self.employer_token,
+        )
+        self.call(
+            "delete_task",
+            "DELETE",
+            f"/api/tasks/employer/task/{task_id}/delete/",
+            token=self.employer_token,
+            expect=(200, 204),
+        )
+
+    def do_status_update(self):
+        if not self.employee_tasks:
+            self.do_employee_list()
+            if not self.employee_tasks:
+                return
+        self.call(
+            "employee_status_update",
+            "PATCH",
+            f"/api/tasks/tasks/{self.rng.choice(self.employee_tasks)}/",
+            {"status": self.rng.choice(["PENDING", "IN_PROGRESS", "COMPLETED"])},
+            token=self.employee_token,
+        )
+
+    def do_employee_crud(self):
+        # Numbers starting with 6 never collide with generated accounts.
+        phone_number = f"6{self.run_id:03d}{self.number:02d}{self.created_employees:04d}"[:10]
+        self.created_employees = (self.created_employees + 1) % 10000
+        status_code, data = self.call(
+            "create_employee",
+            "POST",
+            "/api/users/employer/employee/",
+            {"first_name": "Bench", "phone_number": phone_number},
+            token=self.employer_token,
+            expect=(201,),
+        )
+        if status_code != 201:
+            return
+        employee_id = data["employee_id"]
+        self.call(
+            "update_employee",
+            "PUT",
+            f"/api/users/employer/employee/{employee_id}/",
+            {"last_name": "Updated"},
+            token=self.employer_token,
+        )
+        self.call(
+            "delete_employee",
+            "DELETE",
+            f"/api/users/employer/employee/{employee_id}/",
+            token=self.employer_token,
+            expect=(200, 202, 204),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a mixed workload against a running server with concurrent clients "
+        "and report p50/p95/p99 latency and throughput per endpoint as JSON. "
+        "Expects data from generate_load_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--clients", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+        parser.add_argument(
+            "--employers",
+            type=int,
+            default=1000,
+            help="Number of generated employers to log in as.",
+        )
+        parser.add_argument(
+            "--employees",
+            type=int,
+            default=100000,
+            help="Number of generated employees to log in as.",
+        )
+        parser.add_argument("--password", default=LOAD_PASSWORD)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workflows",
+            type=lambda value: value.split(","),
+            default=list(WORKFLOWS),
+            help=f"Comma-separated subset of the mix to run (default: {','.join(WORKFLOWS)}).",
+        )
+        parser.add_argument("--output", help="Also write the report to this file.")
+        parser.add_argument(
+            "--baseline",
+            help="Compare this run against an earlier report and fail on regressions.",
+        )
+        parser.add_argument(
+            "--compare",
+            nargs=2,
+            metavar=("BASELINE", "CURRENT"),
+            help="Only compare two existing reports.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.10,
+            help="Allowed relative p95/throughput regression (default: 0.10).",
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            baseline, current = (self.load_report(path) for path in options["compare"])
+            self.report_comparison(baseline, current, options["threshold"])
+            return
+
+        report = self.run(options)
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["baseline"]:
+            self.report_comparison(
+                self.load_report(options["baseline"]), report, options["threshold"]
+            )
+
+    def run(self, options):
+        unknown = set(options["workflows"]) - set(WORKFLOWS)
+        if unknown:
+            raise CommandError(f"Unknown workflows: {', '.join(sorted(unknown))}.")
+        started_at = timezone.now()
+        deadline = time.monotonic() + options["duration"]
+        run_id = int(time.time()) % 1000
+        clients = [
+            Client(options["base_url"], number, options, deadline, run_id)
+            for number in range(options["clients"])
+        ]
+        errors = []
+
+        def run_client(client):
+            try:
+                client.run()
+            except CommandError as error:
+                errors.append(str(error))
+
+        threads = [threading.Thread(target=run_client, args=(client,)) for client in clients]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        if errors:
+            raise CommandError(errors[0])
+
+        samples = [sample for client in clients for sample in client.samples]
+        return {
+            "meta": {
+                "base_url": options["base_url"],
+                "clients": options["clients"],
+                "duration_s": round(elapsed, 2),
+                "seed": options["seed"],
+                "workflows": options["workflows"],
+                "started_at": started_at.isoformat(),
+                "pid": os.getpid(),
+            },
+            "scenarios": summarize(samples, elapsed),
+        }
+
+    def load_report(self, path):
+        try:
+            with open(path) as report_file:
+                return json.load(report_file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Could not read report {path}: {error}")
+
+    def report_comparison(self, baseline, current, threshold):
+        changes, regressions = compare(baseline, current, threshold)
+        self.stdout.write(json.dumps({"changes": changes, "regressions": regressions}, indent=2))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) beyond {threshold:.0%}: "
+                + "; ".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,190 @@
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks.loadtest import LOAD_PASSWORD, employer_phone, source_address, summarize
+
+
+def cpu_seconds(pids):
+    """User plus system CPU time used so far by the processes ``pids`` (Linux)."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                # Fields after the parenthesized command name; utime and stime
+                # are the 14th and 15th fields of the whole line.
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError as error:
+            raise CommandError(f"Cannot read the CPU time of process {pid}: {error}")
+        total += int(fields[11]) + int(fields[12])
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+class LoginClient:
+    """Posts logins on its own keep-alive connection from its own address."""
+
+    def __init__(self, base_url, number):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        address = source_address(parts.hostname, number)
+        self.connect = lambda: connection_class(
+            parts.hostname, parts.port, timeout=30, source_address=address
+        )
+        self.connection = self.connect()
+        self.path = parts.path.rstrip("/") + "/api/users/login/"
+
+    def login(self, phone_number, password):
+        body = json.dumps({"phone_number": phone_number, "password": password})
+        start = time.perf_counter()
+        try:
+            self.connection.request(
+                "POST", self.path, body=body, headers={"Content-Type": "application/json"}
+            )
+            response = self.connection.getresponse()
+            response.read()
+            status_code = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self.connect()
+            status_code = None
+        return status_code, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the login endpoint of a running server with wrong passwords "
+        "while regular users log in, and report how many attempts reached "
+        "the password hasher, the users' login latency and the server's CPU "
+        "use as JSON. Expects data from generate_load_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--server-pid",
+            type=int,
+            action="append",
+            required=True,
+            help="Process whose CPU time to measure (repeatable, one per worker).",
+        )
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+        parser.add_argument(
+            "--attackers", type=int, default=32, help="Threads posting wrong passwords."
+        )
+        parser.add_argument(
+            "--attacker-ips",
+            type=int,
+            default=4,
+            help="Distinct addresses the attackers connect from.",
+        )
+        parser.add_argument(
+            "--users", type=int, default=4, help="Threads logging in with the right password."
+        )
+        parser.add_argument(
+            "--user-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between two logins of a user thread.",
+        )
+        parser.add_argument(
+            "--employers",
+            type=int,
+            default=1000,
+            help="Number of generated employers to log in as and to attack.",
+        )
+        parser.add_argument("--password", default=LOAD_PASSWORD)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        report = self.run(options)
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output + "\n")
+        self.stdout.write(output)
+
+    def run(self, options):
+        started_at = timezone.now()
+        deadline = time.monotonic() + options["duration"]
+        attack = {}
+        attack_lock = threading.Lock()
+        user_samples = []
+
+        def attacker(number):
+            # Attackers sharing an address also share its client number.
+            client = LoginClient(
+                options["base_url"], options["users"] + number % options["attacker_ips"]
+            )
+            rng = random.Random(options["seed"] * 1000003 + number)
+            counts = {}
+            while time.monotonic() < deadline:
+                phone_number = employer_phone(rng.randrange(options["employers"]))
+                status_code, _ = client.login(phone_number, "not-the-password")
+                counts[status_code] = counts.get(status_code, 0) + 1
+            with attack_lock:
+                for status_code, count in counts.items():
+                    attack[status_code] = attack.get(status_code, 0) + count
+
+        def user(number):
+            client = LoginClient(options["base_url"], number)
+            login = 0
+            while time.monotonic() < deadline:
+                # Each login is as another account, like different people
+                # signing in from the same office.
+                phone_number = employer_phone(
+                    (number + login * options["users"]) % options["employers"]
+                )
+                status_code, seconds = client.login(phone_number, options["password"])
+                user_samples.append(("user_login", seconds, status_code == 200))
+                login += 1
+                time.sleep(options["user_interval"])
+
+        threads = [
+            threading.Thread(target=attacker, args=(number,))
+            for number in range(options["attackers"])
+        ] + [threading.Thread(target=user, args=(number,)) for number in range(options["users"])]
+        cpu_before = cpu_seconds(options["server_pid"])
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        cpu = cpu_seconds(options["server_pid"]) - cpu_before
+
+        attempts = sum(attack.values())
+        return {
+            "meta": {
+                "base_url": options["base_url"],
+                "attackers": options["attackers"],
+                "attacker_ips": options["attacker_ips"],
+                "users": options["users"],
+                "duration_s": round(elapsed, 2),
+                "seed": options["seed"],
+                "started_at": started_at.isoformat(),
+            },
+            "attack": {
+                "attempts": attempts,
+                "attempts_per_s": round(attempts / elapsed, 2),
+                # A 401 means the password was hashed and checked.
+                "hashed": attack.get(401, 0),
+                "hashed_per_s": round(attack.get(401, 0) / elapsed, 2),
+                "throttled": attack.get(429, 0),
+                "other": attempts - attack.get(401, 0) - attack.get(429, 0),
+            },
+            "server_cpu": {
+                "seconds": round(cpu, 2),
+                "cores": round(cpu / elapsed, 2),
+            },
+            "scenarios": summarize(user_samples, elapsed),
+        }
@@ -0,0 +1,192 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.loadtest import summarize
+from todo_app.writequeue import WriteQueue
+
+SCHEMA = """
+    CREATE TABLE bench_task (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        assigned_to INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+"""
+
+
+class Profile:
+    """How the benchmark's connections are configured."""
+
+    def __init__(self, name, pragmas, begin, queue):
+        self.name = name
+        self.pragmas = pragmas
+        self.begin = begin
+        self.queue = queue
+
+    def connect(self, path):
+        # Python's default 5 second busy timeout, as Django's backend uses.
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent task writes and reads against a scratch SQLite "
+        "file, with SQLite's defaults and with the SQLITE_PRAGMAS profile "
+        "plus BEGIN IMMEDIATE and the in-process write queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=16)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument(
+            "--directory",
+            help="Where to create the scratch databases (default: a temporary directory).",
+        )
+        parser.add_argument("--output", help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        profiles = [
+            Profile("default", {}, "BEGIN", None),
+            Profile(
+                "profile",
+                getattr(settings, "SQLITE_PRAGMAS", {}),
+                "BEGIN IMMEDIATE",
+                WriteQueue(),
+            ),
+        ]
+        results = {}
+        with tempfile.TemporaryDirectory(dir=options["directory"]) as directory:
+            for profile in profiles:
+                path = os.path.join(directory, f"{profile.name}.sqlite3")
+                self.seed(profile, path, options["rows"])
+                results[profile.name] = self.run(profile, path, options)
+                self.report(profile.name, results[profile.name])
+
+        before = self.committed_per_second(results["default"])
+        after = self.committed_per_second(results["profile"])
+        if before:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Committed writes {before}/s -> {after}/s ({after / before:.1f}x), "
+                    f"failed writes {results['default']['scenarios']['write']['errors']} "
+                    f"-> {results['profile']['scenarios']['write']['errors']}."
+                )
+            )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+
+    def seed(self, profile, path, rows):
+        connection = profile.connect(path)
+        connection.execute(SCHEMA)
+        connection.execute("CREATE INDEX bench_task_assignee ON bench_task (assigned_to, id)")
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO bench_task (title, assigned_to, status, updated_at) VALUES (?, ?, ?, ?)",
+            ((f"Task {i}", i % 100, "PENDING", time.time()) for i in range(rows)),
+        )
+        connection.execute("COMMIT")
+        connection.close()
+
+    def run(self, profile, path, options):
+        samples = []
+        samples_lock = threading.Lock()
+        deadline = time.perf_counter() + options["duration"]
+
+        def work(scenario, operation):
+            connection = profile.connect(path)
+            rng = random.Random(threading.get_ident())
+            local = []
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    operation(connection, rng)
+                    ok = True
+                except sqlite3.OperationalError:
+                    # "database is locked": the request would have failed.
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    ok = False
+                local.append((scenario, time.perf_counter() - start, ok))
+            connection.close()
+            with samples_lock:
+                samples.extend(local)
+
+        def write(connection, rng):
+            if profile.queue is not None:
+                profile.queue.acquire()
+            try:
+                # Read, then write: what the create and update views do.
+                connection.execute(profile.begin)
+                assignee = rng.randrange(100)
+                connection.execute(
+                    "SELECT COUNT(*) FROM bench_task WHERE assigned_to = ?", [assignee]
+                ).fetchone()
+                cursor = connection.execute(
+                    "INSERT INTO bench_task (title, assigned_to, status, updated_at) "
+                    "VALUES (?, ?, 'PENDING', ?)",
+                    ["New task", assignee, time.time()],
+                )
+                connection.execute(
+                    "UPDATE bench_task SET status = 'IN_PROGRESS', updated_at = ? WHERE id = ?",
+                    [time.time(), cursor.lastrowid],
+                )
+                connection.execute("COMMIT")
+            finally:
+                if profile.queue is not None:
+                    profile.queue.release()
+
+        def read(connection, rng):
+            connection.execute(
+                "SELECT id, title, status FROM bench_task WHERE assigned_to = ? "
+                "ORDER BY id DESC LIMIT 50",
+                [rng.randrange(100)],
+            ).fetchall()
+
+        threads = [
+            threading.Thread(target=work, args=("write", write))
+            for _ in range(options["writers"])
+        ] + [
+            threading.Thread(target=work, args=("read", read))
+            for _ in range(options["readers"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {"elapsed": round(elapsed, 2), "scenarios": summarize(samples, elapsed)}
+
+    def committed_per_second(self, result):
+        writes = result["scenarios"].get("write")
+        if not writes or not result["elapsed"]:
+            return None
+        return round((writes["requests"] - writes["errors"]) / result["elapsed"], 2)
+
+    def report(self, name, result):
+        self.stdout.write(f"{name} ({result['elapsed']}s)")
+        self.stdout.write(
+            f"  {'scenario':<10}{'ops':>8}{'errors':>8}{'ops/s':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for scenario, row in result["scenarios"].items():
+            self.stdout.write(
+                f"  {scenario:<10}{row['requests']:>8}{row['errors']:>8}"
+                f"{row['throughput_rps'] or 0:>10}{row['p50_ms'] or 0:>10}"
+                f"{row['p95_ms'] or 0:>10}{row['p99_ms'] or 0:>10}"
+            )
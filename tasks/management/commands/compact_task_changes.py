@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove superseded task change log rows and tombstones older than the "
+        "retention period. Clients whose sync cursor predates a purged "
+        "tombstone are asked to resync from zero."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=getattr(settings, "TASK_TOMBSTONE_RETENTION_DAYS", 30),
+            help="Keep tombstones younger than this many days.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to compact (default: 'default').",
+        )
+
+    def handle(self, *args, **options):
+        superseded, purged = sync.compact(
+            timedelta(days=options["retention_days"]),
+            chunk_size=options["chunk_size"],
+            using=options["database"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Removed {superseded} superseded changes and {purged} expired tombstones."
+            )
+        )
@@ -0,0 +1,185 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from tasks import search, sharding, stats, sync
+from tasks.loadtest import (
+    EMPLOYEE_PREFIX,
+    EMPLOYER_PREFIX,
+    LOAD_PASSWORD,
+    employee_phone,
+    employer_phone,
+    phone_range,
+)
+from tasks.models import Task
+
+User = get_user_model()
+
+WORDS = (
+    "review report invoice client meeting deploy update audit draft budget "
+    "schedule follow-up onboarding contract design test release inventory "
+    "payroll training survey migration backup proposal estimate"
+).split()
+
+STATUSES = ["PENDING", "IN_PROGRESS", "COMPLETED"]
+STATUS_WEIGHTS = [30, 20, 50]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate employers, employees and tasks for load testing. Accounts "
+        "get predictable phone numbers (see tasks/loadtest.py) and share one "
+        "password hash, so generation does not pay for hashing per user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employers", type=int, default=1000)
+        parser.add_argument("--employees", type=int, default=100000)
+        parser.add_argument("--tasks", type=int, default=5000000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread task creation times over this many past days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--password", default=LOAD_PASSWORD)
+        parser.add_argument(
+            "--database",
+            default="default",
+            help=(
+                "Database alias to fill (default: 'default'). With the default, "
+                "tasks are spread over their employers' shards."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        batch_size = options["batch_size"]
+        rng = random.Random(options["seed"])
+        password_hash = make_password(options["password"])
+
+        self.create_users(
+            options["employers"],
+            lambda number: User(
+                phone_number=employer_phone(number),
+                first_name=f"Employer {number}",
+                password=password_hash,
+                role="EMPLOYER",
+                is_staff=True,
+            ),
+            batch_size,
+            using,
+        )
+        self.create_users(
+            options["employees"],
+            lambda number: User(
+                phone_number=employee_phone(number),
+                first_name=f"Employee {number}",
+                password=password_hash,
+                role="EMPLOYEE",
+            ),
+            batch_size,
+            using,
+        )
+
+        employer_ids = self.generated_ids(EMPLOYER_PREFIX, options["employers"], using)
+        employee_ids = self.generated_ids(EMPLOYEE_PREFIX, options["employees"], using)
+        if options["tasks"] and not (employer_ids and employee_ids):
+            self.stderr.write("Tasks need at least one employer and one employee.")
+            return
+
+        # A few employers own most of the tasks, as in real tenants.
+        employer_weights = list(
+            itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(employer_ids)))
+        )
+        # Through the default manager, each task lands on its employer's shard.
+        tasks_manager = (
+            Task.objects if using == DEFAULT_DB_ALIAS else Task.objects.using(using)
+        )
+        shards = sharding.get_shards() if using == DEFAULT_DB_ALIAS else [using]
+        now = timezone.now()
+        span = options["days"] * 86400
+        created = 0
+        while created < options["tasks"]:
+            count = min(batch_size, options["tasks"] - created)
+            tasks = []
+            for _ in range(count):
+                created_at = now - timedelta(seconds=rng.uniform(0, span))
+                status = rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+                tasks.append(
+                    Task(
+                        title=" ".join(rng.sample(WORDS, 3)).capitalize(),
+                        description=(
+                            " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+                            if rng.random() < 0.8
+                            else None
+                        ),
+                        created_by_id=rng.choices(
+                            employer_ids, cum_weights=employer_weights
+                        )[0],
+                        assigned_to_id=rng.choice(employee_ids),
+                        status=status,
+                        created_at=created_at,
+                        updated_at=(
+                            created_at
+                            if status == "PENDING"
+                            else min(
+                                created_at + timedelta(seconds=rng.uniform(0, span / 10)),
+                                now,
+                            )
+                        ),
+                    )
+                )
+            with transaction.atomic(using=using):
+                sharding.bulk_create_with_timestamps(tasks_manager, tasks)
+                sync.record_changes(
+                    (
+                        (task.id, task.created_by_id, task.assigned_to_id, False)
+                        for task in tasks
+                    ),
+                    shard=using,
+                    using=using,
+                )
+            created += count
+            self.stdout.write(f"Created {created}/{options['tasks']} tasks", ending="\r")
+            self.stdout.flush()
+
+        if options["tasks"]:
+            self.stdout.write("")
+            for shard in shards:
+                rows = stats.rebuild(using=shard)
+                self.stdout.write(f"Rebuilt {rows} task statistics rows on {shard}.")
+                if search.is_supported(connections[shard]):
+                    search.optimize_index(connections[shard])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(employer_ids)} employers, {len(employee_ids)} "
+                f"employees and {created} tasks."
+            )
+        )
+
+    def create_users(self, count, build, batch_size, using):
+        for start in range(0, count, batch_size):
+            User.objects.using(using).bulk_create(
+                [build(number) for number in range(start, min(start + batch_size, count))],
+                ignore_conflicts=True,
+            )
+
+    def generated_ids(self, prefix, count, using):
+        """Ids of the first ``count`` generated accounts, including earlier runs'."""
+        low, high = phone_range(prefix)
+        return list(
+            User.objects.using(using)
+            .filter(phone_number__range=(low, high))
+            .order_by("phone_number")
+            .values_list("id", flat=True)[:count]
+        )
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from tasks import sharding
+from tasks import stats as task_stats
+from tasks.models import TaskShardAssignment
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move one employer's tasks and statistics to another shard. Their "
+        "tasks stay readable throughout; writes are refused with 503 while "
+        "the copy runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employer", type=int, required=True)
+        parser.add_argument("--to", required=True, help="Target shard alias.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--settle-seconds",
+            type=float,
+            help=(
+                "Wait this long after each shard map change so every process "
+                "sees it (default: TASK_SHARD_MAP_CACHE_SECONDS)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        employer_id = options["employer"]
+        target = options["to"]
+        settle = options["settle_seconds"]
+        if settle is None:
+            settle = getattr(settings, "TASK_SHARD_MAP_CACHE_SECONDS", 60)
+
+        if target not in sharding.get_shards():
+            raise CommandError(f"'{target}' is not one of TASK_SHARDS.")
+        if not User.objects.filter(id=employer_id, role="EMPLOYER").exists():
+            raise CommandError(f"Employer {employer_id} does not exist.")
+
+        sharding.forget_assignment(employer_id)
+        source, moving, _ = sharding.get_assignment(employer_id)
+        if moving:
+            raise CommandError(f"Employer {employer_id} is already being moved.")
+        if source == target:
+            self.stdout.write(f"Employer {employer_id} is already on {target}.")
+            return
+
+        assignments = TaskShardAssignment.objects.using(DEFAULT_DB_ALIAS)
+        assignments.update_or_create(
+            employer_id=employer_id, defaults={"shard": source, "moving": True}
+        )
+        sharding.forget_assignment(employer_id)
+        try:
+            # Let cached shard maps expire and in-flight writes finish.
+            time.sleep(settle)
+            # Leftovers of an earlier, interrupted move.
+            sharding.delete_employer_rows(employer_id, using=target)
+            copied = sharding.copy_employer_tasks(
+                employer_id, source, target, options["chunk_size"]
+            )
+            task_stats.rebuild(employer_id, using=target)
+        except BaseException:
+            assignments.filter(employer_id=employer_id).update(moving=False)
+            sharding.forget_assignment(employer_id)
+            raise
+
+        assignments.filter(employer_id=employer_id).update(shard=target, moving=False)
+        sharding.forget_assignment(employer_id)
+        self.stdout.write(f"Copied {copied} tasks from {source} to {target}.")
+
+        # Readers with the old map cached still use the source copy.
+        time.sleep(settle)
+        sharding.delete_employer_rows(employer_id, using=source)
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved employer {employer_id} from {source} to {target}.")
+        )
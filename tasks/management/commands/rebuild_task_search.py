@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Reinstall the task search index triggers and reindex every task. "
+        "Run after migrations that rebuild the tasks table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--optimize",
+            action="store_true",
+            help="Merge the index into a single segment after rebuilding.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to rebuild (default: 'default').",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not search.is_supported(connection):
+            raise CommandError("Task search requires SQLite with FTS5.")
+        with transaction.atomic(using=options["database"]):
+            search.install(connection)
+            indexed = search.rebuild(connection, optimize=options["optimize"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} tasks."))
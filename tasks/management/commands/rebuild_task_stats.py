@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tasks import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the task statistics summary table from the tasks table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--employer",
+            type=int,
+            help="Only rebuild the statistics of this employer id.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to rebuild (default: 'default').",
+        )
+
+    def handle(self, *args, **options):
+        rows = stats.rebuild(
+            employer_id=options["employer"], using=options["database"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} task statistics rows."))
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the local stand-in replicas "
+        "listed in DATABASE_REPLICAS (or given with --replica)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--replica",
+            action="append",
+            help="Replica alias to refresh; may be repeated (default: all).",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Keep copying every this many seconds, emulating replication lag.",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["replica"] or getattr(settings, "DATABASE_REPLICAS", [])
+        if not aliases:
+            raise CommandError("No replicas configured; pass --replica or set DATABASE_REPLICAS.")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias not in settings.DATABASES:
+                raise CommandError(f"Unknown database alias '{alias}'.")
+            if connections[alias].vendor != "sqlite" or primary.vendor != "sqlite":
+                raise CommandError("sync_replica only copies SQLite databases.")
+
+        while True:
+            primary.ensure_connection()
+            for alias in aliases:
+                with sqlite3.connect(connections[alias].settings_dict["NAME"]) as target:
+                    primary.connection.backup(target)
+                self.stdout.write(self.style.SUCCESS(f"Copied {DEFAULT_DB_ALIAS} into {alias}."))
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_task_stats(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    TaskStat = apps.get_model("tasks", "TaskStat")
+    db_alias = schema_editor.connection.alias
+    rows = (
+        Task.objects.using(db_alias)
+        .values("created_by_id", "assigned_to_id", "status")
+        .annotate(total=models.Count("id"))
+        .order_by()
+    )
+    TaskStat.objects.using(db_alias).bulk_create(
+        [
+            TaskStat(
+                created_by_id=row["created_by_id"],
+                assigned_to_id=row["assigned_to_id"],
+                status=row["status"],
+                count=row["total"],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_task_creator_status_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In Progress'), ('COMPLETED', 'Completed')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('assigned_to', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task statistic',
+                'verbose_name_plural': 'Task statistics',
+                'constraints': [models.UniqueConstraint(fields=('created_by', 'assigned_to', 'status'), name='unique_task_stat')],
+            },
+        ),
+        migrations.RunPython(populate_task_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_task_changes(apps, schema_editor):
+    """Log every existing task once so that syncing from zero sees them all."""
+    Task = apps.get_model("tasks", "Task")
+    TaskChange = apps.get_model("tasks", "TaskChange")
+    db_alias = schema_editor.connection.alias
+    rows = (
+        Task.objects.using(db_alias)
+        .order_by("id")
+        .values_list("id", "created_by_id", "assigned_to_id")
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for task_id, created_by_id, assigned_to_id in rows:
+        batch.append(
+            TaskChange(
+                task_id=task_id,
+                created_by_id=created_by_id,
+                assigned_to_id=assigned_to_id,
+            )
+        )
+        if len(batch) >= 2000:
+            TaskChange.objects.using(db_alias).bulk_create(batch)
+            batch = []
+    TaskChange.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_taskstat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('task_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('assigned_to', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task change',
+                'verbose_name_plural': 'Task changes',
+                'indexes': [models.Index(fields=['created_by', 'seq'], name='taskchange_creator_seq_idx'), models.Index(fields=['assigned_to', 'seq'], name='taskchange_assignee_seq_idx'), models.Index(fields=['task_id', 'assigned_to', 'seq'], name='taskchange_task_seq_idx')],
+            },
+        ),
+        migrations.RunPython(seed_task_changes, migrations.RunPython.noop),
+    ]
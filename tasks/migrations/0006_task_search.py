@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# The schema as of this migration, copied rather than imported from
+# tasks.search so that later changes there cannot rewrite history.
+INSTALL_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title, description, scope,
+        content='', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description,
+                'c' || new.created_by_id || ' a' || new.assigned_to_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description,
+                'c' || old.created_by_id || ' a' || old.assigned_to_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update
+    AFTER UPDATE OF title, description, created_by_id, assigned_to_id ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description,
+                'c' || old.created_by_id || ' a' || old.assigned_to_id);
+        INSERT INTO tasks_task_fts (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description,
+                'c' || new.created_by_id || ' a' || new.assigned_to_id);
+    END
+    """,
+]
+
+INDEX_SQL = """
+    INSERT INTO tasks_task_fts (rowid, title, description, scope)
+    SELECT id, title, description, 'c' || created_by_id || ' a' || assigned_to_id
+    FROM tasks_task
+"""
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+
+def install_task_search(apps, schema_editor):
+    """Create the FTS5 index and its triggers, then index existing tasks."""
+    # FTS5 is SQLite only; other databases go without search.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in [*INSTALL_SQL, INDEX_SQL]:
+        schema_editor.execute(statement)
+
+
+def uninstall_task_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in UNINSTALL_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0005_taskchange"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_task_search, uninstall_task_search),
+    ]
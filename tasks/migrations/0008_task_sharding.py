@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The search schema of 0006_task_search, copied rather than imported from
+# tasks.search so that later changes there cannot rewrite history.
+INSTALL_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title, description, scope,
+        content='', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description,
+                'c' || new.created_by_id || ' a' || new.assigned_to_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description,
+                'c' || old.created_by_id || ' a' || old.assigned_to_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update
+    AFTER UPDATE OF title, description, created_by_id, assigned_to_id ON tasks_task
+    BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description,
+                'c' || old.created_by_id || ' a' || old.assigned_to_id);
+        INSERT INTO tasks_task_fts (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description,
+                'c' || new.created_by_id || ' a' || new.assigned_to_id);
+    END
+    """,
+]
+
+
+def reinstall_task_search(apps, schema_editor):
+    """Restore the search triggers dropped when tasks_task was rebuilt."""
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in INSTALL_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_updated_indexes'),
+        ('users', '0004_customuser_token_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskShardAssignment',
+            fields=[
+                ('employer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('shard', models.CharField(max_length=100)),
+                ('moving', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='assigned_to',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks_assigned', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='created_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='taskstat',
+            name='assigned_to',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='taskstat',
+            name='created_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(reinstall_task_search, migrations.RunPython.noop),
+    ]
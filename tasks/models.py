@@ -1,10 +1,78 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from todo_app.tracking import LoadedValuesMixin
+
 User = get_user_model()
 
 
-class Task(models.Model):
+class TaskReadQuerySet(models.QuerySet):
+    """Task rows live on their employer's shard (see ``tasks.sharding``).
+
+    The read querysets stay on the shard: they load the owner ids instead of
+    joining the users table, which only exists on the default database.
+    """
+
+    def for_employer_read(self):
+        """Load the columns ``TaskSerializer`` renders, both owner ids included.
+
+        Employers see who created and who is assigned each task.
+        """
+        return self.only(
+            "id",
+            "title",
+            "description",
+            "status",
+            "created_at",
+            "updated_at",
+            "created_by",
+            "assigned_to",
+        )
+
+    def for_employee_read(self):
+        """Load the columns ``EmployeeTaskSerializer`` renders, plus the
+        timestamps that list cursors order by.
+
+        The employee is the assignee, so ``created_by`` stays deferred.
+        """
+        return self.only(
+            "id",
+            "title",
+            "description",
+            "status",
+            "created_at",
+            "updated_at",
+            "assigned_to",
+        )
+
+
+class TaskQuerySet(TaskReadQuerySet):
+    def create(self, **kwargs):
+        if self._db is None:
+            from . import sharding
+
+            shard = sharding.shard_for(self.model(**kwargs).created_by_id, for_write=True)
+            return super(TaskQuerySet, self.using(shard)).create(**kwargs)
+        return super().create(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert each task into its employer's shard, with global ids."""
+        from . import sharding
+
+        objs = list(objs)
+        sharding.assign_ids(objs)
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        by_shard = {}
+        for task in objs:
+            shard = sharding.shard_for(task.created_by_id, for_write=True)
+            by_shard.setdefault(shard, []).append(task)
+        for shard, tasks in by_shard.items():
+            super(TaskQuerySet, self.using(shard)).bulk_create(tasks, *args, **kwargs)
+        return objs
+
+
+class Task(LoadedValuesMixin, models.Model):
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
         ("IN_PROGRESS", "In Progress"),
@@ -13,19 +81,228 @@ class Task(models.Model):
 
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
+    # No database constraints: on a shard the users table is not present.
     created_by = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="tasks_created"
+        User, on_delete=models.CASCADE, related_name="tasks_created", db_constraint=False
     )
     assigned_to = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="tasks_assigned"
+        User, on_delete=models.CASCADE, related_name="tasks_assigned", db_constraint=False
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.pk is None:
+            from . import sharding
+
+            sharding.assign_ids([self])
+            # With an id already set, save() would try an UPDATE first.
+            if self.pk is not None:
+                kwargs.setdefault("force_insert", True)
+        super().save(*args, **kwargs)
+        # Signal handlers have seen the old values; the stored row is now current.
+        self.remember_loaded_values()
+
     class Meta:
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="task_creator_created_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "created_at", "id"],
+                name="task_assignee_created_idx",
+            ),
+            models.Index(
+                fields=["created_by", "status", "updated_at"],
+                name="task_creator_status_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "status", "updated_at"],
+                name="task_assignee_status_idx",
+            ),
+            models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="task_creator_updated_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "updated_at", "id"],
+                name="task_assignee_updated_idx",
+            ),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """A completed task moved out of ``Task`` by ``archive_tasks``.
+
+    Lives on the same shard as its employer's tasks and keeps the task's id,
+    so ids stay unique across both tables and list cursors work on their
+    union. Archived tasks are read-only and still counted in ``TaskStat``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_constraint=False
+    )
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_constraint=False
+    )
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    objects = TaskReadQuerySet.as_manager()
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        verbose_name = "Archived task"
+        verbose_name_plural = "Archived tasks"
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="archived_creator_created_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "created_at", "id"],
+                name="archived_assignee_created_idx",
+            ),
+            models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="archived_creator_updated_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "updated_at", "id"],
+                name="archived_assignee_updated_idx",
+            ),
+        ]
+
+
+class TaskStat(models.Model):
+    """Number of tasks per ``(created_by, assigned_to, status)``.
+
+    Maintained incrementally by the task write paths so dashboards can read
+    one row per employee and status instead of counting tasks.
+    """
+
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_constraint=False
+    )
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_constraint=False
+    )
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.created_by_id}/{self.assigned_to_id}/{self.status}: {self.count}"
+
+    class Meta:
+        verbose_name = "Task statistic"
+        verbose_name_plural = "Task statistics"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "assigned_to", "status"],
+                name="unique_task_stat",
+            ),
+        ]
+
+
+class TaskChange(models.Model):
+    """Append-only log of task writes, read by the delta sync endpoint.
+
+    ``seq`` is the change sequence: SQLite's AUTOINCREMENT never reuses a
+    value and writers are serialized, so it grows in commit order. A row
+    tells the task's creator and assignee that the task changed; whether it
+    was updated or removed from their view is decided by reading the task.
+    ``deleted`` marks rows written for deletions and reassignments, which
+    are the tombstones kept for ``TASK_TOMBSTONE_RETENTION_DAYS``.
+
+    The user references carry no database constraint so that tombstones
+    outlive the users whose deletion produced them.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    task_id = models.BigIntegerField()
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    assigned_to = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.seq} task {self.task_id}{' (deleted)' if self.deleted else ''}"
+
+    class Meta:
+        verbose_name = "Task change"
+        verbose_name_plural = "Task changes"
+        indexes = [
+            models.Index(fields=["created_by", "seq"], name="taskchange_creator_seq_idx"),
+            models.Index(fields=["assigned_to", "seq"], name="taskchange_assignee_seq_idx"),
+            models.Index(
+                fields=["task_id", "assigned_to", "seq"], name="taskchange_task_seq_idx"
+            ),
+        ]
+
+
+class TaskChangeHorizon(models.Model):
+    """Highest change sequence whose tombstone has been purged.
+
+    Clients syncing from an older cursor may have missed deletions and must
+    start over from zero.
+    """
+
+    seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Purged up to #{self.seq}"
+
+
+class TaskShardAssignment(models.Model):
+    """The shard holding an employer's tasks, pinned on their first write.
+
+    ``moving`` is set while ``move_employer_tasks`` copies the employer to
+    another shard; their tasks are read-only until it is cleared.
+    """
+
+    employer = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    shard = models.CharField(max_length=100)
+    moving = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employer_id} -> {self.shard}{' (moving)' if self.moving else ''}"
+
+
+class TaskIdSequence(models.Model):
+    """Next unallocated task id, shared by all shards so ids stay unique."""
+
+    next_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Next task id {self.next_id}"
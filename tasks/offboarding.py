@@ -0,0 +1,140 @@
+"""Releasing an offboarded employee's tasks in bounded batches.
+
+Deleting a user makes Django's collector load every task that cascades
+from it and delete them all in one transaction, holding the write lock for
+as long as that takes. ``release_tasks`` instead takes the employee's tasks
+``batch_size`` at a time, each batch in its own short transaction, and
+either deletes them or hands them to another employee. Once it is done,
+deleting the user has nothing left to cascade to.
+
+Rows are removed and reassigned with single statements, so the statistics,
+change log, push events and cached lists are updated here, once per batch,
+as the bulk status endpoint does.
+"""
+
+from collections import Counter
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import cache as task_list_cache
+from . import events as task_events
+from . import stats as task_stats
+from . import sync
+from .models import ArchivedTask, Task
+from .sharding import get_shards
+
+
+def count_tasks(employee_id):
+    """Tasks and archived tasks assigned to ``employee_id`` on every shard."""
+    return sum(
+        model.objects.using(shard).filter(assigned_to_id=employee_id).count()
+        for shard in get_shards()
+        for model in (Task, ArchivedTask)
+    )
+
+
+def release_tasks(employee_id, batch_size, reassign=None, progress=None):
+    """Delete the employee's tasks, or reassign some of them, batch by batch.
+
+    ``reassign`` is an ``(employer_id, assignee_id)`` pair: tasks created by
+    that employer go to ``assignee_id``, the others are deleted. ``progress``
+    is called with the size of each finished batch. Returns the counts of
+    deleted and reassigned tasks.
+    """
+    result = {"deleted": 0, "reassigned": 0}
+    for shard in get_shards():
+        for model in (Task, ArchivedTask):
+            tasks = model.objects.using(shard).filter(assigned_to_id=employee_id)
+            while True:
+                with transaction.atomic(using=shard):
+                    # Every batch leaves the employee's tasks, so the next
+                    # one starts from the top of the (assigned_to, ...) index.
+                    rows = list(
+                        tasks.order_by("created_at", "id").values_list(
+                            "id", "created_by_id", "status"
+                        )[:batch_size]
+                    )
+                    if not rows:
+                        break
+                    handed_over = [row for row in rows if reassign and row[1] == reassign[0]]
+                    dropped = [row for row in rows if not (reassign and row[1] == reassign[0])]
+                    if handed_over:
+                        _reassign(model, shard, handed_over, employee_id, reassign[1])
+                    if dropped:
+                        _delete(model, shard, dropped, employee_id)
+                result["reassigned"] += len(handed_over)
+                result["deleted"] += len(dropped)
+                if progress is not None:
+                    progress(len(rows))
+    return result
+
+
+def _delete(model, shard, rows, employee_id):
+    ids = [task_id for task_id, _, _ in rows]
+    with connections[shard].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {model._meta.db_table} WHERE id IN ({', '.join(['%s'] * len(ids))})",
+            ids,
+        )
+    deltas = Counter()
+    for _, created_by_id, task_status in rows:
+        deltas[task_stats.task_key(created_by_id, employee_id, task_status)] -= 1
+    task_stats.apply_deltas(deltas, using=shard)
+    employer_ids = {created_by_id for _, created_by_id, _ in rows}
+    if model is Task:
+        sync.record_changes(
+            ((task_id, created_by_id, employee_id, True) for task_id, created_by_id, _ in rows),
+            shard=shard,
+        )
+        task_events.publish_task_events(
+            (
+                ({employee_id, created_by_id}, task_events.task_event("deleted", task_id))
+                for task_id, created_by_id, _ in rows
+            ),
+            using=shard,
+        )
+    task_list_cache.invalidate_task_lists({employee_id, *employer_ids}, using=shard)
+
+
+def _reassign(model, shard, rows, employee_id, assignee_id):
+    ids = [task_id for task_id, _, _ in rows]
+    changes = {"assigned_to_id": assignee_id}
+    if model is Task:
+        # Archived tasks keep their completion time.
+        changes["updated_at"] = timezone.now()
+    model.objects.using(shard).filter(id__in=ids).update(**changes)
+
+    deltas = Counter()
+    for _, created_by_id, task_status in rows:
+        deltas[task_stats.task_key(created_by_id, employee_id, task_status)] -= 1
+        deltas[task_stats.task_key(created_by_id, assignee_id, task_status)] += 1
+    task_stats.apply_deltas(deltas, using=shard)
+    employer_ids = {created_by_id for _, created_by_id, _ in rows}
+    if model is Task:
+        sync.record_changes(
+            (
+                change
+                for task_id, created_by_id, _ in rows
+                for change in (
+                    (task_id, created_by_id, employee_id, True),
+                    (task_id, created_by_id, assignee_id, False),
+                )
+            ),
+            shard=shard,
+        )
+        task_events.publish_task_events(
+            (
+                event
+                for task_id, created_by_id, task_status in rows
+                for event in (
+                    ({employee_id}, task_events.task_event("deleted", task_id)),
+                    ({assignee_id}, task_events.task_event("created", task_id, task_status)),
+                    ({created_by_id}, task_events.task_event("updated", task_id, task_status)),
+                )
+            ),
+            using=shard,
+        )
+    task_list_cache.invalidate_task_lists(
+        {employee_id, assignee_id, *employer_ids}, using=shard
+    )
@@ -0,0 +1,167 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskCursorPagination(BasePagination):
+    """Keyset pagination on ``(ordering field, id)`` with an opaque cursor.
+
+    Each page is fetched with ``WHERE field <= x AND (field < x OR id < y)``
+    followed by ``ORDER BY field, id LIMIT n``, which a composite index on
+    ``(owner, field, id)`` serves as a bounded range scan no matter how deep
+    the client has paged.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering="-created_at"):
+        self.ordering = ordering
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+        self.page_size = getattr(settings, "TASK_PAGE_SIZE", 50)
+        self.max_page_size = getattr(settings, "TASK_MAX_PAGE_SIZE", 500)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, value, pk):
+        raw = f"{value.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            value, pk = raw.rsplit("|", 1)
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ParseError(self.invalid_cursor_message)
+        if value is None:
+            raise ParseError(self.invalid_cursor_message)
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view=view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """Page through the union of ``querysets``, e.g. one per task shard.
+
+        Each queryset returns its own next page; the pages are merged on the
+        same ``(field, id)`` key, so the cursor works across all of them.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        rows = []
+        for queryset in querysets:
+            rows.extend(self.get_rows(queryset, position, page_size + 1))
+        if len(querysets) > 1:
+            rows.sort(
+                key=lambda row: (getattr(row, self.field), row.pk),
+                reverse=self.descending,
+            )
+
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        if self.has_next:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, self.field), last.pk)
+        else:
+            self.next_cursor = None
+        return rows
+
+    def get_rows(self, queryset, position, limit):
+        if position is not None:
+            value, pk = position
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(**{f"{self.field}__lte": value}),
+                    Q(**{f"{self.field}__lt": value}) | Q(pk__lt=pk),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{self.field}__gte": value}),
+                    Q(**{f"{self.field}__gt": value}) | Q(pk__gt=pk),
+                )
+
+        pk_ordering = "-pk" if self.descending else "pk"
+        return list(queryset.order_by(self.ordering, pk_ordering)[:limit])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TaskSearchPagination(TaskCursorPagination):
+    """Keyset pagination over ``(rank, id)`` of full-text search matches."""
+
+    def __init__(self):
+        super().__init__(ordering="rank")
+
+    def encode_cursor(self, value, pk):
+        raw = f"{value!r}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            value, pk = raw.rsplit("|", 1)
+            return float(value), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ParseError(self.invalid_cursor_message)
+
+    def paginate_matches(self, fetch, request):
+        """Page through ``fetch(after, limit)``, which returns ``(pk, rank)`` rows."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        rows = fetch(position, page_size + 1)
+
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        if self.has_next:
+            pk, rank = rows[-1]
+            self.next_cursor = self.encode_cursor(rank, pk)
+        else:
+            self.next_cursor = None
+        return [pk for pk, _ in rows]
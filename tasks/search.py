@@ -0,0 +1,148 @@
+"""Full-text search over task titles and descriptions (SQLite FTS5).
+
+``tasks_task_fts`` is a contentless FTS5 table: it stores only the index, not
+a second copy of the text. Triggers on ``tasks_task`` keep it in step with
+every write, including ``bulk_create`` and ``QuerySet.update`` which bypass
+model signals.
+
+Each row also indexes a ``scope`` column holding ``c<created_by_id>`` and
+``a<assigned_to_id>``. Queries always require the caller's scope token, so
+FTS5 intersects the term posting lists with the caller's own posting list
+and a search never walks other tenants' matches.
+
+Migrations that rebuild ``tasks_task`` (SQLite's way of altering columns)
+drop its triggers; ``rebuild_task_search`` reinstalls them.
+"""
+
+import re
+
+from django.db import connections
+
+FTS_TABLE = "tasks_task_fts"
+
+# bm25 weights of title, description and scope.
+RANK = f"bm25({FTS_TABLE}, 10.0, 1.0, 0.0)"
+
+MAX_TERMS = 16
+
+SCOPE = "'c' || {row}.created_by_id || ' a' || {row}.assigned_to_id"
+
+INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, scope,
+        content='', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task
+    BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description, {SCOPE.format(row="new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task
+    BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description, {SCOPE.format(row="old")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update
+    AFTER UPDATE OF title, description, created_by_id, assigned_to_id ON tasks_task
+    BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description, scope)
+        VALUES ('delete', old.id, old.title, old.description, {SCOPE.format(row="old")});
+        INSERT INTO {FTS_TABLE} (rowid, title, description, scope)
+        VALUES (new.id, new.title, new.description, {SCOPE.format(row="new")});
+    END
+    """,
+]
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def is_supported(connection):
+    return connection.vendor == "sqlite"
+
+
+def install(connection):
+    """Create the index table and its triggers if they are missing."""
+    with connection.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(connection, optimize=False):
+    """Reindex every task from scratch; returns the number of tasks indexed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')")
+        cursor.execute(
+            f"""
+            INSERT INTO {FTS_TABLE} (rowid, title, description, scope)
+            SELECT id, title, description, {SCOPE.format(row="tasks_task")}
+            FROM tasks_task
+            """
+        )
+        indexed = cursor.rowcount
+    if optimize:
+        optimize_index(connection)
+    return indexed
+
+
+def optimize_index(connection):
+    """Merge the index segments; worth doing after large bulk loads."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def parse_terms(query):
+    """Split free text into at most ``MAX_TERMS`` words, dropping FTS5 syntax."""
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def match_expression(scope_token, terms):
+    """Build a MATCH expression requiring ``scope_token`` and every term.
+
+    Terms are quoted so they are never read as operators; the last one is a
+    prefix so that partially typed words match.
+    """
+    phrases = [f'"{term}"' for term in terms]
+    phrases[-1] += "*"
+    return f'scope : "{scope_token}" AND {{title description}} : ({" ".join(phrases)})'
+
+
+def search(scope_token, terms, limit, after=None, using="default"):
+    """Return up to ``limit`` ``(task_id, rank)`` pairs, best match first.
+
+    ``after`` is the ``(rank, task_id)`` of the last row of the previous
+    page; results are ordered by ``(rank, task_id)`` so pages never overlap.
+    """
+    sql = f"""
+        SELECT rowid, score FROM (
+            SELECT rowid, {RANK} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s
+        )
+    """
+    params = [match_expression(scope_token, terms)]
+    if after is not None:
+        rank, task_id = after
+        sql += " WHERE score > %s OR (score = %s AND rowid > %s)"
+        params += [rank, rank, task_id]
+    sql += " ORDER BY score, rowid LIMIT %s"
+    params.append(limit)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -2,17 +2,28 @@ from rest_framework import serializers
 from .models import Task
 from django.contrib.auth import get_user_model
 
+from todo_app.metrics import SerializerTimingMixin
+
 User = get_user_model()
 
 
-class TaskSerializer(serializers.ModelSerializer):
-    created_by = serializers.ReadOnlyField(
-        source="created_by.phone_number"
-    )  
-    assigned_to = serializers.SlugRelatedField(
-        slug_field="id",
+def get_phone_number(serializer, user_id, user_field):
+    """Phone number of ``user_id``, from the ``phone_numbers`` context if given.
+
+    Tasks may live on a shard without the users table, so views pass the
+    numbers they already know instead of having every row join or fetch it.
+    """
+    phone_numbers = serializer.context.get("phone_numbers", {})
+    if user_id in phone_numbers:
+        return phone_numbers[user_id]
+    return user_field().phone_number
+
+
+class TaskSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    created_by = serializers.SerializerMethodField()
+    assigned_to = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(
-            role="EMPLOYEE"
+            role="EMPLOYEE", is_active=True
         ),  
         error_messages={
             "does_not_exist": "Employee with this phone number does not exist."
@@ -32,25 +43,43 @@ class TaskSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    def get_created_by(self, task):
+        return get_phone_number(self, task.created_by_id, lambda: task.created_by)
+
     def validate_assigned_to(self, value):
         if value.role != "EMPLOYEE":
             raise serializers.ValidationError("Task can only be assigned to employees.")
         return value
 
     def create(self, validated_data):
-        validated_data["created_by"] = self.context["request"].user
+        validated_data["created_by_id"] = self.context["request"].user.id
         return super().create(validated_data)
 
 
-class EmployeeTaskSerializer(serializers.ModelSerializer):
-    assigned_to = serializers.ReadOnlyField(
-        source="assigned_to.phone_number"
-    ) 
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """Validates one entry of a bulk create payload without touching the DB.
+
+    ``assigned_to`` is taken as a raw id here; the view resolves every
+    assignee of the batch in a single query afterwards.
+    """
+
+    assigned_to = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Task
+        fields = ["title", "description", "assigned_to", "status"]
+
+
+class EmployeeTaskSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    assigned_to = serializers.SerializerMethodField()
     status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
 
     class Meta:
         model = Task
-        fields = ["id", "title", "description", "status", "assigned_to", "due_date"]
+        fields = ["id", "title", "description", "status", "assigned_to"]
+
+    def get_assigned_to(self, task):
+        return get_phone_number(self, task.assigned_to_id, lambda: task.assigned_to)
 
     def validate_status(self, value):
         if value not in dict(Task.STATUS_CHOICES):
@@ -0,0 +1,289 @@
+"""Per-employer sharding of task data.
+
+``TASK_SHARDS`` lists the database aliases that hold ``Task`` and
+``TaskStat`` rows, and ``ArchivedTask``'s. All of an employer's tasks live on one shard, so
+employer endpoints touch a single database, while employee endpoints
+gather from every shard. Users, the change log and the shard map itself
+stay on the default database.
+
+The shard map is deterministic: a new employer hashes to a shard and is
+pinned there by a ``TaskShardAssignment`` row on their first write, so
+adding shards later never moves existing tenants implicitly. Moving one is
+explicit, through ``move_employer_tasks``.
+
+With more than one shard, task ids come from ``TaskIdSequence`` in blocks
+of ``TASK_ID_BLOCK_SIZE`` rather than per-table autoincrement, so they stay
+unique across shards and survive moves.
+"""
+
+import threading
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F, Max
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from todo_app import routers
+from .models import ArchivedTask, Task, TaskIdSequence, TaskShardAssignment, TaskStat
+
+SHARDED_MODELS = {"tasks.task", "tasks.taskstat", "tasks.archivedtask"}
+
+_ids_lock = threading.Lock()
+_id_block = [0, 0]
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "These tasks are being moved to another database; retry shortly."
+    default_code = "shard_moving"
+
+
+def get_shards():
+    return list(getattr(settings, "TASK_SHARDS", [DEFAULT_DB_ALIAS]))
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+def home_shard(employer_id):
+    """The shard a new employer hashes to."""
+    shards = get_shards()
+    return shards[zlib.crc32(str(employer_id).encode()) % len(shards)]
+
+
+def _get_cache():
+    return caches[getattr(settings, "TASK_SHARD_MAP_CACHE_ALIAS", "default")]
+
+
+def _assignment_key(employer_id):
+    return f"tasks:shard:{employer_id}"
+
+
+def get_assignment(employer_id):
+    """Return ``(shard, moving, pinned)`` for ``employer_id``."""
+    cache = _get_cache()
+    key = _assignment_key(employer_id)
+    entry = cache.get(key)
+    if entry is None:
+        row = (
+            TaskShardAssignment.objects.using(DEFAULT_DB_ALIAS)
+            .filter(employer_id=employer_id)
+            .values_list("shard", "moving")
+            .first()
+        )
+        entry = (*row, True) if row else (home_shard(employer_id), False, False)
+        cache.set(key, entry, timeout=getattr(settings, "TASK_SHARD_MAP_CACHE_SECONDS", 60))
+    return entry
+
+
+def forget_assignment(employer_id):
+    _get_cache().delete(_assignment_key(employer_id))
+
+
+def shard_for(employer_id, for_write=False):
+    """Return the alias holding ``employer_id``'s tasks.
+
+    Writers pass ``for_write``: it pins the employer to the shard and raises
+    ``ShardMoving`` while their tasks are being moved.
+    """
+    if for_write:
+        routers.note_write()
+    shards = get_shards()
+    if len(shards) == 1:
+        return shards[0]
+    shard, moving, pinned = get_assignment(employer_id)
+    if for_write:
+        if moving:
+            raise ShardMoving()
+        if not pinned:
+            try:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    TaskShardAssignment.objects.using(DEFAULT_DB_ALIAS).create(
+                        employer_id=employer_id, shard=shard
+                    )
+            except IntegrityError:
+                # Pinned by a concurrent writer; use its choice.
+                pass
+            forget_assignment(employer_id)
+            shard = get_assignment(employer_id)[0]
+    return shard
+
+
+def read_db(shard):
+    """Alias to read ``shard`` from: a replica when the request allows it."""
+    return routers.read_alias(shard)
+
+
+def employer_tasks(employer_id, model=Task):
+    """The employer's tasks, or their archived tasks with ``model=ArchivedTask``."""
+    return model.objects.using(read_db(shard_for(employer_id))).filter(
+        created_by_id=employer_id
+    )
+
+
+def assigned_tasks(employee_id, model=Task):
+    """One queryset per shard; an employee can work for employers on any shard."""
+    return [
+        model.objects.using(read_db(shard)).filter(assigned_to_id=employee_id)
+        for shard in get_shards()
+    ]
+
+
+def find_assigned_task(task_id, employee_id):
+    """Load an employee's task for writing, from its employer's current shard."""
+    for shard in get_shards():
+        tasks = Task.objects.filter(id=task_id, assigned_to_id=employee_id)
+        task = tasks.using(shard).first()
+        if task is None:
+            continue
+        home = shard_for(task.created_by_id, for_write=True)
+        if home == shard:
+            return task
+        # A copy left on the old shard by a move; the current one is on ``home``.
+        return tasks.using(home).first()
+    return None
+
+
+def assign_ids(tasks):
+    """Give unsaved tasks globally unique ids when there are several shards."""
+    if not is_sharded():
+        return
+    missing = [task for task in tasks if task.pk is None]
+    for task, task_id in zip(missing, allocate_ids(len(missing))):
+        task.pk = task_id
+
+
+def allocate_ids(count):
+    ids = []
+    with _ids_lock:
+        while len(ids) < count:
+            if _id_block[0] >= _id_block[1]:
+                size = max(getattr(settings, "TASK_ID_BLOCK_SIZE", 1000), count - len(ids))
+                start = _reserve_ids(size)
+                _id_block[:] = [start, start + size]
+            taken = min(count - len(ids), _id_block[1] - _id_block[0])
+            ids.extend(range(_id_block[0], _id_block[0] + taken))
+            _id_block[0] += taken
+    return ids
+
+
+def _reserve_ids(size):
+    """Reserve ``size`` consecutive ids and return the first."""
+    sequences = TaskIdSequence.objects.using(DEFAULT_DB_ALIAS)
+    while True:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            if sequences.filter(pk=1).update(next_id=F("next_id") + size):
+                return sequences.values_list("next_id", flat=True).get(pk=1) - size
+        # First allocation: continue after the highest id any shard holds.
+        start = 1 + max(
+            Task.objects.using(shard).aggregate(highest=Max("id"))["highest"] or 0
+            for shard in get_shards()
+        )
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                sequences.create(pk=1, next_id=start + size)
+            return start
+        except IntegrityError:
+            continue
+
+
+def bulk_create_with_timestamps(queryset, tasks, batch_size=None):
+    """``bulk_create`` tasks keeping their own ``created_at``/``updated_at``.
+
+    The insert stamps both with the current time; ``bulk_update``, which
+    leaves the fields alone, writes the given ones back on each database
+    the tasks went to.
+    """
+    tasks = list(tasks)
+    timestamps = [(task.created_at, task.updated_at) for task in tasks]
+    queryset.bulk_create(tasks, batch_size=batch_size)
+    by_db = {}
+    for task, (created_at, updated_at) in zip(tasks, timestamps):
+        task.created_at, task.updated_at = created_at, updated_at
+        by_db.setdefault(task._state.db, []).append(task)
+    for using, group in by_db.items():
+        Task.objects.using(using).bulk_update(
+            group, ["created_at", "updated_at"], batch_size=batch_size or 500
+        )
+    return tasks
+
+
+def copy_employer_tasks(employer_id, source, target, chunk_size):
+    """Copy an employer's tasks, archived ones too, ids and timestamps included.
+
+    Returns the number of rows copied.
+    """
+    copied = 0
+    for model in (Task, ArchivedTask):
+        rows = model.objects.using(source).filter(created_by_id=employer_id).order_by("id")
+        last_id = 0
+        while chunk := list(rows.filter(id__gt=last_id)[:chunk_size]):
+            with transaction.atomic(using=target):
+                if model is Task:
+                    bulk_create_with_timestamps(Task.objects.using(target), chunk)
+                else:
+                    # Archived timestamps are plain fields.
+                    model.objects.using(target).bulk_create(chunk)
+            copied += len(chunk)
+            last_id = chunk[-1].id
+    return copied
+
+
+def delete_employer_rows(employer_id, using):
+    """Remove an employer's tasks, archived tasks and statistics without signals.
+
+    The rows are copies, so they must not reach the change log as deletions.
+    """
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {Task._meta.db_table} WHERE created_by_id = %s", [employer_id]
+        )
+        deleted = cursor.rowcount
+        for model in (ArchivedTask, TaskStat):
+            cursor.execute(
+                f"DELETE FROM {model._meta.db_table} WHERE created_by_id = %s",
+                [employer_id],
+            )
+    return deleted
+
+
+class TaskShardRouter:
+    """Route writes of task instances to their employer's shard.
+
+    Queries without an instance are left to the next router; code reading
+    tasks picks the shard explicitly through ``shard_for``/``read_db``.
+    """
+
+    def _route(self, model, hints, for_write):
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return None
+        instance = hints.get("instance")
+        if instance is None or not isinstance(instance, (Task, TaskStat, ArchivedTask)):
+            return None
+        if instance._state.db:
+            return instance._state.db
+        return shard_for(instance.created_by_id, for_write=for_write)
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints, for_write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints, for_write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Tasks reference users across databases; the FKs carry no constraint.
+        if {obj1._meta.label_lower, obj2._meta.label_lower} & SHARDED_MODELS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Databases dedicated to shards hold only the sharded tables.
+        if db in getattr(settings, "TASK_SHARD_DATABASES", []):
+            if model_name is None:
+                return app_label == "tasks"
+            return f"{app_label}.{model_name}" in SHARDED_MODELS
+        return None
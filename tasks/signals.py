@@ -0,0 +1,139 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_task_lists
+from .events import publish_task_events, task_event
+from .models import ArchivedTask, Task, TaskStat
+from .sharding import get_shards
+from .stats import apply_deltas, task_key
+from .sync import record_changes
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_list_cache(sender, instance, using, **kwargs):
+    """Expire cached task lists of everyone who can see ``instance``."""
+    user_ids = {instance.created_by_id, instance.assigned_to_id}
+    # A reassignment also removes the task from the previous assignee's list.
+    user_ids.add(instance.get_loaded_value("assigned_to_id"))
+    invalidate_task_lists(user_ids, using=using)
+
+
+@receiver(pre_save, sender=Task)
+def remember_stored_task(sender, instance, using, **kwargs):
+    """Load the stored row for updates of instances not read from the DB."""
+    if instance._state.adding or hasattr(instance, "_loaded_values"):
+        return
+    instance._loaded_values = (
+        Task.objects.using(using)
+        .filter(pk=instance.pk)
+        .values("created_by_id", "assigned_to_id", "status")
+        .first()
+        or {}
+    )
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, using, **kwargs):
+    """Move the task from its previous statistics bucket to its current one."""
+    deltas = Counter()
+    deltas[task_key(instance.created_by_id, instance.assigned_to_id, instance.status)] += 1
+    loaded = getattr(instance, "_loaded_values", None)
+    # An empty snapshot means the row did not exist before this save.
+    if not created and loaded:
+        previous = task_key(
+            loaded.get("created_by_id", instance.created_by_id),
+            loaded.get("assigned_to_id", instance.assigned_to_id),
+            loaded.get("status", instance.status),
+        )
+        deltas[previous] -= 1
+    apply_deltas(deltas, using=using)
+
+
+@receiver(post_delete, sender=Task)
+def uncount_deleted_task(sender, instance, using, **kwargs):
+    key = task_key(instance.created_by_id, instance.assigned_to_id, instance.status)
+    apply_deltas({key: -1}, using=using)
+
+
+@receiver(post_save, sender=Task)
+def log_saved_task(sender, instance, created, using, **kwargs):
+    changes = []
+    previous_assignee = instance.get_loaded_value("assigned_to_id")
+    if not created and previous_assignee not in (None, instance.assigned_to_id):
+        # Tombstone for the employee the task was taken away from.
+        changes.append((instance.pk, instance.created_by_id, previous_assignee, True))
+    changes.append((instance.pk, instance.created_by_id, instance.assigned_to_id, False))
+    # The change log lives on the default database, whichever shard ``using`` is.
+    record_changes(changes, shard=using)
+
+
+@receiver(post_delete, sender=Task)
+def log_deleted_task(sender, instance, using, **kwargs):
+    record_changes(
+        [(instance.pk, instance.created_by_id, instance.assigned_to_id, True)], shard=using
+    )
+
+
+@receiver(post_save, sender=Task)
+def push_saved_task(sender, instance, created, using, **kwargs):
+    if created:
+        events = [
+            (
+                {instance.created_by_id, instance.assigned_to_id},
+                task_event("created", instance.pk, instance.status),
+            )
+        ]
+    else:
+        previous_assignee = instance.get_loaded_value("assigned_to_id")
+        if previous_assignee not in (None, instance.assigned_to_id):
+            events = [
+                ({previous_assignee}, task_event("deleted", instance.pk)),
+                (
+                    {instance.assigned_to_id},
+                    task_event("created", instance.pk, instance.status),
+                ),
+                (
+                    {instance.created_by_id},
+                    task_event("updated", instance.pk, instance.status),
+                ),
+            ]
+        else:
+            events = [
+                (
+                    {instance.created_by_id, instance.assigned_to_id},
+                    task_event("updated", instance.pk, instance.status),
+                )
+            ]
+    publish_task_events(events, using=using)
+
+
+@receiver(post_delete, sender=Task)
+def push_deleted_task(sender, instance, using, **kwargs):
+    publish_task_events(
+        [
+            (
+                {instance.created_by_id, instance.assigned_to_id},
+                task_event("deleted", instance.pk),
+            )
+        ],
+        using=using,
+    )
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_tasks(sender, instance, using, **kwargs):
+    """Delete the user's tasks on other shards; cascades stay within ``using``."""
+    for shard in get_shards():
+        if shard == using:
+            continue
+        owned = Q(created_by_id=instance.pk) | Q(assigned_to_id=instance.pk)
+        Task.objects.using(shard).filter(owned).delete()
+        ArchivedTask.objects.using(shard).filter(owned).delete()
+        TaskStat.objects.using(shard).filter(owned).delete()
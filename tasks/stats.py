@@ -0,0 +1,80 @@
+"""Incremental maintenance of the ``TaskStat`` summary table."""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import ArchivedTask, Task, TaskStat
+
+
+def task_key(created_by_id, assigned_to_id, status):
+    return (created_by_id, assigned_to_id, status)
+
+
+def apply_deltas(deltas, using=None):
+    """Add ``{(created_by_id, assigned_to_id, status): delta}`` to the counts."""
+    for (created_by_id, assigned_to_id, status), delta in deltas.items():
+        if not delta:
+            continue
+        stats = TaskStat.objects.using(using).filter(
+            created_by_id=created_by_id, assigned_to_id=assigned_to_id, status=status
+        )
+        if stats.update(count=F("count") + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic(using=using):
+                TaskStat.objects.using(using).create(
+                    created_by_id=created_by_id,
+                    assigned_to_id=assigned_to_id,
+                    status=status,
+                    count=delta,
+                )
+        except IntegrityError:
+            # Another writer created the row first.
+            stats.update(count=F("count") + delta)
+
+
+def rebuild(employer_id=None, using=None):
+    """Recompute the counts from ``Task`` and ``ArchivedTask``, for one
+    employer or everyone."""
+    stats = TaskStat.objects.using(using).all()
+    if employer_id is not None:
+        stats = stats.filter(created_by_id=employer_id)
+
+    with transaction.atomic(using=using):
+        totals = Counter()
+        for model in (Task, ArchivedTask):
+            tasks = model.objects.using(using).all()
+            if employer_id is not None:
+                tasks = tasks.filter(created_by_id=employer_id)
+            rows = (
+                tasks.values("created_by_id", "assigned_to_id", "status")
+                .annotate(total=Count("id"))
+                .order_by()
+            )
+            for row in rows:
+                totals[
+                    task_key(row["created_by_id"], row["assigned_to_id"], row["status"])
+                ] += row["total"]
+        stats.delete()
+        created = TaskStat.objects.using(using).bulk_create(
+            [
+                TaskStat(
+                    created_by_id=created_by_id,
+                    assigned_to_id=assigned_to_id,
+                    status=status,
+                    count=total,
+                )
+                for (created_by_id, assigned_to_id, status), total in totals.items()
+            ],
+            batch_size=500,
+        )
+    return len(created)
+
+
+def count_tasks(tasks):
+    """Return a delta of +1 for each ``(created_by_id, assigned_to_id, status)``."""
+    return Counter(
+        task_key(task.created_by_id, task.assigned_to_id, task.status) for task in tasks
+    )
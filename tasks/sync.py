@@ -0,0 +1,116 @@
+"""Change log for the delta sync endpoint.
+
+Writes append ``TaskChange`` rows; readers ask for the rows after their
+cursor, within their own scope, and re-read the current state of the tasks
+those rows mention. A task that is no longer in the reader's scope is
+reported as deleted.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import TaskChange, TaskChangeHorizon
+
+
+def record_changes(changes, shard=None, using=None):
+    """Append ``(task_id, created_by_id, assigned_to_id, deleted)`` rows.
+
+    They are written once the transaction on ``shard``, which changed the
+    tasks, commits, so the log never points at rows a rollback undid.
+    """
+    rows = [
+        TaskChange(
+            task_id=task_id,
+            created_by_id=created_by_id,
+            assigned_to_id=assigned_to_id,
+            deleted=deleted,
+        )
+        for task_id, created_by_id, assigned_to_id, deleted in changes
+    ]
+    if rows:
+        transaction.on_commit(
+            lambda: TaskChange.objects.using(using).bulk_create(rows, batch_size=500),
+            using=shard,
+        )
+
+
+def get_horizon(using=None):
+    return (
+        TaskChangeHorizon.objects.using(using)
+        .filter(pk=1)
+        .values_list("seq", flat=True)
+        .first()
+        or 0
+    )
+
+
+def changes_since(scope, since, limit, using=None):
+    """Return ``(task_ids, cursor, has_more)`` for changes after ``since``.
+
+    ``scope`` is a filter such as ``{"assigned_to_id": 7}``; together with
+    the ``(owner, seq)`` indexes it keeps the lookup proportional to the
+    number of changes returned.
+    """
+    rows = list(
+        TaskChange.objects.using(using)
+        .filter(seq__gt=since, **scope)
+        .order_by("seq")
+        .values_list("seq", "task_id")[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1][0] if rows else since
+    task_ids = list(dict.fromkeys(task_id for _, task_id in rows))
+    return task_ids, cursor, has_more
+
+
+def compact(retention, chunk_size=1000, using=None):
+    """Drop superseded changes and tombstones older than ``retention``.
+
+    Works in independent chunks so it can be interrupted and rerun.
+    Returns ``(superseded, purged)`` row counts.
+    """
+    changes = TaskChange.objects.using(using)
+
+    # A change is superseded once a later one exists for the same task and
+    # assignee: every client that has not seen the earlier one will see the
+    # later one, so dropping it never loses information.
+    superseded = changes.filter(
+        Exists(
+            changes.filter(
+                task_id=OuterRef("task_id"),
+                assigned_to_id=OuterRef("assigned_to_id"),
+                seq__gt=OuterRef("seq"),
+            )
+        )
+    )
+    superseded_count = 0
+    last_seq = 0
+    while True:
+        with transaction.atomic(using=using):
+            # Walks the log once: each chunk starts after the previous one.
+            seqs = list(
+                superseded.filter(seq__gt=last_seq)
+                .order_by("seq")
+                .values_list("seq", flat=True)[:chunk_size]
+            )
+            if not seqs:
+                break
+            last_seq = seqs[-1]
+            superseded_count += changes.filter(seq__in=seqs).delete()[0]
+
+    expired = changes.filter(deleted=True, changed_at__lt=timezone.now() - retention)
+    purged_count = 0
+    while True:
+        with transaction.atomic(using=using):
+            seqs = list(expired.order_by("seq").values_list("seq", flat=True)[:chunk_size])
+            if not seqs:
+                break
+            horizon, _ = TaskChangeHorizon.objects.using(using).get_or_create(pk=1)
+            if seqs[-1] > horizon.seq:
+                horizon.seq = seqs[-1]
+                horizon.save(update_fields=["seq"])
+            purged_count += changes.filter(seq__in=seqs).delete()[0]
+
+    return superseded_count, purged_count
@@ -1,3 +1,1684 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from jobs.worker import Worker
+from todo_app import metrics, writequeue
+
+from users.models import CustomUser
+from users.tokens import RoleRefreshToken
+from . import archive
+from . import cache as task_list_cache
+from . import export
+from . import offboarding
+from . import loadtest
+from . import search
+from . import sharding
+from . import events as task_events
+from . import stats as task_stats
+from . import sync
+from .models import ArchivedTask, Task, TaskChange, TaskShardAssignment, TaskStat
+
+
+class TaskQueryPlanTests(TestCase):
+    """Every query issued by the task views must be served by an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.tasks = Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Task {i}",
+                    created_by=cls.employer,
+                    assigned_to=cls.employee,
+                )
+                for i in range(5)
+            ]
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedQueries(self, captured):
+        statements = [
+            query["sql"]
+            for query in captured
+            if query["sql"].split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE")
+        ]
+        self.assertTrue(statements, "view issued no queries to check")
+        for sql in statements:
+            for detail in self.explain(sql):
+                self.assertFalse(
+                    detail.startswith("SCAN "),
+                    f"full scan ({detail}) in query: {sql}",
+                )
+                self.assertNotIn(
+                    "TEMP B-TREE", detail, f"unindexed sort ({detail}) in query: {sql}"
+                )
+
+    def capture(self, method, url, user, **kwargs):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, format="json", **kwargs)
+        self.assertLess(response.status_code, 400, response.content)
+        return captured, response
+
+    def test_employer_task_list(self):
+        captured, response = self.capture(
+            "get", "/api/tasks/employer/tasks/?page_size=2", self.employer
+        )
+        self.assertIndexedQueries(captured)
+
+        captured, _ = self.capture("get", response.data["next"], self.employer)
+        self.assertIndexedQueries(captured)
+
+    def test_filtered_task_lists(self):
+        requests = [
+            ("/api/tasks/employer/tasks/?status=PENDING&ordering=-updated_at", self.employer),
+            ("/api/tasks/employer/tasks/?ordering=updated_at&updated_before=2100-01-01", self.employer),
+            (
+                f"/api/tasks/employer/tasks/?assigned_to={self.employee.id}"
+                "&created_after=2000-01-01&ordering=created_at",
+                self.employer,
+            ),
+            ("/api/tasks/tasks/?status=COMPLETED&ordering=-updated_at", self.employee),
+            ("/api/tasks/tasks/?created_before=2100-01-01T00:00:00Z", self.employee),
+            ("/api/tasks/employer/tasks/?include_archived=true&ordering=-updated_at", self.employer),
+            ("/api/tasks/tasks/?include_archived=true&status=COMPLETED", self.employee),
+        ]
+        for url, user in requests:
+            with self.subTest(url=url):
+                captured, _ = self.capture("get", f"{url}&page_size=2", user)
+                self.assertIndexedQueries(captured)
+
+    def test_employer_export_tasks(self):
+        self.client.force_authenticate(self.employer)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/tasks/employer/tasks/export/")
+            content = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(content.splitlines()), len(self.tasks) + 1)
+        self.assertIndexedQueries(captured)
+
+    def test_employer_task_stats(self):
+        captured, _ = self.capture("get", "/api/tasks/employer/tasks/stats/", self.employer)
+        self.assertIndexedQueries(captured)
+
+    def test_task_changes(self):
+        captured, response = self.capture(
+            "get", "/api/tasks/tasks/changes/?since=1", self.employee
+        )
+        self.assertIndexedQueries(captured)
+        captured, _ = self.capture(
+            "get",
+            f"/api/tasks/employer/tasks/changes/?since={response.data['cursor']}",
+            self.employer,
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employer_create_task(self):
+        captured, _ = self.capture(
+            "post",
+            "/api/tasks/employer/task/create/",
+            self.employer,
+            data={"title": "New", "assigned_to": self.employee.id},
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employer_bulk_create_tasks(self):
+        captured, _ = self.capture(
+            "post",
+            "/api/tasks/employer/tasks/bulk-create/",
+            self.employer,
+            data=[{"title": f"Bulk {i}", "assigned_to": self.employee.id} for i in range(3)],
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employer_update_task(self):
+        captured, _ = self.capture(
+            "put",
+            f"/api/tasks/employer/task/{self.tasks[0].id}/edit/",
+            self.employer,
+            data={"status": "IN_PROGRESS"},
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employer_delete_task(self):
+        captured, _ = self.capture(
+            "delete",
+            f"/api/tasks/employer/task/{self.tasks[0].id}/delete/",
+            self.employer,
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employee_task_list(self):
+        captured, response = self.capture(
+            "get", "/api/tasks/tasks/?page_size=2", self.employee
+        )
+        self.assertIndexedQueries(captured)
+
+        captured, _ = self.capture("get", response.data["next"], self.employee)
+        self.assertIndexedQueries(captured)
+
+    def test_employee_update_task(self):
+        captured, _ = self.capture(
+            "patch",
+            f"/api/tasks/tasks/{self.tasks[0].id}/",
+            self.employee,
+            data={"status": "COMPLETED"},
+        )
+        self.assertIndexedQueries(captured)
+
+    def test_employee_bulk_status_update(self):
+        captured, response = self.capture(
+            "patch",
+            "/api/tasks/tasks/bulk-status/",
+            self.employee,
+            data={
+                str(self.tasks[0].id): "COMPLETED",
+                str(self.tasks[1].id): "COMPLETED",
+                str(self.tasks[2].id): "IN_PROGRESS",
+                "999999": "COMPLETED",
+            },
+        )
+        self.assertIndexedQueries(captured)
+        self.assertEqual(len(response.data["updated"]), 3)
+        self.assertEqual(response.data["rejected"][0]["id"], 999999)
+
+    def test_status_filtered_queries_use_composite_indexes(self):
+        querysets = [
+            Task.objects.filter(created_by=self.employer, status="PENDING").order_by(
+                "updated_at"
+            ),
+            Task.objects.filter(assigned_to=self.employee, status="PENDING").order_by(
+                "-updated_at"
+            ),
+        ]
+        for queryset in querysets:
+            plan = queryset.explain()
+            self.assertIn("_status_idx", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TaskListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.other_employee = CustomUser.objects.create_employee(
+            "9000000003", "Secret@123"
+        )
+        cls.task = Task.objects.create(
+            title="Task", created_by=cls.employer, assigned_to=cls.employee
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+
+    def get_statuses(self, user, url):
+        self.client.force_authenticate(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [task["status"] for task in response.data["results"]]
+
+    def test_repeated_reads_are_served_from_cache(self):
+        before = task_list_cache.get_stats()
+        self.get_statuses(self.employer, "/api/tasks/employer/tasks/")
+        # Only the ETag aggregate runs; the page itself comes from the cache.
+        with self.assertNumQueries(1):
+            self.get_statuses(self.employer, "/api/tasks/employer/tasks/")
+        after = task_list_cache.get_stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_writes_invalidate_both_parties(self):
+        self.assertEqual(
+            self.get_statuses(self.employer, "/api/tasks/employer/tasks/"), ["PENDING"]
+        )
+        self.assertEqual(self.get_statuses(self.employee, "/api/tasks/tasks/"), ["PENDING"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.employee)
+            self.client.patch(
+                "/api/tasks/tasks/bulk-status/",
+                {str(self.task.id): "COMPLETED"},
+                format="json",
+            )
+
+        self.assertEqual(
+            self.get_statuses(self.employer, "/api/tasks/employer/tasks/"), ["COMPLETED"]
+        )
+        self.assertEqual(
+            self.get_statuses(self.employee, "/api/tasks/tasks/"), ["COMPLETED"]
+        )
+
+    def test_reassignment_invalidates_previous_assignee(self):
+        self.assertEqual(len(self.get_statuses(self.employee, "/api/tasks/tasks/")), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.employer)
+            self.client.put(
+                f"/api/tasks/employer/task/{self.task.id}/edit/",
+                {"assigned_to": self.other_employee.id},
+                format="json",
+            )
+
+        self.assertEqual(self.get_statuses(self.employee, "/api/tasks/tasks/"), [])
+        self.assertEqual(
+            len(self.get_statuses(self.other_employee, "/api/tasks/tasks/")), 1
+        )
+
+
+class TaskStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.other_employee = CustomUser.objects.create_employee(
+            "9000000003", "Secret@123"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def snapshot(self):
+        return {
+            (stat.created_by_id, stat.assigned_to_id, stat.status): stat.count
+            for stat in TaskStat.objects.filter(count__gt=0)
+        }
+
+    def assertStatsMatchTasks(self):
+        incremental = self.snapshot()
+        task_stats.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_write_paths_keep_statistics_in_sync(self):
+        self.client.force_authenticate(self.employer)
+        self.client.post(
+            "/api/tasks/employer/tasks/bulk-create/",
+            [{"title": f"Bulk {i}", "assigned_to": self.employee.id} for i in range(4)],
+            format="json",
+        )
+        self.client.post(
+            "/api/tasks/employer/task/create/",
+            {"title": "Single", "assigned_to": self.other_employee.id},
+            format="json",
+        )
+        task_ids = list(Task.objects.order_by("id").values_list("id", flat=True))
+        self.assertStatsMatchTasks()
+
+        self.client.put(
+            f"/api/tasks/employer/task/{task_ids[0]}/edit/",
+            {"assigned_to": self.other_employee.id, "status": "IN_PROGRESS"},
+            format="json",
+        )
+        self.client.delete(f"/api/tasks/employer/task/{task_ids[1]}/delete/")
+        self.assertStatsMatchTasks()
+
+        self.client.force_authenticate(self.employee)
+        self.client.patch(
+            "/api/tasks/tasks/bulk-status/",
+            {str(task_ids[2]): "COMPLETED", str(task_ids[3]): "IN_PROGRESS"},
+            format="json",
+        )
+        self.client.patch(
+            f"/api/tasks/tasks/{task_ids[2]}/", {"status": "PENDING"}, format="json"
+        )
+        self.assertStatsMatchTasks()
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.get("/api/tasks/employer/tasks/stats/")
+        self.assertEqual(response.data["total"], 4)
+        self.assertEqual(
+            response.data["totals"], {"PENDING": 2, "IN_PROGRESS": 2, "COMPLETED": 0}
+        )
+        self.assertEqual(len(response.data["employees"]), 2)
+
+
+class TaskExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.tasks = [
+            Task.objects.create(
+                title=f"Task {i}",
+                description='Quoted "text", with commas',
+                created_by=cls.employer,
+                assigned_to=cls.employee,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def export(self, query=""):
+        response = self.client.get(f"/api/tasks/employer/tasks/export/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.export()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.csv"')
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(
+            rows[0],
+            ["id", "title", "description", "status", "assigned_to", "created_at", "updated_at"],
+        )
+        self.assertEqual(
+            [row[:5] for row in rows[1:]],
+            [
+                [str(task.id), task.title, task.description, "PENDING", "9000000002"]
+                for task in self.tasks
+            ],
+        )
+
+    def test_ndjson(self):
+        response, content = self.export("?export_format=ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="tasks.ndjson"'
+        )
+        records = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([record["id"] for record in records], [task.id for task in self.tasks])
+        self.assertEqual(records[0]["description"], 'Quoted "text", with commas')
+        self.assertEqual(records[0]["assigned_to"], "9000000002")
+        self.assertEqual(records[0]["created_at"], self.tasks[0].created_at.isoformat()[:23] + "Z")
+
+    def test_gzip_round_trip(self):
+        _, plain = self.export("?export_format=ndjson")
+        # Small buffers make the compressor see several chunks.
+        with mock.patch.object(export, "BUFFER_SIZE", 64):
+            response, compressed = self.export("?export_format=ndjson&compress=gzip")
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="tasks.ndjson.gz"'
+        )
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get("/api/tasks/employer/tasks/export/?export_format=xml")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["error"], "Unsupported export format. Choose one of: csv, ndjson."
+        )
+        response = self.client.post(
+            "/api/tasks/employer/tasks/export/", {"export_format": "xml"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+
+class EmployerBulkCreateTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.other_employee = CustomUser.objects.create_employee(
+            "9000000003", "Secret@123"
+        )
+        cls.inactive = CustomUser.objects.create_employee("9000000004", "Secret@123")
+        CustomUser.objects.filter(pk=cls.inactive.pk).update(is_active=False)
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def post(self, items):
+        return self.client.post("/api/tasks/employer/tasks/bulk-create/", items, format="json")
+
+    def item(self, assigned_to, **fields):
+        return {"title": "Task", "assigned_to": assigned_to, **fields}
+
+    def index_errors(self, response):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "No tasks were created.")
+        self.assertFalse(Task.objects.exists())
+        return {item["index"]: item["errors"] for item in response.data["errors"]}
+
+    def test_creates_the_batch(self):
+        generations = [
+            task_list_cache.get_generation(user.id)
+            for user in (self.employer, self.employee, self.other_employee)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(
+                [
+                    self.item(self.employee.id),
+                    self.item(self.employee.id, status="COMPLETED"),
+                    self.item(self.other_employee.id),
+                ]
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Task.objects.values_list("id", flat=True)), sorted(response.data["task_ids"])
+        )
+        self.assertEqual(
+            sorted(TaskStat.objects.values_list("assigned_to_id", "status", "count")),
+            sorted(
+                [
+                    (self.employee.id, "PENDING", 1),
+                    (self.employee.id, "COMPLETED", 1),
+                    (self.other_employee.id, "PENDING", 1),
+                ]
+            ),
+        )
+        for user, generation in zip(
+            (self.employer, self.employee, self.other_employee), generations
+        ):
+            self.assertNotEqual(task_list_cache.get_generation(user.id), generation)
+
+    def test_reports_errors_by_index(self):
+        errors = self.index_errors(
+            self.post(
+                [
+                    self.item(self.employee.id),
+                    {"assigned_to": self.employee.id},
+                    self.item(self.employee.id, status="DONE"),
+                    self.item("abc"),
+                ]
+            )
+        )
+
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn("title", errors[1])
+        self.assertIn("status", errors[2])
+        self.assertIn("assigned_to", errors[3])
+
+    def test_non_employee_assignees_reject_the_batch(self):
+        errors = self.index_errors(
+            self.post(
+                [
+                    self.item(self.employee.id),
+                    self.item(self.employer.id),
+                    self.item(self.inactive.id),
+                    self.item(999999),
+                ]
+            )
+        )
+
+        expected = {"assigned_to": ["Task can only be assigned to employees."]}
+        self.assertEqual(errors, {1: expected, 2: expected, 3: expected})
+
+    @override_settings(TASK_BULK_CREATE_MAX=2)
+    def test_batch_size_cap(self):
+        response = self.post([self.item(self.employee.id)] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "At most 2 tasks can be created per request.")
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(self.post([self.item(self.employee.id)] * 2).status_code, 201)
+
+
+class EmployeeBulkTaskStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.other_employee = CustomUser.objects.create_employee(
+            "9000000003", "Secret@123"
+        )
+        cls.mine = Task.objects.create(
+            title="Mine", created_by=cls.employer, assigned_to=cls.employee
+        )
+        cls.also_mine = Task.objects.create(
+            title="Also mine", created_by=cls.employer, assigned_to=cls.employee
+        )
+        cls.theirs = Task.objects.create(
+            title="Theirs", created_by=cls.employer, assigned_to=cls.other_employee
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def patch(self, changes):
+        return self.client.patch("/api/tasks/tasks/bulk-status/", changes, format="json")
+
+    def test_applies_valid_changes_and_reports_the_rest(self):
+        response = self.patch(
+            {
+                str(self.mine.id): "COMPLETED",
+                str(self.also_mine.id): "DONE",
+                str(self.theirs.id): "COMPLETED",
+                "abc": "COMPLETED",
+                "999999": "IN_PROGRESS",
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], [self.mine.id])
+        self.assertEqual(
+            {row["id"]: row["error"] for row in response.data["rejected"]},
+            {
+                self.also_mine.id: "Invalid status provided.",
+                "abc": "Invalid task id.",
+                self.theirs.id: "Task not found or not assigned to you.",
+                999999: "Task not found or not assigned to you.",
+            },
+        )
+        self.assertEqual(
+            dict(Task.objects.values_list("title", "status")),
+            {"Mine": "COMPLETED", "Also mine": "PENDING", "Theirs": "PENDING"},
+        )
+
+    def test_rejects_non_string_statuses(self):
+        response = self.patch(
+            {str(self.mine.id): {"1": ["COMPLETED"]}, str(self.also_mine.id): ["COMPLETED"]}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], [])
+        self.assertEqual(
+            [row["error"] for row in response.data["rejected"]],
+            ["Invalid status provided."] * 2,
+        )
+
+    def test_rejects_empty_and_oversized_requests(self):
+        self.assertEqual(self.patch({}).status_code, 400)
+        self.assertEqual(self.patch([self.mine.id]).status_code, 400)
+        with override_settings(TASK_BULK_UPDATE_MAX=1):
+            response = self.patch(
+                {str(self.mine.id): "COMPLETED", str(self.also_mine.id): "COMPLETED"}
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(status="COMPLETED").exists())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.task = Task.objects.create(
+            title="Task", created_by=cls.employer, assigned_to=cls.employee
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+
+    def test_matching_etag_returns_304_without_loading_rows(self):
+        for user, url in [
+            (self.employer, "/api/tasks/employer/tasks/"),
+            (self.employee, "/api/tasks/tasks/"),
+        ]:
+            self.client.force_authenticate(user)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        self.client.force_authenticate(self.employer)
+        etag = self.client.get("/api/tasks/employer/tasks/")["ETag"]
+
+        Task.objects.create(
+            title="Another", created_by=self.employer, assigned_to=self.employee
+        )
+        response = self.client.get(
+            "/api/tasks/employer/tasks/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.task.delete()
+        response = self.client.get(
+            "/api/tasks/employer/tasks/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_is_not_honored(self):
+        # A delete does not move max(updated_at); only the ETag notices it.
+        self.client.force_authenticate(self.employer)
+        response = self.client.get("/api/tasks/employer/tasks/")
+        self.assertNotIn("Last-Modified", response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        response = self.client.get(
+            "/api/tasks/employer/tasks/", HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+
+
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.other_employee = CustomUser.objects.create_employee(
+            "9000000003", "Secret@123"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def sync(self, user, since):
+        self.client.force_authenticate(user)
+        if user.role == "EMPLOYER":
+            url = "/api/tasks/employer/tasks/changes/"
+        else:
+            url = "/api/tasks/tasks/changes/"
+        return self.client.get(url, {"since": since})
+
+    def test_changes_and_tombstones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Task.objects.create(
+                title="First", created_by=self.employer, assigned_to=self.employee
+            )
+            second = Task.objects.create(
+                title="Second", created_by=self.employer, assigned_to=self.employee
+            )
+        response = self.sync(self.employee, 0)
+        self.assertEqual([t["id"] for t in response.data["tasks"]], [first.id, second.id])
+        cursor = response.data["cursor"]
+
+        response = self.sync(self.employee, cursor)
+        self.assertEqual(response.data["tasks"], [])
+        self.assertEqual(response.data["cursor"], cursor)
+
+        first = Task.objects.get(pk=first.pk)
+        first.status = "COMPLETED"
+        second = Task.objects.get(pk=second.pk)
+        second.assigned_to = self.other_employee
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+            second.save()
+
+        response = self.sync(self.employee, cursor)
+        self.assertEqual([t["id"] for t in response.data["tasks"]], [first.id])
+        self.assertEqual(response.data["deleted"], [second.id])
+        cursor = response.data["cursor"]
+
+        employer_view = self.sync(self.employer, 0)
+        self.assertEqual(
+            sorted(t["id"] for t in employer_view.data["tasks"]), [first.id, second.id]
+        )
+        self.assertEqual(employer_view.data["deleted"], [])
+
+        first_id = first.id
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        response = self.sync(self.employee, cursor)
+        self.assertEqual(response.data["deleted"], [first_id])
+
+    def test_compaction_works_in_chunks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                title="Task", created_by=self.employer, assigned_to=self.employee
+            )
+            for task_status in ("IN_PROGRESS", "COMPLETED", "PENDING"):
+                task.status = task_status
+                task.save()
+
+        self.assertEqual(sync.compact(timedelta(days=30), chunk_size=2), (3, 0))
+        self.assertEqual(TaskChange.objects.get().task_id, task.id)
+
+    def test_rolled_back_writes_are_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                Task.objects.create(
+                    title="Task", created_by=self.employer, assigned_to=self.employee
+                )
+                raise DatabaseError
+
+        self.assertFalse(TaskChange.objects.exists())
+
+    def test_compaction_expires_old_cursors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                title="Task", created_by=self.employer, assigned_to=self.employee
+            )
+        cursor = self.sync(self.employee, 0).data["cursor"]
+        task_id = task.id
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+
+        superseded, purged = sync.compact(timedelta(days=30))
+        self.assertEqual((superseded, purged), (1, 0))
+        self.assertEqual(self.sync(self.employee, cursor).data["deleted"], [task_id])
+
+        superseded, purged = sync.compact(timedelta(days=-1))
+        self.assertEqual((superseded, purged), (0, 1))
+        self.assertEqual(self.sync(self.employee, cursor).status_code, 410)
+        self.assertEqual(self.sync(self.employee, 0).status_code, 200)
+
+
+class TaskEventStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.access = str(RoleRefreshToken.for_user(cls.employee).access_token)
+
+    def setUp(self):
+        caches["default"].clear()
+
+    async def test_subscriber_receives_its_events(self):
+        broker = task_events.get_broker()
+        response = await self.async_client.get(
+            "/api/tasks/events/", headers={"Authorization": f"Bearer {self.access}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+
+        broker.publish({self.employee.id + 1}, task_events.task_event("created", 1))
+        broker.publish(
+            {self.employee.id}, task_events.task_event("updated", 2, "COMPLETED")
+        )
+        chunk = await asyncio.wait_for(anext(stream), timeout=5)
+        self.assertEqual(
+            chunk,
+            b'event: task.updated\ndata: {"event": "task.updated", "task_id": 2, '
+            b'"status": "COMPLETED"}\n\n',
+        )
+        await stream.aclose()
+
+    async def test_stream_requires_a_valid_token(self):
+        response = await self.async_client.get("/api/tasks/events/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get("/api/tasks/events/?access_token=bogus")
+        self.assertEqual(response.status_code, 401)
+
+
+class QueryBudgetTests(TestCase):
+    """Read endpoints must issue a fixed number of queries, however many
+    tasks they return."""
+
+    budgets = [
+        ("EMPLOYER", "/api/tasks/employer/tasks/", 2),
+        ("EMPLOYER", "/api/tasks/employer/tasks/changes/", 2),
+        # Statistics and exports resolve phone numbers in a second query;
+        # exports read live and archived tasks separately.
+        ("EMPLOYER", "/api/tasks/employer/tasks/stats/", 2),
+        ("EMPLOYER", "/api/tasks/employer/tasks/export/", 3),
+        ("EMPLOYEE", "/api/tasks/tasks/", 2),
+        ("EMPLOYEE", "/api/tasks/tasks/changes/", 2),
+        ("EMPLOYER", "/api/tasks/employer/tasks/search/?q=task", 2),
+        ("EMPLOYEE", "/api/tasks/tasks/search/?q=task", 2),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employees = [
+            CustomUser.objects.create_employee(f"90000001{i:02d}", "Secret@123")
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_tasks(self, count):
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Task {i}",
+                    created_by=self.employer,
+                    assigned_to=self.employees[i % len(self.employees)],
+                )
+                for i in range(count)
+            ]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            sync.record_changes(
+                (task_id, created_by_id, assigned_to_id, False)
+                for task_id, created_by_id, assigned_to_id in Task.objects.values_list(
+                    "id", "created_by_id", "assigned_to_id"
+                )
+            )
+
+    def count_queries(self, role, url):
+        caches["tasks"].clear()
+        user = self.employer if role == "EMPLOYER" else self.employees[0]
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_query_budgets_do_not_grow_with_result_size(self):
+        self.create_tasks(1)
+        small = {url: self.count_queries(role, url) for role, url, _ in self.budgets}
+
+        self.create_tasks(60)
+        for role, url, budget in self.budgets:
+            with self.subTest(url=url):
+                self.assertLessEqual(small[url], budget)
+                self.assertEqual(self.count_queries(role, url), small[url])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        Task.objects.create(title="Task", created_by=cls.employer, assigned_to=cls.employee)
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+        patcher = mock.patch.object(metrics, "registry", metrics.MetricsRegistry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self):
+        response = self.client.get("/internal/metrics/")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_records_requests_by_url_name(self):
+        self.client.get("/api/tasks/employer/tasks/")
+
+        body = self.scrape()
+        labels = '{view="task-list",method="GET"}'
+        self.assertIn('http_requests_total{view="task-list",method="GET",status="200"} 1', body)
+        self.assertIn(f"http_request_duration_seconds_count{labels} 1", body)
+        # The validator aggregate and the page itself.
+        self.assertIn(f"http_db_queries_total{labels} 2", body)
+        self.assertIn(f"http_serializer_seconds_total{labels} ", body)
+        self.assertNotIn(f"http_response_bytes_total{labels} 0\n", body)
+
+    def test_endpoint_is_internal_only(self):
+        response = self.client.get("/internal/metrics/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
+
+    def test_merges_totals_of_other_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.MetricsRegistry()
+            other.observe("task-list", "GET", 200, 0.01, metrics.RequestMetrics(), 10)
+            exited = subprocess.Popen([sys.executable, "-c", ""])
+            exited.wait()
+            # A running process, and one that has exited.
+            for pid in (os.getppid(), exited.pid):
+                with open(os.path.join(directory, f"{pid}.json"), "w") as snapshot_file:
+                    json.dump(other.snapshot(), snapshot_file)
+
+            with override_settings(METRICS_DIR=directory):
+                self.client.get("/api/tasks/employer/tasks/")
+                body = self.scrape()
+            self.assertFalse(os.path.exists(os.path.join(directory, f"{exited.pid}.json")))
+
+        self.assertIn('http_requests_total{view="task-list",method="GET",status="200"} 2', body)
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(
+            metrics._labels(view='a\\b"c\nd'), '{view="a\\\\b\\"c\\nd"}'
+        )
+
+
+class LoadTestToolTests(TestCase):
+    def test_generated_data_keeps_summaries_consistent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "generate_load_data",
+                employers=2,
+                employees=5,
+                tasks=120,
+                batch_size=50,
+                stdout=io.StringIO(),
+            )
+
+        self.assertEqual(CustomUser.objects.filter(role="EMPLOYER").count(), 2)
+        self.assertEqual(CustomUser.objects.filter(role="EMPLOYEE").count(), 5)
+        self.assertEqual(Task.objects.count(), 120)
+        self.assertEqual(TaskChange.objects.count(), 120)
+        self.assertEqual(sum(TaskStat.objects.values_list("count", flat=True)), 120)
+        self.assertTrue(
+            self.client.login(
+                phone_number=loadtest.employer_phone(0), password=loadtest.LOAD_PASSWORD
+            )
+        )
+
+    def test_compare_flags_p95_and_throughput_regressions(self):
+        baseline = {"scenarios": loadtest.summarize([("list", 0.010, True)] * 100, 1.0)}
+        slower = {"scenarios": loadtest.summarize([("list", 0.020, True)] * 50, 1.0)}
+
+        _, regressions = loadtest.compare(baseline, baseline, 0.1)
+        self.assertEqual(regressions, [])
+        _, regressions = loadtest.compare(baseline, slower, 0.1)
+        self.assertEqual(
+            regressions,
+            [
+                "all: p95 latency up 100.0%",
+                "all: throughput down 50.0%",
+                "list: p95 latency up 100.0%",
+                "list: throughput down 50.0%",
+            ],
+        )
+
+
+class TaskSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.other_employer = CustomUser.objects.create_employer("9000000003", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def create_task(self, title, description=None, created_by=None):
+        return Task.objects.create(
+            title=title,
+            description=description,
+            created_by=created_by or self.employer,
+            assigned_to=self.employee,
+        )
+
+    def search(self, query, url="/api/tasks/employer/tasks/search/", **params):
+        response = self.client.get(url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranks_title_matches_first_and_scopes_to_caller(self):
+        in_description = self.create_task("Quarterly numbers", "Prepare the invoice run")
+        in_title = self.create_task("Invoice reminders")
+        self.create_task("Invoice audit", created_by=self.other_employer)
+
+        results = self.search("invoice")["results"]
+        self.assertEqual([task["id"] for task in results], [in_title.id, in_description.id])
+
+        self.client.force_authenticate(self.employee)
+        results = self.search("invoice", url="/api/tasks/tasks/search/")["results"]
+        self.assertEqual(len(results), 3)
+
+    def test_index_follows_updates_bulk_writes_and_deletes(self):
+        task = self.create_task("Draft contract")
+        task.title = "Signed contract"
+        task.save()
+        self.assertEqual(self.search("draft")["results"], [])
+        self.assertEqual(len(self.search("signed")["results"]), 1)
+
+        Task.objects.filter(id=task.id).update(assigned_to=self.employer)
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.search("signed", url="/api/tasks/tasks/search/")["results"], [])
+
+        self.client.force_authenticate(self.employer)
+        task.delete()
+        self.assertEqual(self.search("signed")["results"], [])
+
+    def test_paginates_with_a_cursor_and_ignores_query_syntax(self):
+        for i in range(5):
+            self.create_task(f"Payroll batch {i}")
+
+        first = self.search('batch "payr', page_size=3)
+        self.assertEqual(len(first["results"]), 3)
+        cursor = first["next"].split("cursor=")[1].split("&")[0]
+        second = self.search('batch "payr', page_size=3, cursor=cursor)
+        self.assertIsNone(second["next"])
+        ids = [task["id"] for task in first["results"] + second["results"]]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_rejects_empty_queries(self):
+        response = self.client.get("/api/tasks/employer/tasks/search/", {"q": " ?! "})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command_restores_the_index(self):
+        task = self.create_task("Inventory count")
+        search.uninstall(connection)
+        search.install(connection)
+        self.assertEqual(self.search("inventory")["results"], [])
+
+        call_command("rebuild_task_search", stdout=io.StringIO())
+        self.assertEqual([t["id"] for t in self.search("inventory")["results"]], [task.id])
+
+
+class TaskListFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.first = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        cls.second = CustomUser.objects.create_employee("9000000003", "Secret@123")
+        cls.pending = Task.objects.create(
+            title="Pending", created_by=cls.employer, assigned_to=cls.first
+        )
+        cls.in_progress = Task.objects.create(
+            title="In progress",
+            created_by=cls.employer,
+            assigned_to=cls.first,
+            status="IN_PROGRESS",
+        )
+        cls.other = Task.objects.create(
+            title="Other", created_by=cls.employer, assigned_to=cls.second
+        )
+        Task.objects.filter(id=cls.pending.id).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def list_ids(self, url="/api/tasks/employer/tasks/", **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [task["id"] for task in response.data["results"]]
+
+    def test_filters_by_status_and_assignee(self):
+        self.assertEqual(
+            self.list_ids(status="IN_PROGRESS", assigned_to=self.first.id),
+            [self.in_progress.id],
+        )
+        self.assertEqual(
+            self.list_ids(assigned_to=self.second.id), [self.other.id]
+        )
+
+    def test_filters_by_date_range(self):
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        self.assertEqual(
+            sorted(self.list_ids(created_after=since)),
+            sorted([self.in_progress.id, self.other.id]),
+        )
+        self.assertEqual(self.list_ids(created_before=since), [self.pending.id])
+
+    def test_orders_by_whitelisted_fields(self):
+        Task.objects.filter(id=self.other.id).update(
+            updated_at=timezone.now() - timedelta(days=30)
+        )
+        self.assertEqual(self.list_ids(ordering="updated_at")[0], self.other.id)
+        self.assertEqual(self.list_ids(ordering="created_at")[0], self.pending.id)
+
+    def test_employee_list_is_filtered_within_own_tasks(self):
+        self.client.force_authenticate(self.first)
+        self.assertEqual(
+            self.list_ids("/api/tasks/tasks/", status="PENDING", assigned_to=self.second.id),
+            [self.pending.id],
+        )
+
+    def test_rejects_invalid_filters(self):
+        for params in (
+            {"status": "DONE"},
+            {"ordering": "title"},
+            {"created_after": "yesterday"},
+            {"created_after": "2020-13-45"},
+            {"updated_before": "2020-02-30T10:00:00"},
+            {"assigned_to": "me"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get("/api/tasks/employer/tasks/", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.data)
+
+
+class TaskCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        start = timezone.now() - timedelta(days=1)
+        # Pairs of tasks share a creation time, so the id breaks the tie.
+        cls.tasks = sharding.bulk_create_with_timestamps(
+            Task.objects,
+            [
+                Task(
+                    title=f"Task {i}",
+                    created_by=cls.employer,
+                    assigned_to=cls.employee,
+                    created_at=start + timedelta(minutes=i // 2),
+                    updated_at=start,
+                )
+                for i in range(7)
+            ],
+        )
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def get(self, **params):
+        return self.client.get("/api/tasks/employer/tasks/", params)
+
+    def page_through(self, **params):
+        pages = []
+        response = self.get(**params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([task["id"] for task in response.data["results"]])
+            if response.data["next"] is None:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_pages_follow_created_at_then_id(self):
+        ids = [task.id for task in sorted(self.tasks, key=lambda task: (task.created_at, task.id))]
+
+        pages = self.page_through(ordering="created_at", page_size=2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), ids)
+        self.assertEqual(sum(self.page_through(ordering="-created_at", page_size=3), []), ids[::-1])
+
+    def test_pages_do_not_overlap(self):
+        pages = self.page_through(page_size=2)
+
+        seen = sum(pages, [])
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(task.id for task in self.tasks))
+
+    @override_settings(TASK_PAGE_SIZE=4, TASK_MAX_PAGE_SIZE=5)
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.get(page_size=100).data["results"]), 5)
+        self.assertIsNotNone(self.get(page_size=100).data["next"])
+        self.assertEqual(len(self.get().data["results"]), 4)
+        self.assertEqual(len(self.get(page_size=0).data["results"]), 4)
+        self.assertEqual(len(self.get(page_size="many").data["results"]), 4)
+
+    def test_tampered_cursors_are_rejected(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+
+        cursors = [
+            "not base64!",
+            encode("no separator"),
+            encode("not a date|1"),
+            encode("2024-13-45T00:00:00+00:00|1"),
+            encode("2024-01-01T00:00:00+00:00|one"),
+            base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.get(cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["detail"], "Invalid cursor")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["tasks"].clear()
+        self.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        self.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        self.client = APIClient()
+        access = RoleRefreshToken.for_user(self.employer).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def count_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(
+            connections["replica"]
+        ) as replica:
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 400, response.content)
+        return len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        primary, replica = self.count_queries("get", "/api/tasks/employer/tasks/")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        primary, replica = self.count_queries(
+            "post",
+            "/api/tasks/employer/task/create/",
+            {"title": "New", "assigned_to": self.employee.id},
+        )
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        primary, replica = self.count_queries("get", "/api/tasks/employer/tasks/")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        caches["default"].delete(f"db:pinned:{self.employer.id}")
+        primary, replica = self.count_queries("get", "/api/tasks/employer/tasks/stats/")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+
+@override_settings(TASK_SHARDS=["default", "task_shard_1", "task_shard_2"])
+class TaskShardingTests(TestCase):
+    databases = {"default", "task_shard_1", "task_shard_2"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.second = CustomUser.objects.create_employer("9000000002", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000003", "Secret@123")
+        TaskShardAssignment.objects.create(employer=cls.first, shard="task_shard_1")
+        TaskShardAssignment.objects.create(employer=cls.second, shard="task_shard_2")
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["tasks"].clear()
+        patcher = mock.patch.object(sharding, "_id_block", [0, 0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def create_task(self, employer, title):
+        self.client.force_authenticate(employer)
+        with self.captureOnCommitCallbacks(
+            using="task_shard_1", execute=True
+        ), self.captureOnCommitCallbacks(using="task_shard_2", execute=True):
+            response = self.client.post(
+                "/api/tasks/employer/task/create/",
+                {"title": title, "assigned_to": self.employee.id},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.data["task_id"]
+
+    def test_tasks_are_stored_on_their_employers_shard(self):
+        first_id = self.create_task(self.first, "First")
+        second_id = self.create_task(self.second, "Second")
+
+        self.assertNotEqual(first_id, second_id)
+        self.assertTrue(Task.objects.using("task_shard_1").filter(id=first_id).exists())
+        self.assertTrue(Task.objects.using("task_shard_2").filter(id=second_id).exists())
+        self.assertFalse(Task.objects.using("default").exists())
+        self.assertEqual(
+            TaskStat.objects.using("task_shard_1").get(created_by=self.first).count, 1
+        )
+
+        response = self.client.get("/api/tasks/employer/tasks/")
+        self.assertEqual([task["id"] for task in response.data["results"]], [second_id])
+        self.assertEqual(response.data["results"][0]["created_by"], "9000000002")
+
+    def test_new_employers_are_pinned_to_their_home_shard(self):
+        employer = CustomUser.objects.create_employer("9000000004", "Secret@123")
+        task_id = self.create_task(employer, "Pinned")
+
+        shard = TaskShardAssignment.objects.get(employer=employer).shard
+        self.assertEqual(shard, sharding.home_shard(employer.id))
+        self.assertTrue(Task.objects.using(shard).filter(id=task_id).exists())
+
+    def test_employee_reads_gather_every_shard(self):
+        ids = [
+            self.create_task(employer, f"Report {i}")
+            for i in range(3)
+            for employer in (self.first, self.second)
+        ]
+        self.client.force_authenticate(self.employee)
+
+        seen = []
+        url = "/api/tasks/tasks/?page_size=4"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [task["id"] for task in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+        response = self.client.get("/api/tasks/tasks/changes/")
+        self.assertEqual(sorted(task["id"] for task in response.data["tasks"]), sorted(ids))
+
+        response = self.client.patch(
+            "/api/tasks/tasks/bulk-status/",
+            {str(ids[0]): "COMPLETED", str(ids[1]): "IN_PROGRESS"},
+            format="json",
+        )
+        self.assertEqual(response.data["updated"], sorted(ids[:2]))
+        self.assertEqual(Task.objects.using("task_shard_2").get(id=ids[1]).status, "IN_PROGRESS")
+
+        response = self.client.get("/api/tasks/tasks/search/?q=report")
+        self.assertEqual(len(response.data["results"]), 6)
+
+    def test_move_employer_tasks(self):
+        task_id = self.create_task(self.first, "Movable")
+        ArchivedTask.objects.using("task_shard_1").create(
+            id=task_id + 1,
+            title="Archived",
+            created_by=self.first,
+            assigned_to=self.employee,
+            status="COMPLETED",
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+            archived_at=timezone.now(),
+        )
+        changes = TaskChange.objects.count()
+
+        call_command(
+            "move_employer_tasks",
+            employer=self.first.id,
+            to="task_shard_2",
+            settle_seconds=0,
+            stdout=io.StringIO(),
+        )
+
+        self.assertFalse(Task.objects.using("task_shard_1").exists())
+        self.assertFalse(TaskStat.objects.using("task_shard_1").exists())
+        self.assertFalse(ArchivedTask.objects.using("task_shard_1").exists())
+        moved = Task.objects.using("task_shard_2").get(id=task_id)
+        self.assertEqual(moved.title, "Movable")
+        self.assertTrue(ArchivedTask.objects.using("task_shard_2").filter(id=task_id + 1).exists())
+        self.assertEqual(
+            dict(
+                TaskStat.objects.using("task_shard_2")
+                .filter(created_by=self.first)
+                .values_list("status", "count")
+            ),
+            {"PENDING": 1, "COMPLETED": 1},
+        )
+        self.assertEqual(TaskChange.objects.count(), changes)
+
+        self.client.force_authenticate(self.first)
+        response = self.client.put(
+            f"/api/tasks/employer/task/{task_id}/edit/", {"title": "Moved"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.using("task_shard_2").get(id=task_id).title, "Moved")
+
+    def test_writes_are_refused_while_moving(self):
+        task_id = self.create_task(self.first, "Frozen")
+        TaskShardAssignment.objects.filter(employer=self.first).update(moving=True)
+        sharding.forget_assignment(self.first.id)
+
+        response = self.client.get("/api/tasks/employer/tasks/")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.delete(f"/api/tasks/employer/task/{task_id}/delete/")
+        self.assertEqual(response.status_code, 503)
+
+    def test_deleting_a_user_removes_tasks_on_every_shard(self):
+        self.create_task(self.first, "First")
+        self.create_task(self.second, "Second")
+
+        self.employee.delete()
+
+        for shard in ("task_shard_1", "task_shard_2"):
+            self.assertFalse(Task.objects.using(shard).exists())
+            self.assertFalse(TaskStat.objects.using(shard).exists())
+
+
+@override_settings(DATABASE_WRITE_QUEUE=True)
+class WriteQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+
+    def setUp(self):
+        self.queue = writequeue.WriteQueue()
+        patcher = mock.patch.object(writequeue, "write_queue", self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def create_task(self):
+        return self.client.post(
+            "/api/tasks/employer/task/create/",
+            {"title": "Queued", "assigned_to": self.employee.id},
+            format="json",
+        )
+
+    def test_writes_take_the_turn_until_the_request_ends(self):
+        with mock.patch.object(self.queue, "acquire", wraps=self.queue.acquire) as acquire:
+            self.client.get("/api/tasks/employer/tasks/")
+            self.assertFalse(acquire.called)
+            self.assertEqual(self.create_task().status_code, 201)
+            self.assertEqual(acquire.call_count, 1)
+        # Released when the request finished.
+        self.assertTrue(self.queue.acquire(timeout=0))
+        self.queue.release()
+
+    @override_settings(DATABASE_WRITE_QUEUE_TIMEOUT=0.01)
+    def test_waiting_too_long_is_a_503(self):
+        self.queue.acquire()
+        try:
+            response = self.create_task()
+        finally:
+            self.queue.release()
+        self.assertEqual(response.status_code, 503)
+
+    def test_the_turn_is_passed_on_when_the_transaction_commits(self):
+        turn = writequeue.WriteTurn()
+        token = writequeue._turn.set(turn)
+        self.addCleanup(writequeue._turn.reset, token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Task.objects.create(
+                    title="Queued", created_by=self.employer, assigned_to=self.employee
+                )
+            self.assertTrue(turn.held)
+            self.assertFalse(self.queue.acquire(timeout=0))
+
+        self.assertFalse(turn.held)
+        self.assertTrue(self.queue.acquire(timeout=0))
+        self.queue.release()
+
+
+class TaskArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000002", "Secret@123")
+        old = timezone.now() - timedelta(days=200)
+        sharding.bulk_create_with_timestamps(
+            Task.objects,
+            [
+                Task(
+                    title=f"Task {i}",
+                    created_by=cls.employer,
+                    assigned_to=cls.employee,
+                    status=status,
+                    created_at=old + timedelta(minutes=i),
+                    updated_at=old + timedelta(minutes=i),
+                )
+                for i, status in enumerate(["COMPLETED"] * 3 + ["PENDING"])
+            ],
+        )
+        Task.objects.create(
+            title="Recent", created_by=cls.employer, assigned_to=cls.employee, status="COMPLETED"
+        )
+        task_stats.rebuild()
+
+    def setUp(self):
+        caches["tasks"].clear()
+        self.client = APIClient()
+
+    def archive(self):
+        cutoff = timezone.now() - timedelta(days=90)
+        with self.captureOnCommitCallbacks(execute=True):
+            return sum(archive.archive_completed("default", cutoff, chunk_size=2))
+
+    def list_titles(self, url, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [task["title"] for task in response.data["results"]]
+
+    def stats(self):
+        return sorted(TaskStat.objects.values_list("status", "count"))
+
+    def test_only_old_completed_tasks_are_archived(self):
+        stats = self.stats()
+        self.assertEqual(self.archive(), 3)
+
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)), ["Recent", "Task 3"]
+        )
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+        # Archived tasks still count, also after a rebuild.
+        self.assertEqual(self.stats(), stats)
+        task_stats.rebuild()
+        self.assertEqual(self.stats(), stats)
+        # Clients syncing the lists drop them.
+        self.assertEqual(TaskChange.objects.filter(deleted=True).count(), 3)
+        # Nothing left to do on a rerun.
+        output = io.StringIO()
+        call_command("archive_tasks", stdout=output)
+        self.assertIn("Archived 0 tasks", output.getvalue())
+
+    def test_lists_read_archived_tasks_on_request(self):
+        self.archive()
+        url = "/api/tasks/employer/tasks/?ordering=created_at"
+        self.assertEqual(self.list_titles(url, self.employer), ["Task 3", "Recent"])
+        self.assertEqual(
+            self.list_titles(f"{url}&include_archived=true", self.employer),
+            ["Task 0", "Task 1", "Task 2", "Task 3", "Recent"],
+        )
+        self.assertEqual(
+            self.list_titles("/api/tasks/tasks/?include_archived=1&page_size=2", self.employee),
+            ["Recent", "Task 3"],
+        )
+        # Only completed tasks are archived.
+        with CaptureQueriesContext(connection) as captured:
+            self.list_titles(f"{url}&include_archived=true&status=PENDING", self.employer)
+        self.assertFalse([q for q in captured if ArchivedTask._meta.db_table in q["sql"]])
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.get(f"{url}&include_archived=maybe")
+        self.assertEqual(response.status_code, 400)
+
+    def test_archiving_expires_cached_lists(self):
+        url = "/api/tasks/employer/tasks/"
+        self.assertEqual(len(self.list_titles(url, self.employer)), 5)
+        self.archive()
+        self.assertEqual(len(self.list_titles(url, self.employer)), 2)
+
+    def test_chunks_are_archived_and_logged_together(self):
+        with mock.patch.object(archive, "record_changes", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.archive()
+
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertFalse(ArchivedTask.objects.exists())
+
+    def test_export_includes_archived_tasks(self):
+        self.archive()
+        self.client.force_authenticate(self.employer)
+        response = self.client.get("/api/tasks/employer/tasks/export/")
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(
+            [row[1] for row in rows[1:]], ["Task 0", "Task 1", "Task 2", "Task 3", "Recent"]
+        )
+
+    def test_archived_tasks_are_deleted_with_their_employee(self):
+        self.archive()
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.get(pk=self.employee.pk).delete()
+        self.assertFalse(ArchivedTask.objects.exists())
+
+
+@override_settings(EMPLOYEE_OFFBOARD_BATCH_SIZE=3)
+class EmployeeOffboardingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        cls.other_employer = CustomUser.objects.create_employer("9000000002", "Secret@123")
+        cls.employee = CustomUser.objects.create_employee("9000000003", "Secret@123")
+        cls.successor = CustomUser.objects.create_employee("9000000004", "Secret@123")
+        Task.objects.bulk_create(
+            [
+                Task(title=f"Task {i}", created_by=employer, assigned_to=cls.employee)
+                for i, employer in enumerate([cls.employer] * 5 + [cls.other_employer] * 2)
+            ]
+        )
+        task_stats.rebuild()
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["tasks"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def offboard(self, query=""):
+        response = self.client.delete(
+            f"/api/users/employer/employee/{self.employee.id}/{query}"
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertFalse(CustomUser.objects.get(pk=self.employee.pk).is_active)
+        with self.captureOnCommitCallbacks(execute=True):
+            Worker(name="test").run_once()
+        return Job.objects.get(pk=response.data["job_id"])
+
+    def test_tasks_are_deleted_in_batches(self):
+        with mock.patch.object(offboarding, "_delete", wraps=offboarding._delete) as delete:
+            job = self.offboard()
+
+        self.assertEqual(job.status, "SUCCEEDED", job.error)
+        self.assertEqual([len(call.args[2]) for call in delete.call_args_list], [3, 3, 1])
+        self.assertEqual(job.result, {"deleted": 7, "reassigned": 0})
+        self.assertEqual((job.progress_done, job.progress_total), (7, 7))
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(TaskStat.objects.exists())
+        self.assertEqual(TaskChange.objects.filter(deleted=True).count(), 7)
+        self.assertFalse(CustomUser.objects.filter(pk=self.employee.pk).exists())
+
+    def test_employers_tasks_can_be_reassigned(self):
+        job = self.offboard(f"?reassign_to={self.successor.id}")
+
+        self.assertEqual(job.result, {"deleted": 2, "reassigned": 5})
+        self.assertEqual(
+            list(Task.objects.values_list("created_by_id", "assigned_to_id").distinct()),
+            [(self.employer.id, self.successor.id)],
+        )
+        self.assertEqual(
+            list(TaskStat.objects.filter(count__gt=0).values_list("assigned_to_id", "count")),
+            [(self.successor.id, 5)],
+        )
+        self.client.force_authenticate(self.successor)
+        self.assertEqual(len(self.client.get("/api/tasks/tasks/").data["results"]), 5)
+
+    def test_reassign_target_must_be_another_active_employee(self):
+        for target in (self.employee.id, self.employer.id, "x"):
+            response = self.client.delete(
+                f"/api/users/employer/employee/{self.employee.id}/?reassign_to={target}"
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertTrue(CustomUser.objects.get(pk=self.employee.pk).is_active)
+
+    def test_deactivated_employees_get_no_new_tasks(self):
+        CustomUser.objects.filter(pk=self.employee.pk).update(is_active=False)
+        response = self.client.post(
+            "/api/tasks/employer/task/create/",
+            {"title": "Late", "assigned_to": self.employee.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
@@ -1,15 +1,38 @@
 from django.urls import path
 from .views import (
     EmployerTaskListView,
+    EmployerExportTaskView,
+    EmployerTaskStatsView,
     EmployerCreateTaskView,
+    EmployerBulkCreateTaskView,
     EmployerUpdateTaskView,
     EmployerDeleteTaskView,
     EmployeeTaskView,
+    EmployeeBulkTaskStatusView,
+    TaskChangesView,
+    TaskEventStreamView,
+    TaskSearchView,
+    TaskListCacheStatsView,
 )
 
 urlpatterns = [
     path("employer/tasks/", EmployerTaskListView.as_view(), name="task-list"),
+    path(
+        "employer/tasks/export/",
+        EmployerExportTaskView.as_view(),
+        name="export-tasks",
+    ),
+    path(
+        "employer/tasks/stats/",
+        EmployerTaskStatsView.as_view(),
+        name="task-stats",
+    ),
     path("employer/task/create/", EmployerCreateTaskView.as_view(), name="create-task"),
+    path(
+        "employer/tasks/bulk-create/",
+        EmployerBulkCreateTaskView.as_view(),
+        name="bulk-create-task",
+    ),
     path(
         "employer/task/<int:task_id>/edit/",
         EmployerUpdateTaskView.as_view(),
@@ -23,5 +46,27 @@ urlpatterns = [
     
     path('tasks/', EmployeeTaskView.as_view(), name='employee-task-list'),  
     path('tasks/<int:pk>/', EmployeeTaskView.as_view(), name='employee-task-update'),  
-
+    path(
+        "tasks/bulk-status/",
+        EmployeeBulkTaskStatusView.as_view(),
+        name="employee-task-bulk-status",
+    ),
+    path(
+        "employer/tasks/changes/",
+        TaskChangesView.as_view(),
+        name="employer-task-changes",
+    ),
+    path("tasks/changes/", TaskChangesView.as_view(), name="employee-task-changes"),
+    path(
+        "employer/tasks/search/",
+        TaskSearchView.as_view(),
+        name="employer-task-search",
+    ),
+    path("tasks/search/", TaskSearchView.as_view(), name="employee-task-search"),
+    path("events/", TaskEventStreamView.as_view(), name="task-events"),
+    path(
+        "cache/stats/",
+        TaskListCacheStatsView.as_view(),
+        name="task-list-cache-stats",
+    ),
 ]
@@ -1,27 +1,209 @@
+import asyncio
+import json
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from .models import Task
-from .serializers import TaskSerializer,EmployeeTaskSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from . import cache as task_list_cache
+from . import conditional
+from . import events as task_events
+from . import filters
+from .export import EXPORT_FORMATS, employer_export_querysets, export_rows, gzip_chunks
+from . import search
+from . import sharding
+from . import stats as task_stats
+from . import sync
+from .models import ArchivedTask, Task, TaskStat
+from .pagination import TaskCursorPagination, TaskSearchPagination
+from .stats import task_key
+from .serializers import TaskSerializer,EmployeeTaskSerializer,TaskBulkItemSerializer
+from jobs import queue as jobs_queue
+from users.authentication import ClaimsJWTAuthentication
 from users.permissions import IsEmployer,IsEmployee
 
+User = get_user_model()
+
+
+def owner_phone_number(request):
+    """Serializer context for tasks created by or assigned to the caller."""
+    return {request.user.id: request.user.phone_number}
 
 
 class EmployerTaskListView(APIView):
     permission_classes = [IsAuthenticated, IsEmployer]
 
     def get(self, request):
-        """List all tasks created by the logged-in employer."""
+        """List the employer's tasks, filtered and ordered by query parameters."""
         if request.user.role != "EMPLOYER":
             return Response(
                 {"error": "Only employers can view their tasks."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        tasks = Task.objects.filter(created_by=request.user)
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            models = [Task]
+            if filters.include_archived(request.query_params):
+                models.append(ArchivedTask)
+            querysets = []
+            for model in models:
+                tasks, ordering = filters.filter_tasks(
+                    sharding.employer_tasks(request.user.id, model),
+                    request.query_params,
+                    allow_assignee=True,
+                )
+                querysets.append(tasks)
+        except filters.InvalidFilter as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = conditional.get_etag(request, *querysets)
+        response = conditional.get_not_modified_response(request, etag)
+        if response is None:
+            payload = task_list_cache.get_or_build(
+                "employer", request, lambda: self.build_page(request, querysets, ordering)
+            )
+            response = Response(payload, status=status.HTTP_200_OK)
+        return conditional.set_etag(response, etag)
+
+    def build_page(self, request, querysets, ordering):
+        paginator = TaskCursorPagination(ordering)
+        page = paginator.paginate_querysets(
+            [tasks.for_employer_read() for tasks in querysets], request, view=self
+        )
+        serializer = TaskSerializer(
+            page, many=True, context={"phone_numbers": owner_phone_number(request)}
+        )
+        return paginator.get_paginated_data(serializer.data)
+
+
+class EmployerExportTaskView(APIView):
+    permission_classes = [IsAuthenticated, IsEmployer]
+
+    def get(self, request):
+        """Stream every task created by the employer, archived ones included, as CSV or NDJSON."""
+        if request.user.role != "EMPLOYER":
+            return Response(
+                {"error": "Only employers can export their tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Unsupported export format. Choose one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        encode, content_type, extension = EXPORT_FORMATS[export_format]
+
+        rows = export_rows(
+            employer_export_querysets(request.user.id),
+            chunk_size=getattr(settings, "TASK_EXPORT_CHUNK_SIZE", 2000),
+        )
+        chunks = encode(rows)
+        filename = f"tasks.{extension}"
+        if request.query_params.get("compress") == "gzip":
+            chunks = gzip_chunks(chunks)
+            content_type = "application/gzip"
+            filename += ".gz"
+
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def post(self, request):
+        """Export the employer's tasks to a file in the background."""
+        if request.user.role != "EMPLOYER":
+            return Response(
+                {"error": "Only employers can export their tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        export_format = request.data.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Unsupported export format. Choose one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = jobs_queue.submit(
+            "tasks.export",
+            {
+                "employer_id": request.user.id,
+                "export_format": export_format,
+                "compress": request.data.get("compress"),
+            },
+            created_by_id=request.user.id,
+        )
+        return Response(
+            {
+                "message": "Export started.",
+                "job_id": job.id,
+                "status_url": reverse("job-detail", args=[job.id]),
+                "download_url": reverse("job-download", args=[job.id]),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class EmployerTaskStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsEmployer]
+
+    def get(self, request):
+        """Task counts per employee and status, read from the summary table."""
+        if request.user.role != "EMPLOYER":
+            return Response(
+                {"error": "Only employers can view task statistics."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        shard = sharding.read_db(sharding.shard_for(request.user.id))
+        rows = list(
+            TaskStat.objects.using(shard)
+            .filter(created_by_id=request.user.id, count__gt=0)
+            .values("assigned_to_id", "status", "count")
+            .order_by()
+        )
+        # The users table is not on the shard; resolve phone numbers separately.
+        phone_numbers = dict(
+            User.objects.filter(id__in={row["assigned_to_id"] for row in rows}).values_list(
+                "id", "phone_number"
+            )
+        )
+
+        totals = dict.fromkeys(dict(Task.STATUS_CHOICES), 0)
+        employees = {}
+        for row in rows:
+            employee = employees.setdefault(
+                row["assigned_to_id"],
+                {
+                    "employee_id": row["assigned_to_id"],
+                    "phone_number": phone_numbers.get(row["assigned_to_id"]),
+                    "counts": dict.fromkeys(dict(Task.STATUS_CHOICES), 0),
+                    "total": 0,
+                },
+            )
+            employee["counts"][row["status"]] += row["count"]
+            employee["total"] += row["count"]
+            totals[row["status"]] += row["count"]
+
+        return Response(
+            {
+                "totals": totals,
+                "total": sum(totals.values()),
+                "employees": sorted(employees.values(), key=lambda e: e["employee_id"]),
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class EmployerCreateTaskView(APIView):
@@ -46,6 +228,116 @@ class EmployerCreateTaskView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class EmployerBulkCreateTaskView(APIView):
+    permission_classes = [IsAuthenticated, IsEmployer]
+
+    def post(self, request):
+        """Create many tasks in one transaction, or none if any entry is invalid."""
+        if request.user.role != "EMPLOYER":
+            return Response(
+                {"error": "Only employers can create tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of tasks."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_items = getattr(settings, "TASK_BULK_CREATE_MAX", 5000)
+        if len(items) > max_items:
+            return Response(
+                {"error": f"At most {max_items} tasks can be created per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        errors = {}
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = TaskBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        employee_ids = self.get_employee_ids(
+            {data["assigned_to"] for data in valid.values()}
+        )
+        for index, data in valid.items():
+            if data["assigned_to"] not in employee_ids:
+                errors[index] = {
+                    "assigned_to": ["Task can only be assigned to employees."]
+                }
+
+        if errors:
+            return Response(
+                {
+                    "error": "No tasks were created.",
+                    "errors": [
+                        {"index": index, "errors": errors[index]}
+                        for index in sorted(errors)
+                    ],
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tasks = [
+            Task(
+                created_by_id=request.user.id,
+                assigned_to_id=data.pop("assigned_to"),
+                **data,
+            )
+            for data in valid.values()
+        ]
+        shard = sharding.shard_for(request.user.id, for_write=True)
+        with transaction.atomic(using=shard):
+            tasks = Task.objects.using(shard).bulk_create(tasks, batch_size=500)
+            # bulk_create sends no post_save signals.
+            task_stats.apply_deltas(task_stats.count_tasks(tasks), using=shard)
+            sync.record_changes(
+                ((task.id, task.created_by_id, task.assigned_to_id, False) for task in tasks),
+                shard=shard,
+            )
+            task_events.publish_task_events(
+                (
+                    (
+                        {task.created_by_id, task.assigned_to_id},
+                        task_events.task_event("created", task.id, task.status),
+                    )
+                    for task in tasks
+                ),
+                using=shard,
+            )
+            task_list_cache.invalidate_task_lists(
+                {request.user.id} | {task.assigned_to_id for task in tasks}, using=shard
+            )
+
+        return Response(
+            {
+                "message": f"{len(tasks)} tasks created successfully!",
+                "task_ids": [task.id for task in tasks],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_employee_ids(self, user_ids):
+        """Return the subset of ``user_ids`` that belong to active employees."""
+        user_ids = list(user_ids)
+        batch_size = connection.features.max_query_params or len(user_ids) or 1
+        employee_ids = set()
+        for start in range(0, len(user_ids), batch_size):
+            employee_ids.update(
+                User.objects.filter(
+                    id__in=user_ids[start : start + batch_size],
+                    role="EMPLOYEE",
+                    is_active=True,
+                ).values_list("id", flat=True)
+            )
+        return employee_ids
+
+
 class EmployerUpdateTaskView(APIView):
     permission_classes = [IsAuthenticated, IsEmployer]
 
@@ -57,8 +349,9 @@ class EmployerUpdateTaskView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        shard = sharding.shard_for(request.user.id, for_write=True)
         try:
-            task = Task.objects.get(id=task_id, created_by=request.user)
+            task = Task.objects.using(shard).get(id=task_id, created_by_id=request.user.id)
         except Task.DoesNotExist:
             return Response(
                 {
@@ -88,8 +381,9 @@ class EmployerDeleteTaskView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        shard = sharding.shard_for(request.user.id, for_write=True)
         try:
-            task = Task.objects.get(id=task_id, created_by=request.user)
+            task = Task.objects.using(shard).get(id=task_id, created_by_id=request.user.id)
         except Task.DoesNotExist:
             return Response(
                 {
@@ -115,9 +409,36 @@ class EmployeeTaskView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        tasks = Task.objects.filter(assigned_to=employee)
-        serializer = EmployeeTaskSerializer(tasks, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            models = [Task]
+            if filters.include_archived(request.query_params):
+                models.append(ArchivedTask)
+            querysets = []
+            for model in models:
+                for tasks in sharding.assigned_tasks(employee.id, model):
+                    tasks, ordering = filters.filter_tasks(tasks, request.query_params)
+                    querysets.append(tasks)
+        except filters.InvalidFilter as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = conditional.get_etag(request, *querysets)
+        response = conditional.get_not_modified_response(request, etag)
+        if response is None:
+            payload = task_list_cache.get_or_build(
+                "employee", request, lambda: self.build_page(request, querysets, ordering)
+            )
+            response = Response(payload, status=status.HTTP_200_OK)
+        return conditional.set_etag(response, etag)
+
+    def build_page(self, request, querysets, ordering):
+        paginator = TaskCursorPagination(ordering)
+        page = paginator.paginate_querysets(
+            [tasks.for_employee_read() for tasks in querysets], request, view=self
+        )
+        serializer = EmployeeTaskSerializer(
+            page, many=True, context={"phone_numbers": owner_phone_number(request)}
+        )
+        return paginator.get_paginated_data(serializer.data)
 
     def patch(self, request, pk):
         employee = request.user
@@ -127,16 +448,326 @@ class EmployeeTaskView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        try:
-            task = Task.objects.get(id=pk, assigned_to=employee)
-        except Task.DoesNotExist:
+        task = sharding.find_assigned_task(pk, employee.id)
+        if task is None:
             return Response(
                 {"error": "Task not found or not assigned to you."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        serializer = EmployeeTaskSerializer(task, data=request.data, partial=True)
+        serializer = EmployeeTaskSerializer(
+            task,
+            data=request.data,
+            partial=True,
+            context={"phone_numbers": owner_phone_number(request)},
+        )
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EmployeeBulkTaskStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsEmployee]
+
+    def patch(self, request):
+        """Apply ``{task_id: status}`` pairs with one UPDATE per target status."""
+        employee = request.user
+        if employee.role != "EMPLOYEE":
+            return Response(
+                {"error": "You are not authorized to update tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        changes = request.data
+        if not isinstance(changes, dict) or not changes:
+            return Response(
+                {"error": "Expected a non-empty mapping of task ids to statuses."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_items = getattr(settings, "TASK_BULK_UPDATE_MAX", 1000)
+        if len(changes) > max_items:
+            return Response(
+                {"error": f"At most {max_items} tasks can be updated per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid_statuses = dict(Task.STATUS_CHOICES)
+        rejected = []
+        groups = {}
+        for raw_id, new_status in changes.items():
+            try:
+                task_id = int(raw_id)
+            except (TypeError, ValueError):
+                rejected.append({"id": raw_id, "error": "Invalid task id."})
+                continue
+            # Lists and objects are not hashable; reject them before the lookup.
+            if not isinstance(new_status, str) or new_status not in valid_statuses:
+                rejected.append({"id": task_id, "error": "Invalid status provided."})
+                continue
+            groups.setdefault(new_status, []).append(task_id)
+
+        applied_statuses = {}
+        requested = [task_id for task_ids in groups.values() for task_id in task_ids]
+        now = timezone.now()
+        for shard in sharding.get_shards():
+            deltas = Counter()
+            employer_ids = set()
+            shard_statuses = {}
+            with transaction.atomic(using=shard):
+                # Current owner and status of every requested task on this
+                # shard, read without building model instances, for the
+                # statistics and cache updates.
+                owned = {
+                    task_id: (created_by_id, current_status)
+                    for task_id, created_by_id, current_status in Task.objects.using(shard)
+                    .filter(assigned_to_id=employee.id, id__in=requested)
+                    .values_list("id", "created_by_id", "status")
+                    # Skip copies left behind by an employer's move.
+                    if sharding.shard_for(created_by_id, for_write=True) == shard
+                }
+
+                for new_status, task_ids in groups.items():
+                    group = []
+                    for task_id in task_ids:
+                        if task_id not in owned:
+                            continue
+                        created_by_id, current_status = owned[task_id]
+                        deltas[task_key(created_by_id, employee.id, current_status)] -= 1
+                        deltas[task_key(created_by_id, employee.id, new_status)] += 1
+                        employer_ids.add(created_by_id)
+                        group.append(task_id)
+
+                    if group:
+                        Task.objects.using(shard).filter(
+                            assigned_to_id=employee.id, id__in=group
+                        ).update(status=new_status, updated_at=now)
+                        shard_statuses.update(dict.fromkeys(group, new_status))
+
+                if shard_statuses:
+                    # Queryset updates send no post_save signals.
+                    task_stats.apply_deltas(deltas, using=shard)
+                    sync.record_changes(
+                        (
+                            (task_id, owned[task_id][0], employee.id, False)
+                            for task_id in shard_statuses
+                        ),
+                        shard=shard,
+                    )
+                    task_events.publish_task_events(
+                        (
+                            (
+                                {employee.id, owned[task_id][0]},
+                                task_events.task_event("updated", task_id, new_status),
+                            )
+                            for task_id, new_status in shard_statuses.items()
+                        ),
+                        using=shard,
+                    )
+                    task_list_cache.invalidate_task_lists(
+                        {employee.id, *employer_ids}, using=shard
+                    )
+            applied_statuses.update(shard_statuses)
+
+        rejected.extend(
+            {"id": task_id, "error": "Task not found or not assigned to you."}
+            for task_id in requested
+            if task_id not in applied_statuses
+        )
+
+        return Response(
+            {"updated": sorted(applied_statuses), "rejected": rejected},
+            status=status.HTTP_200_OK,
+        )
+
+
+class TaskChangesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Tasks changed after ``?since=<cursor>`` plus ids of removed tasks."""
+        user = request.user
+        if user.role == "EMPLOYER":
+            scope = {"created_by_id": user.id}
+            querysets = [sharding.employer_tasks(user.id).for_employer_read()]
+            serializer_class = TaskSerializer
+        elif user.role == "EMPLOYEE":
+            scope = {"assigned_to_id": user.id}
+            querysets = [
+                tasks.for_employee_read() for tasks in sharding.assigned_tasks(user.id)
+            ]
+            serializer_class = EmployeeTaskSerializer
+        else:
+            return Response(
+                {"error": "You are not authorized to sync tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        try:
+            since = int(request.query_params.get("since", 0))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "since must be a non-negative integer cursor."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if since and since < sync.get_horizon():
+            return Response(
+                {
+                    "error": "Cursor has expired; sync again from zero.",
+                    "cursor": 0,
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        task_ids, cursor, has_more = sync.changes_since(
+            scope, since, getattr(settings, "TASK_SYNC_PAGE_SIZE", 500)
+        )
+        current = {}
+        for tasks in querysets:
+            current.update(tasks.filter(id__in=task_ids, **scope).in_bulk())
+        serializer = serializer_class(
+            [current[task_id] for task_id in task_ids if task_id in current],
+            many=True,
+            context={"phone_numbers": owner_phone_number(request)},
+        )
+        return Response(
+            {
+                "cursor": cursor,
+                "has_more": has_more,
+                "tasks": serializer.data,
+                "deleted": [task_id for task_id in task_ids if task_id not in current],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class TaskSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Tasks matching ``?q=`` in their title or description, best first."""
+        user = request.user
+        if user.role == "EMPLOYER":
+            scope_token = f"c{user.id}"
+            querysets = [sharding.employer_tasks(user.id).for_employer_read()]
+            serializer_class = TaskSerializer
+        elif user.role == "EMPLOYEE":
+            scope_token = f"a{user.id}"
+            querysets = [
+                tasks.for_employee_read() for tasks in sharding.assigned_tasks(user.id)
+            ]
+            serializer_class = EmployeeTaskSerializer
+        else:
+            return Response(
+                {"error": "You are not authorized to search tasks."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if not all(search.is_supported(connections[tasks.db]) for tasks in querysets):
+            return Response(
+                {"error": "Task search is not available on this database."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        terms = search.parse_terms(request.query_params.get("q", ""))
+        if not terms:
+            return Response(
+                {"error": "q must contain at least one word."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def fetch(after, limit):
+            # Each shard ranks its own matches; merge them on (rank, id).
+            rows = []
+            for tasks in querysets:
+                rows.extend(
+                    search.search(scope_token, terms, limit, after, using=tasks.db)
+                )
+            return sorted(rows, key=lambda row: (row[1], row[0]))[:limit]
+
+        paginator = TaskSearchPagination()
+        task_ids = paginator.paginate_matches(fetch, request)
+        matched = {}
+        for tasks in querysets:
+            matched.update(tasks.in_bulk(task_ids))
+        serializer = serializer_class(
+            [matched[task_id] for task_id in task_ids if task_id in matched],
+            many=True,
+            context={"phone_numbers": owner_phone_number(request)},
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TaskListCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Report hit/miss counters of this process's task list cache."""
+        return Response(task_list_cache.get_stats(), status=status.HTTP_200_OK)
+
+
+class TaskEventStreamView(View):
+    """Server-sent events announcing changes to the caller's tasks.
+
+    Employers hear about tasks they created, employees about tasks assigned
+    to them. Events only carry the task id and status; clients fetch the
+    data through the delta sync endpoint. Connections are held open cheaply
+    when served by the ASGI application (todo_app.asgi). Browsers'
+    EventSource cannot set headers, so the access token may also be passed
+    as ``?access_token=``.
+    """
+
+    async def get(self, request):
+        try:
+            user = await self.authenticate(request)
+        except (AuthenticationFailed, InvalidToken) as exc:
+            return JsonResponse({"error": str(exc.detail)}, status=401)
+
+        if user is None:
+            return JsonResponse(
+                {"error": "Authentication credentials were not provided."}, status=401
+            )
+        if user.role not in ("EMPLOYER", "EMPLOYEE"):
+            return JsonResponse(
+                {"error": "You are not authorized to receive task events."}, status=403
+            )
+
+        response = StreamingHttpResponse(
+            self.stream(user.id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def authenticate(self, request):
+        authentication = ClaimsJWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = (
+            authentication.get_raw_token(header)
+            if header is not None
+            else request.GET.get("access_token", "").encode() or None
+        )
+        if raw_token is None:
+            return None
+        validated_token = authentication.get_validated_token(raw_token)
+        return await sync_to_async(authentication.get_user)(validated_token)
+
+    async def stream(self, user_id):
+        broker = task_events.get_broker()
+        queue = broker.subscribe(user_id)
+        heartbeat = getattr(settings, "TASK_EVENT_HEARTBEAT_SECONDS", 15)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(user_id, queue)
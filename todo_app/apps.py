@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class TodoAppConfig(AppConfig):
+    name = 'todo_app'
+
+    def ready(self):
+        from . import metrics, writequeue
+
+        # Connected before any connection is opened, so every one gets them.
+        connection_created.connect(metrics.install_query_recorder)
+        connection_created.connect(writequeue.install_write_queue)
@@ -0,0 +1,303 @@
+"""Per-view request metrics exposed in the Prometheus text format.
+
+``MetricsMiddleware`` records, for every request, the resolved URL name,
+latency, number of DB queries and time spent in them, time spent
+serializing, and response size. Each process aggregates into a small
+in-memory registry guarded by one lock taken once per request.
+
+With ``METRICS_DIR`` set, every process also writes its totals to
+``<METRICS_DIR>/<pid>.json`` at most every ``METRICS_FLUSH_INTERVAL``
+seconds, and the metrics endpoint adds up the files of all running
+processes, so any worker can answer a scrape for the whole server. Files
+of processes that have exited are removed.
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from .middleware import RequestContextMiddleware
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_request = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("started", "queries", "db_seconds", "serializer_seconds", "in_serializer")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.in_serializer = False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._responses = {}
+        self._last_flush = 0.0
+
+    def observe(self, view, method, status_code, seconds, metrics, response_bytes):
+        with self._lock:
+            entry = self._views.get((view, method))
+            if entry is None:
+                entry = self._views[(view, method)] = {
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "count": 0,
+                    "seconds": 0.0,
+                    "db_queries": 0,
+                    "db_seconds": 0.0,
+                    "serializer_seconds": 0.0,
+                    "response_bytes": 0,
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][index] += 1
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["db_queries"] += metrics.queries
+            entry["db_seconds"] += metrics.db_seconds
+            entry["serializer_seconds"] += metrics.serializer_seconds
+            entry["response_bytes"] += response_bytes
+
+            key = (view, method, str(status_code))
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "views": [
+                    [view, method, dict(entry, buckets=list(entry["buckets"]))]
+                    for (view, method), entry in self._views.items()
+                ],
+                "responses": [
+                    [view, method, status_code, count]
+                    for (view, method, status_code), count in self._responses.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_flush < getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+                return
+            self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        data = json.dumps(self.snapshot())
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, os.path.join(directory, f"{os.getpid()}.json"))
+
+
+registry = MetricsRegistry()
+
+
+def current_request_metrics():
+    return _current_request.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(connection, **kwargs):
+    """``connection_created`` receiver, connected in ``TodoAppConfig.ready()``."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class SerializerTimingMixin:
+    """Adds the time spent in ``to_representation`` to the request metrics."""
+
+    def to_representation(self, instance):
+        metrics = _current_request.get()
+        if metrics is None or metrics.in_serializer:
+            return super().to_representation(instance)
+        metrics.in_serializer = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_seconds += time.perf_counter() - start
+            metrics.in_serializer = False
+
+
+class MetricsMiddleware(RequestContextMiddleware):
+    context = _current_request
+
+    def start(self, request):
+        return RequestMetrics()
+
+    def finish(self, request, response, metrics):
+        self.record(request, response, time.perf_counter() - metrics.started, metrics)
+
+    def record(self, request, response, seconds, metrics):
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else "unresolved"
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            seconds,
+            metrics,
+            response_bytes,
+        )
+        registry.maybe_flush()
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, only owned by another user.
+        return True
+    return True
+
+
+def _load_snapshots():
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(directory)
+    snapshots = []
+    for name in os.listdir(directory):
+        pid, extension = os.path.splitext(name)
+        if extension != ".json" or not pid.isdigit():
+            continue
+        if not _is_running(int(pid)):
+            # Gone with its process, before the pid can be reused by one
+            # that would start counting from zero in the same file.
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+            continue
+        try:
+            with open(os.path.join(directory, name)) as snapshot_file:
+                snapshots.append(json.load(snapshot_file))
+        except (OSError, ValueError):
+            # A file being replaced or a partially written leftover.
+            continue
+    return snapshots
+
+
+def _merge(snapshots):
+    views = {}
+    responses = {}
+    for snapshot in snapshots:
+        for view, method, entry in snapshot["views"]:
+            merged = views.get((view, method))
+            if merged is None:
+                views[(view, method)] = dict(entry, buckets=list(entry["buckets"]))
+                continue
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], entry["buckets"])]
+            for field in (
+                "count",
+                "seconds",
+                "db_queries",
+                "db_seconds",
+                "serializer_seconds",
+                "response_bytes",
+            ):
+                merged[field] += entry[field]
+        for view, method, status_code, count in snapshot["responses"]:
+            key = (view, method, status_code)
+            responses[key] = responses.get(key, 0) + count
+    return views, responses
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    escaped = (f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_metrics():
+    views, responses = _merge(_load_snapshots())
+    lines = [
+        "# HELP http_requests_total Requests handled, by URL name, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (view, method, status_code), count in sorted(responses.items()):
+        lines.append(
+            f"http_requests_total{_labels(view=view, method=method, status=status_code)} {count}"
+        )
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency by URL name and method.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (view, method), entry in sorted(views.items()):
+        for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+            lines.append(
+                "http_request_duration_seconds_bucket"
+                f"{_labels(view=view, method=method, le=bound)} {count}"
+            )
+        lines.append(
+            "http_request_duration_seconds_bucket"
+            f"{_labels(view=view, method=method, le='+Inf')} {entry['count']}"
+        )
+        lines.append(
+            f"http_request_duration_seconds_sum{_labels(view=view, method=method)} {entry['seconds']}"
+        )
+        lines.append(
+            f"http_request_duration_seconds_count{_labels(view=view, method=method)} {entry['count']}"
+        )
+
+    counters = [
+        ("http_db_queries_total", "db_queries", "Database queries issued."),
+        ("http_db_query_seconds_total", "db_seconds", "Time spent in database queries."),
+        (
+            "http_serializer_seconds_total",
+            "serializer_seconds",
+            "Time spent serializing response data.",
+        ),
+        ("http_response_bytes_total", "response_bytes", "Bytes of non-streaming response bodies."),
+    ]
+    for name, field, help_text in counters:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (view, method), entry in sorted(views.items()):
+            lines.append(f"{name}{_labels(view=view, method=method)} {entry[field]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1", "::1"))
+    if request.META.get("REMOTE_ADDR") not in allowed:
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,62 @@
+"""Base class for the project's request-scoped middleware.
+
+``RequestContextMiddleware`` works in sync and async stacks alike: under
+ASGI the request never leaves the event loop on its account. Subclasses
+only say what to set up for a request and what to do with the outcome.
+"""
+
+from abc import ABC, abstractmethod
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class RequestContextMiddleware(ABC):
+    """Runs each request with ``context`` set to the value ``start()`` returns.
+
+    ``stop(value)`` runs once the view is done, even if it raised, and
+    ``finish(request, response, value)`` runs only if it returned a response.
+    """
+
+    sync_capable = True
+    async_capable = True
+    context = None
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        value = self.start(request)
+        token = self.context.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.context.reset(token)
+            self.stop(value)
+        self.finish(request, response, value)
+        return response
+
+    async def __acall__(self, request):
+        value = self.start(request)
+        token = self.context.set(value)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.context.reset(token)
+            self.stop(value)
+        self.finish(request, response, value)
+        return response
+
+    @abstractmethod
+    def start(self, request):
+        """Return the value ``context`` holds while ``request`` is handled."""
+
+    def stop(self, value):
+        pass
+
+    def finish(self, request, response, value):
+        pass
@@ -0,0 +1,136 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+``ReplicaRoutingMiddleware`` marks each request as replica-eligible when it
+is a read (GET/HEAD/OPTIONS) and its user has not written recently.
+``ReplicaRouter`` then sends the request's reads to one of
+``DATABASE_REPLICAS`` and every write to the primary.
+
+A request that writes pins its user to the primary for
+``DATABASE_REPLICA_STICKY_SECONDS``, which should exceed the replication
+lag; an employer listing tasks right after creating one reads the primary
+and sees it. Pins live in ``DATABASE_REPLICA_STICKY_CACHE_ALIAS``, which
+must be shared by all worker processes.
+"""
+
+import base64
+import contextvars
+import json
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from .middleware import RequestContextMiddleware
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_routing = contextvars.ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("user_id", "use_replica", "wrote")
+
+    def __init__(self, user_id, use_replica):
+        self.user_id = user_id
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def _pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def _get_cache():
+    return caches[getattr(settings, "DATABASE_REPLICA_STICKY_CACHE_ALIAS", "default")]
+
+
+def pin_to_primary(user_id):
+    _get_cache().set(
+        _pin_key(user_id),
+        True,
+        timeout=getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 5),
+    )
+
+
+def is_pinned(user_id):
+    return _get_cache().get(_pin_key(user_id), False)
+
+
+def read_alias(alias=DEFAULT_DB_ALIAS):
+    """Alias to read ``alias`` through: one of its replicas when allowed."""
+    state = _routing.get()
+    replicas = get_replicas()
+    if alias != DEFAULT_DB_ALIAS or state is None or not state.use_replica or not replicas:
+        return alias
+    return random.choice(replicas)
+
+
+def note_write():
+    """Record that the current request writes, for code that bypasses routing."""
+    state = _routing.get()
+    if state is not None:
+        state.wrote = True
+        # Later reads in this request must see what it just wrote.
+        state.use_replica = False
+
+
+def token_user_id(request):
+    """Read the user id from the request's access token, without verifying it.
+
+    Only used to pick a database; authentication still validates the token.
+    A forged id can at worst send its own reads to the primary.
+    """
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    token = header.split(" ", 1)[1] if header.startswith("Bearer ") else None
+    token = token or request.GET.get("access_token")
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return int(claims["user_id"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        note_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary.
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware(RequestContextMiddleware):
+    context = _routing
+
+    def start(self, request):
+        if not get_replicas():
+            return None
+        user_id = token_user_id(request)
+        use_replica = request.method in READ_METHODS and not (
+            user_id is not None and is_pinned(user_id)
+        )
+        return RoutingState(user_id, use_replica)
+
+    def finish(self, request, response, state):
+        if state is not None and state.wrote and state.user_id is not None:
+            pin_to_primary(state.user_id)
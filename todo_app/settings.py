@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -29,11 +30,16 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
 
+    "todo_app",
     "users",
-    "tasks"
+    "tasks",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    'todo_app.metrics.MetricsMiddleware',
+    'todo_app.routers.ReplicaRoutingMiddleware',
+    'todo_app.writequeue.WriteQueueMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,8 +77,118 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Local stand-in for a read replica, refreshed from the primary with
+    # `python manage.py sync_replica`. Tests run it as a mirror of default.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+    # Local task shards (tasks/sharding.py); migrate them with
+    # `python manage.py migrate --database task_shard_N`.
+    'task_shard_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'task_shard_1.sqlite3',
+    },
+    'task_shard_2': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'task_shard_2.sqlite3',
+    },
+}
+
+# SQLite server profile, for serving concurrent requests from SQLite. Off by
+# default, so development and tests run on Django's defaults; enable it with
+# SQLITE_SERVER_PROFILE=1 in the environment. It then applies to every SQLite
+# database above. Each connection runs the pragmas: write-ahead logging so
+# reads never block the writer, synchronous=NORMAL (durable with WAL up to
+# the last checkpoint), a busy timeout in milliseconds so lock waits do not
+# fail at once, memory-mapped reads, and a 64 MiB page cache (negative
+# cache_size is in KiB). Transactions open with BEGIN IMMEDIATE: a
+# transaction that reads before writing then queues for the write lock up
+# front, instead of failing with "database is locked" when it tries to
+# upgrade its read lock. Connections persist for DATABASE_CONN_MAX_AGE
+# seconds, checked before reuse.
+SQLITE_SERVER_PROFILE = os.environ.get("SQLITE_SERVER_PROFILE", "") == "1"
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "memory",
 }
+DATABASE_CONN_MAX_AGE = 600
+
+if SQLITE_SERVER_PROFILE:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            database.setdefault('OPTIONS', {}).update(
+                init_command=";".join(
+                    f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+                ),
+                transaction_mode="IMMEDIATE",
+            )
+            database['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+            database['CONN_HEALTH_CHECKS'] = True
+
+# Write serialization (todo_app/writequeue.py), part of the server profile.
+# Within a process, requests take turns to write, each holding the turn from
+# its first write until its transactions commit; one that waits longer than
+# DATABASE_WRITE_QUEUE_TIMEOUT seconds gets a 503.
+DATABASE_WRITE_QUEUE = SQLITE_SERVER_PROFILE
+DATABASE_WRITE_QUEUE_TIMEOUT = 10
+
+# Read replicas (todo_app/routers.py). Reads made by GET requests go to one
+# of these aliases and writes always go to default. After a write, the user
+# reads from default for DATABASE_REPLICA_STICKY_SECONDS, which must exceed
+# the replication lag. The sticky cache must be shared by all processes.
+# Add "replica" here to route reads to the local stand-in.
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_STICKY_SECONDS = 5
+DATABASE_REPLICA_STICKY_CACHE_ALIAS = "default"
+
+# Task shards (tasks/sharding.py). Each employer's tasks and statistics live
+# on one of TASK_SHARDS; users and the change log stay on default. Aliases in
+# TASK_SHARD_DATABASES hold only the sharded tables. New employers hash to a
+# shard and are pinned there on their first write; move one with
+# `python manage.py move_employer_tasks`. The shard map is cached for
+# TASK_SHARD_MAP_CACHE_SECONDS in a cache shared by all processes. Task ids
+# are reserved TASK_ID_BLOCK_SIZE at a time when there are several shards.
+# Add the task_shard_N aliases to TASK_SHARDS to use the local shards.
+TASK_SHARDS = ["default"]
+TASK_SHARD_DATABASES = ["task_shard_1", "task_shard_2"]
+TASK_SHARD_MAP_CACHE_ALIAS = "default"
+TASK_SHARD_MAP_CACHE_SECONDS = 60
+TASK_ID_BLOCK_SIZE = 1000
+
+DATABASE_ROUTERS = ["tasks.sharding.TaskShardRouter", "todo_app.routers.ReplicaRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# The "tasks" cache holds serialized task list pages. Local memory keeps a
+# separate copy per worker process, so point it at a shared backend such as
+# Redis or Memcached when running more than one process. Culling one entry
+# at a time (CULL_FREQUENCY == MAX_ENTRIES) makes eviction strictly LRU.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "tasks": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "task-lists",
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+            "CULL_FREQUENCY": 10000,
+        },
+    },
+}
+
+TASK_LIST_CACHE_ALIAS = "tasks"
+TASK_LIST_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -94,6 +210,22 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Bulk employee import: rows per request, and the process pool used to hash
+# passwords (worker count defaults to the number of CPUs; batches smaller
+# than the threshold are hashed inline).
+EMPLOYEE_IMPORT_MAX_ROWS = 10000
+EMPLOYEE_IMPORT_HASH_WORKERS = None
+EMPLOYEE_IMPORT_POOL_THRESHOLD = 32
+# Imports of at least this many rows are validated in the request and then
+# hashed and inserted by a background job; their rows wait in a side table,
+# so plain passwords never reach the job payload.
+EMPLOYEE_IMPORT_BACKGROUND_ROWS = 1000
+
+# Deleting an employee deactivates them at once; a job then deletes or
+# reassigns their tasks this many per transaction before deleting the user.
+EMPLOYEE_OFFBOARD_BATCH_SIZE = 500
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -119,12 +251,96 @@ AUTH_USER_MODEL = "users.CustomUser"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ],
 }
 
+# Keyset pagination for task list endpoints
+TASK_PAGE_SIZE = 50
+TASK_MAX_PAGE_SIZE = 500
+
+# Upper bound on the number of tasks accepted by one bulk create request
+TASK_BULK_CREATE_MAX = 5000
+
+# Upper bound on the number of task status changes in one bulk PATCH
+TASK_BULK_UPDATE_MAX = 1000
+
+# Rows fetched per database round trip while streaming a task export
+TASK_EXPORT_CHUNK_SIZE = 2000
+
+# Delta sync: change log rows per page, and how long tombstones of deleted
+# or reassigned tasks are kept before compact_task_changes purges them
+TASK_SYNC_PAGE_SIZE = 500
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+
+# Cold storage (tasks/archive.py): `python manage.py archive_tasks` moves
+# tasks completed more than TASK_ARCHIVE_AFTER_DAYS ago to the archive
+# table, TASK_ARCHIVE_CHUNK_SIZE per transaction. Lists read it only with
+# ?include_archived=true.
+TASK_ARCHIVE_AFTER_DAYS = 90
+TASK_ARCHIVE_CHUNK_SIZE = 500
+
+# Push events (tasks/events.py). The in-process broker only reaches connections
+# held by the same process; multi-process deployments need a broker class
+# backed by a shared pub/sub service.
+TASK_EVENT_BROKER = "tasks.events.InProcessBroker"
+TASK_EVENT_QUEUE_SIZE = 100
+TASK_EVENT_HEARTBEAT_SECONDS = 15
+
+# Clients trade their refresh token for a new access token at
+# api/users/token/refresh/ instead of sending the password again. With
+# rotation, each refresh also returns a new refresh token and revokes the
+# old one, so a session only has to log in again after REFRESH_TOKEN_LIFETIME
+# without any refresh.
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=3),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "ROTATE_REFRESH_TOKENS": True,
+    "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# How long a cached token version is trusted before it is re-read from the
+# database; bounds how long a revoked token keeps working. Whether a refresh
+# token was revoked is cached in the same cache: revoked answers until the
+# token expires, others for JWT_REVOKED_CACHE_SECONDS. Run
+# `python manage.py purge_revoked_tokens` daily to drop expired revocations.
+JWT_CLAIMS_CACHE_ALIAS = "default"
+JWT_CLAIMS_REVALIDATE_SECONDS = 60
+JWT_REVOKED_CACHE_SECONDS = 60
+
+# Login throttle (users/throttling.py), checked before the password is
+# hashed. Each scope is a token bucket of (burst, seconds per token): an
+# attempt needs a token from both the phone number's and the client IP's
+# bucket, or gets a 429. Drop a scope to stop limiting by it. The store must
+# be shared by all worker processes; the SQLite store shares a file
+# (LOGIN_THROTTLE_PATH, under /dev/shm by default) between the processes
+# of one host. Behind a reverse proxy, set REST_FRAMEWORK["NUM_PROXIES"] so
+# the client IP is read from X-Forwarded-For.
+LOGIN_THROTTLE_RATES = {"phone": (5, 60), "ip": (10, 6)}
+LOGIN_THROTTLE_STORE = "users.throttling.SQLiteBucketStore"
+LOGIN_THROTTLE_PATH = None
+
+# Request metrics (todo_app/metrics.py), scraped from internal/metrics/.
+# With several worker processes, point METRICS_DIR at a directory shared by
+# all of them so that a scrape of any worker reports the combined totals.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+
+# Background jobs (jobs/queue.py), run by `python manage.py run_jobs`. Each
+# worker runs JOBS_WORKER_CONCURRENCY jobs at once; JOBS_CONCURRENCY_LIMITS
+# caps how many jobs of a kind run at once across all workers. Failed jobs
+# are retried after JOBS_RETRY_BACKOFF_SECONDS, doubled on each attempt. A
+# job whose worker sends no heartbeat for JOBS_LEASE_SECONDS is handed to
+# another worker. Finished jobs, and files they produced in JOBS_FILES_DIR
+# (a temporary directory by default), are purged after JOBS_RETENTION_DAYS.
+JOBS_WORKER_CONCURRENCY = 2
+JOBS_CONCURRENCY_LIMITS = {"users.delete_employee": 1, "tasks.export": 2}
+JOBS_POLL_INTERVAL = 1.0
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_BACKOFF_SECONDS = 10
+JOBS_LEASE_SECONDS = 60
+JOBS_FILES_DIR = None
+JOBS_RETENTION_DAYS = 7
+JOBS_LIST_LIMIT = 50
@@ -0,0 +1,27 @@
+"""Change tracking for model instances.
+
+``LoadedValuesMixin`` keeps the field values an instance was loaded with,
+or last saved with, so ``save()`` overrides and signal handlers can tell
+which fields an update changes without reading the row again.
+"""
+
+
+class LoadedValuesMixin:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Attribute names, as in values(); deferred fields are left out.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def remember_loaded_values(self):
+        """Take the current values as the stored ones, once a save is done."""
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_loaded_value(self, attname):
+        """Return ``attname`` as it was loaded from the database, if it was."""
+        return getattr(self, "_loaded_values", {}).get(attname)
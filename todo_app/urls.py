@@ -1,8 +1,12 @@
 from django.contrib import admin
 from django.urls import path,include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/users/", include("users.urls")),
     path("api/tasks/", include("tasks.urls")),
+    path("api/jobs/", include("jobs.urls")),
+    path("internal/metrics/", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,147 @@
+"""In-process queue that serializes database writes.
+
+SQLite lets one connection write at a time. Left to contend, the writers of
+a process poll SQLite's lock from its busy handler, sleeping longer after
+each miss, and give up with "database is locked" once ``busy_timeout`` runs
+out. Instead, a request waits for its turn in ``write_queue`` right before
+its first write (including ``BEGIN IMMEDIATE``) and passes it on as soon as
+its writes are committed, waking the next writer at once: after a write
+made in autocommit mode, or once every transaction it wrote in has
+committed. A turn whose transaction rolled back is passed on when the
+request finishes. Reads never queue; under WAL they run alongside the
+writer.
+
+Writers in other processes still meet at SQLite's own lock, where
+``busy_timeout`` applies. A request that waits longer than
+``DATABASE_WRITE_QUEUE_TIMEOUT`` seconds fails with 503 instead of hanging.
+"""
+
+import contextvars
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .middleware import RequestContextMiddleware
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "BEGIN")
+
+_turn = contextvars.ContextVar("write_turn", default=None)
+
+
+class WriteQueueTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The server is busy with other writes; retry shortly."
+    default_code = "write_queue_timeout"
+
+
+class WriteQueue:
+    """One write turn per process.
+
+    The turn goes to whichever waiter runs first rather than strictly to the
+    longest waiting one: handing it to a particular sleeping thread stalls
+    every writer until the interpreter schedules that thread, which cut
+    write throughput about fivefold in ``benchmark_sqlite_writes``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Wait for the turn; return ``False`` if ``timeout`` seconds pass first."""
+        return self._lock.acquire(timeout=-1 if timeout is None else timeout)
+
+    def release(self):
+        self._lock.release()
+
+
+write_queue = WriteQueue()
+
+
+class WriteTurn:
+    """A request's turn; ``open`` and ``watched`` hold connection aliases.
+
+    ``open`` are the connections with a transaction the turn waits for, and
+    ``watched`` those of them whose commit will pass the turn on.
+    """
+
+    __slots__ = ("held", "open", "watched")
+
+    def __init__(self):
+        self.held = False
+        self.open = set()
+        self.watched = set()
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.open.clear()
+            self.watched.clear()
+            write_queue.release()
+
+
+def is_write(sql):
+    return sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+
+
+def _committed(turn, alias):
+    turn.open.discard(alias)
+    turn.watched.discard(alias)
+    if not turn.open:
+        turn.release()
+
+
+def _track(turn, connection, sql):
+    alias = connection.alias
+    if connection.in_atomic_block:
+        if alias not in turn.watched:
+            turn.open.add(alias)
+            turn.watched.add(alias)
+            transaction.on_commit(lambda: _committed(turn, alias), using=alias)
+    elif sql.lstrip()[:5].upper() == "BEGIN":
+        # Sent while entering an atomic block; watched from its next statement.
+        turn.open.add(alias)
+    elif alias not in turn.open:
+        # Autocommit: the statement is committed already.
+        _committed(turn, alias)
+
+
+def _wait_for_turn(execute, sql, params, many, context):
+    turn = _turn.get()
+    if turn is None:
+        return execute(sql, params, many, context)
+    if not turn.held and is_write(sql):
+        if not write_queue.acquire(getattr(settings, "DATABASE_WRITE_QUEUE_TIMEOUT", 10)):
+            raise WriteQueueTimeout()
+        turn.held = True
+    result = execute(sql, params, many, context)
+    if turn.held:
+        _track(turn, context["connection"], sql)
+    return result
+
+
+def install_write_queue(connection, **kwargs):
+    """``connection_created`` receiver, connected in ``TodoAppConfig.ready()``."""
+    if connection.vendor == "sqlite" and _wait_for_turn not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_wait_for_turn)
+
+
+class WriteQueueMiddleware(RequestContextMiddleware):
+    """Give each request a turn in ``write_queue``, taken on its first write.
+
+    Under ASGI, sync views run in worker threads, which see the request's
+    turn and wait for the queue there, never on the event loop.
+    """
+
+    context = _turn
+
+    def start(self, request):
+        if not getattr(settings, "DATABASE_WRITE_QUEUE", False):
+            return None
+        return WriteTurn()
+
+    def stop(self, turn):
+        if turn is not None:
+            turn.release()
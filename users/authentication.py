@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Cached version for users that no longer exist; never matches a token.
+DELETED_USER_VERSION = -1
+
+
+def _get_cache():
+    return caches[getattr(settings, "JWT_CLAIMS_CACHE_ALIAS", "default")]
+
+
+def _token_version_key(user_id):
+    return f"users:token_version:{user_id}"
+
+
+def get_token_version(user_id):
+    """Return the user's current token version, hitting the DB at most once
+    per ``JWT_CLAIMS_REVALIDATE_SECONDS``."""
+    cache = _get_cache()
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = DELETED_USER_VERSION
+        cache.set(
+            key, version, timeout=getattr(settings, "JWT_CLAIMS_REVALIDATE_SECONDS", 60)
+        )
+    return version
+
+
+def forget_token_version(user_id):
+    _get_cache().delete(_token_version_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """Request user built from the claims of a validated access token."""
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @cached_property
+    def phone_number(self):
+        return self.token.get("phone_number", "")
+
+    @cached_property
+    def username(self):
+        return self.phone_number
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", False)
+
+    def __str__(self):
+        return f"{self.phone_number} - {self.role}"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the role claims instead of loading the user.
+
+    Role changes, deactivation and deletion bump ``CustomUser.token_version``.
+    Tokens minted for an older version are rejected as soon as the cached
+    version expires, i.e. within ``JWT_CLAIMS_REVALIDATE_SECONDS``. Tokens
+    issued before the claims existed fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if "role" not in validated_token or "token_version" not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        if validated_token["token_version"] != get_token_version(user_id):
+            raise AuthenticationFailed(
+                _("Token has been revoked."), code="token_revoked"
+            )
+
+        if not validated_token.get("is_active", False):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ClaimsUser(validated_token)
@@ -0,0 +1,70 @@
+"""Helpers for the bulk employee import endpoint."""
+
+import csv
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+IMPORT_COLUMNS = ("first_name", "last_name", "phone_number", "password")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def read_csv_rows(uploaded_file):
+    """Return the records of an uploaded CSV file with an ``IMPORT_COLUMNS`` header."""
+    text = io.TextIOWrapper(uploaded_file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    # Empty cells are left out so optional fields (e.g. password) stay optional.
+    return [
+        {column: row[column] for column in IMPORT_COLUMNS if row.get(column)}
+        for row in reader
+    ]
+
+
+def _init_worker():
+    # Spawned workers start from a clean interpreter.
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "todo_app.settings")
+    django.setup()
+
+
+def _get_worker_count():
+    return getattr(settings, "EMPLOYEE_IMPORT_HASH_WORKERS", None) or os.cpu_count() or 1
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" because forking a threaded server process is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=_get_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def hash_passwords(passwords):
+    """Hash ``passwords`` in order, spreading the work over a process pool.
+
+    Small batches, and single-CPU hosts, hash inline since shipping work to
+    another process would only add overhead. ``None`` yields an unusable password,
+    as ``set_password(None)`` does.
+    """
+    passwords = list(passwords)
+    threshold = getattr(settings, "EMPLOYEE_IMPORT_POOL_THRESHOLD", 32)
+    workers = _get_worker_count()
+    if workers <= 1 or len(passwords) < threshold:
+        return [make_password(password) for password in passwords]
+
+    pool = _get_pool()
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
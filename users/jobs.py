@@ -0,0 +1,97 @@
+"""Background jobs of the users app."""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from jobs.queue import JobError, register
+from tasks import offboarding
+from .importing import hash_passwords
+from .models import PendingImport
+
+User = get_user_model()
+
+HASH_CHUNK_SIZE = 500
+
+
+@register("users.delete_employee")
+def delete_employee(job):
+    """Offboard a deactivated employee: release their tasks, then delete them.
+
+    Tasks go in batches of ``EMPLOYEE_OFFBOARD_BATCH_SIZE``; with
+    ``reassign_to`` in the payload, the requesting employer's tasks move to
+    that employee instead of being deleted.
+    """
+    employee_id = job.payload["employee_id"]
+    if not User.objects.filter(id=employee_id, role="EMPLOYEE").exists():
+        return {"deleted": 0, "reassigned": 0}
+
+    reassign = None
+    if job.payload.get("reassign_to"):
+        if not User.objects.filter(
+            id=job.payload["reassign_to"], role="EMPLOYEE", is_active=True
+        ).exists():
+            raise JobError("The employee to reassign the tasks to no longer exists.")
+        reassign = (job.payload["employer_id"], job.payload["reassign_to"])
+
+    done = 0
+
+    def progress(count):
+        nonlocal done
+        done += count
+        job.set_progress(done)
+
+    job.set_progress(0, offboarding.count_tasks(employee_id))
+    result = offboarding.release_tasks(
+        employee_id,
+        getattr(settings, "EMPLOYEE_OFFBOARD_BATCH_SIZE", 500),
+        reassign=reassign,
+        progress=progress,
+    )
+    # Nothing should be left to cascade to; whatever is goes with the user.
+    User.objects.filter(id=employee_id).delete()
+    return result
+
+
+@register("users.import_employees")
+def import_employees(job):
+    """Hash the passwords of a large import validated by the endpoint and
+    create the employees.
+
+    The rows, plain passwords included, wait in a ``PendingImport`` rather
+    than in the payload; it is deleted once the job will not run again.
+    """
+    pending = PendingImport.objects.filter(job_id=job.id).first()
+    if pending is None:
+        raise JobError("The rows of this import are no longer available.")
+    records = pending.employees
+    final = True
+    try:
+        job.set_progress(0, len(records))
+        for start in range(0, len(records), HASH_CHUNK_SIZE):
+            chunk = records[start : start + HASH_CHUNK_SIZE]
+            for data, password in zip(
+                chunk, hash_passwords(data.pop("password", None) for data in chunk)
+            ):
+                data["password"] = password
+            job.set_progress(start + len(chunk))
+
+        employees = [
+            User(role="EMPLOYEE", is_staff=False, is_superuser=False, **data)
+            for data in records
+        ]
+        try:
+            with transaction.atomic():
+                employees = User.objects.bulk_create(employees, batch_size=500)
+        except IntegrityError:
+            raise JobError("Some phone numbers were registered after the import was submitted.")
+        return {"employee_ids": [employee.id for employee in employees]}
+    except JobError:
+        raise
+    except Exception:
+        # Retried with the same rows unless the attempts are used up.
+        final = job.attempts >= job.max_attempts
+        raise
+    finally:
+        if final:
+            pending.delete()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Remove revoked refresh tokens that have expired anyway."
+
+    def handle(self, *args, **options):
+        purged, _ = RevokedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {purged} expired revoked tokens."))
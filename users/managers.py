@@ -1,9 +1,36 @@
 from django.contrib.auth.models import BaseUserManager
 from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
 
+class CustomUserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Update the users, revoking their tokens if a claim field or the
+        password changes."""
+        revoking = {*self.model.TOKEN_CLAIM_FIELDS, "password"}
+        if "token_version" in kwargs or not kwargs.keys() & revoking:
+            return super().update(**kwargs)
+
+        from .authentication import forget_token_version
+
+        user_ids = list(self.values_list("pk", flat=True))
+        kwargs["token_version"] = F("token_version") + 1
+        updated = super().update(**kwargs)
+
+        def forget():
+            for user_id in user_ids:
+                forget_token_version(user_id)
+
+        transaction.on_commit(forget, using=self.db)
+        return updated
+
+
 class CustomBaseUserManager(BaseUserManager):
+    def get_queryset(self):
+        return CustomUserQuerySet(self.model, using=self._db)
+
     def create_user(self, phone_number, password=None, **extra_fields):
         if not phone_number:
             raise ValueError(_("Phone number must be set"))
@@ -1,10 +1,13 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+
+from todo_app.tracking import LoadedValuesMixin
 from .managers import CustomBaseUserManager
 
-class CustomUser(AbstractBaseUser, PermissionsMixin):
+class CustomUser(LoadedValuesMixin, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = [("EMPLOYER", "Employer"), ("EMPLOYEE", "Employee"),("ADMIN","Admin")]
     first_name = models.CharField(max_length=200,blank=True,null=True)
     last_name = models.CharField(max_length=200, blank=True, null=True)
@@ -13,15 +16,79 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'phone_number'
     REQUIRED_FIELDS = []
 
+    # Fields copied into the JWT claims; changing any of them, or setting a
+    # new password, bumps token_version, which revokes issued tokens, refresh
+    # tokens included. QuerySet.update() does the same (see managers.py).
+    TOKEN_CLAIM_FIELDS = ("role", "phone_number", "is_active", "is_staff", "is_superuser")
+
     objects = CustomBaseUserManager()
 
     def __str__(self):
         return f"{self.phone_number} - {self.role}"
 
+    def claims_changed(self):
+        """Whether saving would change a token claim of the stored user.
+
+        Instances not loaded from the database, and claim fields assigned
+        without having been loaded, count as changes.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return True
+        return any(
+            field in self.__dict__ and (field not in loaded or loaded[field] != self.__dict__[field])
+            for field in self.TOKEN_CLAIM_FIELDS
+        )
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        # Rehashing the same password for a newer hasher, which
+        # check_password() does on login, leaves issued tokens alone.
+        self._password_changed = not getattr(self, "_checking_password", False)
+
+    def set_unusable_password(self):
+        super().set_unusable_password()
+        self._password_changed = True
+
+    def check_password(self, raw_password):
+        self._checking_password = True
+        try:
+            return super().check_password(raw_password)
+        finally:
+            self._checking_password = False
+
+    async def acheck_password(self, raw_password):
+        self._checking_password = True
+        try:
+            return await super().acheck_password(raw_password)
+        finally:
+            self._checking_password = False
+
+    def save(self, *args, **kwargs):
+        revoke = not self._state.adding and (
+            getattr(self, "_password_changed", False) or self.claims_changed()
+        )
+        update_fields = kwargs.get("update_fields")
+        if revoke:
+            # Incremented by the UPDATE itself, so concurrent bumps add up.
+            self.token_version = F("token_version") + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._password_changed = False
+        if revoke:
+            from .authentication import forget_token_version
+
+            self.refresh_from_db(using=self._state.db, fields=["token_version"])
+            user_id = self.pk
+            transaction.on_commit(lambda: forget_token_version(user_id), using=self._state.db)
+        self.remember_loaded_values()
+
     def clean(self):
         if self.role not in dict(self.ROLE_CHOICES):
             raise ValidationError(_("Invalid role for the user"))
@@ -29,3 +96,28 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
+
+
+class RevokedToken(models.Model):
+    """A refresh token that may not be used again, by its ``jti``.
+
+    Rotation revokes the token it replaces. Rows are only needed until the
+    token expires; ``purge_revoked_tokens`` removes them after that.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class PendingImport(models.Model):
+    """The rows of a background employee import, until its job has run.
+
+    They hold plain passwords, so they stay out of ``Job.payload``; the job
+    hashes them and deletes this row once it will not be retried.
+    """
+
+    job = models.OneToOneField("jobs.Job", on_delete=models.CASCADE, related_name="+")
+    employees = models.JSONField()
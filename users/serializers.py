@@ -5,6 +5,8 @@ from django.core.validators import RegexValidator
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from todo_app.metrics import SerializerTimingMixin
+
 User = get_user_model()
 
 
@@ -108,7 +110,7 @@ class EmployeerCreateSerializer(serializers.ModelSerializer):
         return User.objects.create_employer(**validated_data)
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     phone_number = serializers.CharField(
         max_length=10,
         validators=[
@@ -168,3 +170,18 @@ class EmployeeSerializer(serializers.ModelSerializer):
             instance.set_password(password)
         instance.save()
         return instance
+
+
+class EmployeeImportSerializer(EmployeeSerializer):
+    """Validates one import row; phone uniqueness is checked for the whole
+    batch at once by the view instead of one query per row."""
+
+    phone_number = serializers.CharField(
+        max_length=10,
+        validators=[
+            RegexValidator(
+                regex=r"^[6-9]\d{9}$",
+                message="Phone number must be a valid Indian number starting with digits between 6 and 9, and it must be 10 digits long.",
+            ),
+        ],
+    )
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .authentication import forget_token_version
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, using, **kwargs):
+    # The collector clears instance.pk after deleting, so capture it now.
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_token_version(user_id), using=using)
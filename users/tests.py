@@ -1,3 +1,422 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import throttling
+from .models import CustomUser, RevokedToken
+from .tokens import RoleRefreshToken
+
+
+def use_fresh_throttle(test):
+    """Give ``test`` empty login throttle buckets of its own."""
+    settings_override = override_settings(
+        LOGIN_THROTTLE_STORE="users.throttling.LocMemBucketStore"
+    )
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["tasks"].clear()
+        use_fresh_throttle(self)
+        self.client = APIClient()
+
+    def login(self, phone_number="9000000001", password="Secret@123"):
+        response = self.client.post(
+            "/api/users/login/",
+            {"phone_number": phone_number, "password": password},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["access"]
+
+    def get_tasks(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.client.get("/api/tasks/employer/tasks/")
+
+    def test_login_embeds_role_claims(self):
+        token = AccessToken(self.login())
+        self.assertEqual(token["role"], "EMPLOYER")
+        self.assertTrue(token["is_active"])
+        self.assertEqual(token["token_version"], 0)
+
+    def test_authenticated_requests_skip_the_user_table(self):
+        access = self.login()
+        self.get_tasks(access)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get_tasks(access)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [q["sql"] for q in captured if "users_customuser" in q["sql"]]
+        )
+
+    def test_role_change_revokes_issued_tokens(self):
+        access = self.login()
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employer = CustomUser.objects.get(pk=self.employer.pk)
+            employer.role = "EMPLOYEE"
+            employer.save()
+
+        self.assertEqual(self.get_tasks(access).status_code, 401)
+
+    def test_deactivation_revokes_issued_tokens(self):
+        access = self.login()
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employer = CustomUser.objects.get(pk=self.employer.pk)
+            employer.is_active = False
+            employer.save(update_fields=["is_active"])
+
+        self.assertEqual(self.get_tasks(access).status_code, 401)
+
+    def test_queryset_updates_revoke_issued_tokens(self):
+        access = self.login()
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(pk=self.employer.pk).update(phone_number="9000000009")
+
+        self.assertEqual(self.get_tasks(access).status_code, 401)
+        # Other fields leave issued tokens alone.
+        self.client.credentials()
+        access = self.login("9000000009")
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(pk=self.employer.pk).update(first_name="Renamed")
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+    def test_saving_unloaded_claims_revokes_issued_tokens(self):
+        access = self.login()
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employer = CustomUser.objects.only("id").get(pk=self.employer.pk)
+            employer.role = "EMPLOYEE"
+            employer.save(update_fields=["role"])
+
+        self.assertEqual(self.get_tasks(access).status_code, 401)
+
+    def test_password_hash_upgrades_keep_issued_tokens(self):
+        CustomUser.objects.filter(pk=self.employer.pk).update(
+            password=make_password("Secret@123", hasher="pbkdf2_sha1")
+        )
+        access = str(
+            RoleRefreshToken.for_user(CustomUser.objects.get(pk=self.employer.pk)).access_token
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.login()
+
+        employer = CustomUser.objects.get(pk=self.employer.pk)
+        self.assertTrue(employer.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+    def test_deletion_revokes_issued_tokens(self):
+        access = self.login()
+        self.assertEqual(self.get_tasks(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.get(pk=self.employer.pk).delete()
+
+        self.assertEqual(self.get_tasks(access).status_code, 401)
+
+
+@override_settings(LOGIN_THROTTLE_RATES={"phone": (3, 60), "ip": (5, 10)})
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+
+    def setUp(self):
+        use_fresh_throttle(self)
+        self.client = APIClient()
+        self.now = 1000000.0
+        patcher = mock.patch.object(throttling.time, "time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def attempt(self, phone_number="9000000001", password="wrong", ip="10.0.0.1"):
+        return self.client.post(
+            "/api/users/login/",
+            {"phone_number": phone_number, "password": password},
+            format="json",
+            REMOTE_ADDR=ip,
+        )
+
+    def test_attempts_beyond_the_burst_are_rejected_before_hashing(self):
+        with mock.patch("users.views.authenticate", wraps=authenticate) as hashed:
+            codes = [self.attempt().status_code for _ in range(5)]
+
+        self.assertEqual(codes, [401, 401, 401, 429, 429])
+        self.assertEqual(hashed.call_count, 3)
+        response = self.attempt(password="Secret@123")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+
+    def test_buckets_refill_over_time(self):
+        for _ in range(3):
+            self.attempt()
+
+        self.now += 59
+        self.assertEqual(self.attempt(password="Secret@123").status_code, 429)
+        self.now += 1
+        self.assertEqual(self.attempt(password="Secret@123").status_code, 200)
+
+    def test_each_ip_is_limited_across_phone_numbers(self):
+        codes = [self.attempt(f"91000000{i:02d}").status_code for i in range(6)]
+        self.assertEqual(codes, [401] * 5 + [429])
+        # Another client still gets through.
+        self.assertEqual(self.attempt(password="Secret@123", ip="10.0.0.2").status_code, 200)
+
+    def test_rejected_attempts_take_no_tokens(self):
+        self.attempt()
+        self.attempt()
+        for i in range(3):
+            self.attempt(f"91000000{i:02d}")
+        # The IP's bucket is empty, so the phone number keeps its last token.
+        self.assertEqual(self.attempt().status_code, 429)
+
+        self.assertEqual(self.attempt(ip="10.0.0.2").status_code, 401)
+        self.assertEqual(self.attempt(ip="10.0.0.2").status_code, 429)
+
+
+class TokenRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+
+    def setUp(self):
+        caches["default"].clear()
+        use_fresh_throttle(self)
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/users/login/",
+            {"phone_number": "9000000001", "password": "Secret@123"},
+            format="json",
+        )
+        self.refresh = response.data["refresh"]
+
+    def post_refresh(self, refresh):
+        return self.client.post("/api/users/token/refresh/", {"refresh": refresh}, format="json")
+
+    def post_verify(self, token):
+        return self.client.post("/api/users/token/verify/", {"token": token}, format="json")
+
+    def test_refresh_rotates_the_refresh_token(self):
+        # An expired access token sent along does not get in the way.
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer expired")
+        response = self.post_refresh(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "EMPLOYER")
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get("/api/tasks/employer/tasks/").status_code, 200)
+        self.client.credentials()
+        self.assertEqual(self.post_refresh(response.data["refresh"]).status_code, 200)
+
+    def test_rotated_refresh_tokens_cannot_be_reused(self):
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 200)
+
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+        self.assertEqual(self.post_verify(self.refresh).status_code, 401)
+        # Another process, without the cached answer, still refuses it.
+        caches["default"].clear()
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    def test_revoked_answers_are_cached(self):
+        self.post_refresh(self.refresh)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+        self.assertFalse([q["sql"] for q in captured if "users_revokedtoken" in q["sql"]])
+
+    @override_settings(
+        SIMPLE_JWT={"ROTATE_REFRESH_TOKENS": False, "AUTH_HEADER_TYPES": ("Bearer",)}
+    )
+    def test_refresh_without_rotation(self):
+        for _ in range(2):
+            response = self.post_refresh(self.refresh)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("refresh", response.data)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_claim_changes_revoke_refresh_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            employer = CustomUser.objects.get(pk=self.employer.pk)
+            employer.set_password("Changed@123")
+            employer.save()
+
+        response = self.post_refresh(self.refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["error"], "Token has been revoked.")
+
+    def test_verify(self):
+        access = self.post_refresh(self.refresh).data["access"]
+
+        self.assertEqual(self.post_verify(access).status_code, 200)
+        self.assertEqual(self.post_verify("not-a-token").status_code, 401)
+        self.assertEqual(
+            self.client.post("/api/users/token/verify/", {}, format="json").status_code, 400
+        )
+
+
+class SQLiteBucketStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "throttle.sqlite3")
+
+    def test_stores_on_the_same_file_share_buckets(self):
+        first = throttling.SQLiteBucketStore(self.path)
+        second = throttling.SQLiteBucketStore(self.path)
+        bucket = [("login:ip:10.0.0.1", 2, 10)]
+
+        self.assertEqual(first.consume(bucket, 100.0), 0)
+        self.assertEqual(second.consume(bucket, 100.0), 0)
+        self.assertEqual(first.consume(bucket, 105.0), 5)
+        self.assertEqual(second.consume(bucket, 110.0), 0)
+
+    def test_all_buckets_or_none(self):
+        store = throttling.SQLiteBucketStore(self.path)
+        store.consume([("a", 1, 10)], 100.0)
+
+        self.assertEqual(store.consume([("a", 1, 10), ("b", 1, 10)], 100.0), 10)
+        self.assertEqual(store.consume([("b", 1, 10)], 100.0), 0)
+
+    @mock.patch.object(throttling, "PURGE_EVERY", 2)
+    def test_full_buckets_are_purged(self):
+        store = throttling.SQLiteBucketStore(self.path)
+        store.consume([("a", 2, 10)], 100.0)
+        store.consume([("b", 2, 10)], 115.0)
+
+        rows = store._connection().execute("SELECT key FROM buckets").fetchall()
+        self.assertEqual(rows, [("b",)])
+
+
+class EmployeeImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = CustomUser.objects.create_employer("9000000001", "Secret@123")
+        CustomUser.objects.create_employee("9000000002", "Secret@123")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    def post_rows(self, rows):
+        return self.client.post("/api/users/employer/employee/import/", rows, format="json")
+
+    def post_csv(self, content):
+        upload = SimpleUploadedFile("employees.csv", content, content_type="text/csv")
+        return self.client.post(
+            "/api/users/employer/employee/import/", {"file": upload}, format="multipart"
+        )
+
+    def row(self, phone_number, **fields):
+        return {"first_name": "New", "phone_number": phone_number, **fields}
+
+    def row_errors(self, response):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "No employees were imported.")
+        return {item["row"]: item["errors"] for item in response.data["errors"]}
+
+    def test_json_import(self):
+        response = self.post_rows(
+            [self.row("9100000001", password="Secret@123"), self.row("9100000002")]
+        )
+
+        self.assertEqual(response.status_code, 201)
+        employees = CustomUser.objects.filter(pk__in=response.data["employee_ids"])
+        self.assertEqual(
+            sorted(employees.values_list("phone_number", "role")),
+            [("9100000001", "EMPLOYEE"), ("9100000002", "EMPLOYEE")],
+        )
+        self.assertTrue(employees.get(phone_number="9100000001").check_password("Secret@123"))
+        self.assertFalse(employees.get(phone_number="9100000002").has_usable_password())
+
+    def test_csv_import(self):
+        response = self.post_csv(
+            b"\xef\xbb\xbffirst_name,last_name,phone_number,password\r\n"
+            b"Asha,Rao,9100000001,Secret@123\r\n"
+            b"Ravi,,9100000002,\r\n"
+        )
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted(
+                CustomUser.objects.filter(pk__in=response.data["employee_ids"]).values_list(
+                    "first_name", "last_name", "phone_number"
+                )
+            ),
+            [("Asha", "Rao", "9100000001"), ("Ravi", None, "9100000002")],
+        )
+
+    def test_unreadable_csv_is_rejected(self):
+        response = self.post_csv(b"first_name,phone_number\r\n\xff\xfe,9100000001\r\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "Could not read the uploaded CSV file.")
+
+    def test_duplicate_rows_are_reported(self):
+        errors = self.row_errors(
+            self.post_rows([self.row("9100000001"), self.row("9100000003"), self.row("9100000001")])
+        )
+
+        self.assertEqual(errors, {3: {"phone_number": ["Duplicate of row 1."]}})
+
+    def test_existing_phone_numbers_are_reported(self):
+        errors = self.row_errors(self.post_rows([self.row("9100000001"), self.row("9000000002")]))
+
+        self.assertEqual(errors, {2: {"phone_number": ["Phone number already in use."]}})
+
+    @override_settings(EMPLOYEE_IMPORT_MAX_ROWS=2)
+    def test_row_cap(self):
+        response = self.post_rows([self.row(f"910000000{i}") for i in range(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["error"], "At most 2 employees can be imported per request."
+        )
+        self.assertEqual(self.post_rows([self.row("9100000001")]).status_code, 201)
+
+    def test_one_invalid_row_imports_nothing(self):
+        errors = self.row_errors(
+            self.post_rows(
+                [self.row("9100000001"), self.row("12345"), self.row("9100000003", password="weak")]
+            )
+        )
+
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertEqual(CustomUser.objects.count(), 2)
+
+    def test_concurrent_registrations_roll_back_the_batch(self):
+        # A phone number taken after the batch check fails the insert.
+        with mock.patch(
+            "users.views.EmployerImportEmployeesView.get_existing_phone_numbers",
+            return_value=[],
+        ):
+            response = self.post_rows([self.row("9100000001"), self.row("9000000002")])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(CustomUser.objects.filter(phone_number="9100000001").exists())
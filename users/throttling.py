@@ -0,0 +1,191 @@
+"""Token-bucket throttle for the login endpoint.
+
+Every login attempt costs a PBKDF2 hash, right password or not, so
+``LoginThrottle`` runs before the view and takes a token from the bucket
+of the submitted phone number and from the bucket of the client IP. A
+bucket holds up to ``burst`` tokens and regains one every ``seconds``
+(``LOGIN_THROTTLE_RATES``). An attempt goes through only if each of its
+buckets has a token; rejected attempts take none, so a client that keeps
+retrying gets exactly the refill rate, and never reaches the hasher.
+
+The buckets live in the configured store so that all worker processes
+count together. ``SQLiteBucketStore`` keeps them in a small SQLite file
+shared by the processes of one host, on ``/dev/shm`` where it exists. A
+store backed by e.g. Redis implements ``consume`` the same way to share
+them across hosts. ``LocMemBucketStore`` only counts the current process.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+# Full buckets are dropped every this many attempts; a missing bucket is full.
+PURGE_EVERY = 1000
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _refill(tokens, updated, now, burst, seconds):
+    return min(burst, tokens + max(now - updated, 0) / seconds)
+
+
+class BaseBucketStore:
+    def consume(self, buckets, now):
+        """Take a token from each of ``buckets`` if every one of them has one.
+
+        ``buckets`` is a list of ``(key, burst, seconds)``. Returns 0 when the
+        tokens were taken, otherwise the seconds until they all would be.
+        """
+        raise NotImplementedError
+
+
+class LocMemBucketStore(BaseBucketStore):
+    """Buckets of the current process; for tests and single-process servers."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._attempts = 0
+
+    def consume(self, buckets, now):
+        with self._lock:
+            self._attempts += 1
+            if self._attempts % PURGE_EVERY == 0:
+                self._buckets = {
+                    key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+                }
+            levels = {}
+            wait = 0
+            for key, burst, seconds in buckets:
+                tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+                levels[key] = _refill(tokens, updated, now, burst, seconds)
+                wait = max(wait, (1 - levels[key]) * seconds)
+            if wait > 0:
+                return wait
+            for key, burst, seconds in buckets:
+                tokens = levels[key] - 1
+                self._buckets[key] = (tokens, now, now + (burst - tokens) * seconds)
+            return 0
+
+
+class SQLiteBucketStore(BaseBucketStore):
+    """Buckets shared by the processes of one host through a SQLite file.
+
+    Each attempt reads and updates its buckets in one ``BEGIN IMMEDIATE``
+    transaction, so concurrent processes never both spend the last token.
+    The file only holds throttle state: it is not synced to disk and may be
+    deleted at any time, which refills every bucket.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "LOGIN_THROTTLE_PATH", None) or os.path.join(
+            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+            "todo_app_login_throttle.sqlite3",
+        )
+        self._local = threading.local()
+        self._attempts = 0
+
+    def _connection(self):
+        # One connection per thread, and never one inherited through fork().
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS buckets_full_at ON buckets (full_at)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def consume(self, buckets, now):
+        connection = self._connection()
+        self._attempts += 1
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self._attempts % PURGE_EVERY == 0:
+                connection.execute("DELETE FROM buckets WHERE full_at <= ?", [now])
+            stored = {
+                key: (tokens, updated)
+                for key, tokens, updated in connection.execute(
+                    "SELECT key, tokens, updated FROM buckets WHERE key IN "
+                    f"({', '.join(['?'] * len(buckets))})",
+                    [key for key, _, _ in buckets],
+                )
+            }
+            levels = {}
+            wait = 0
+            for key, burst, seconds in buckets:
+                tokens, updated = stored.get(key, (burst, now))
+                levels[key] = _refill(tokens, updated, now, burst, seconds)
+                wait = max(wait, (1 - levels[key]) * seconds)
+            if wait == 0:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (key, levels[key] - 1, now, now + (burst - levels[key] + 1) * seconds)
+                        for key, burst, seconds in buckets
+                    ],
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            store_class = import_string(
+                getattr(settings, "LOGIN_THROTTLE_STORE", "users.throttling.SQLiteBucketStore")
+            )
+            _store = store_class()
+        return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting.startswith("LOGIN_THROTTLE_"):
+        with _store_lock:
+            _store = None
+
+
+class LoginThrottle(BaseThrottle):
+    """Rejects login attempts once the phone number's or the IP's bucket is empty."""
+
+    def allow_request(self, request, view):
+        rates = getattr(settings, "LOGIN_THROTTLE_RATES", {})
+        idents = {"ip": self.get_ident(request)}
+        phone_number = request.data.get("phone_number") if hasattr(request.data, "get") else None
+        if phone_number is not None:
+            idents["phone"] = str(phone_number)[:64]
+        buckets = [
+            (f"login:{scope}:{ident}", *rates[scope])
+            for scope, ident in idents.items()
+            if rates.get(scope)
+        ]
+        if not buckets:
+            return True
+        self._wait = get_store().consume(buckets, time.time())
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
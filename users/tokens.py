@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import settings as jwt_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .authentication import _get_cache, get_token_version
+from .models import RevokedToken
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token carrying the claims needed to authorize without the DB.
+
+    Access tokens minted from it copy these claims, so ``role`` and friends
+    are available to permission checks straight from the token.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["role"] = user.role
+        token["phone_number"] = user.phone_number
+        token["is_active"] = user.is_active
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        token["token_version"] = user.token_version
+        return token
+
+
+def _revoked_key(jti):
+    return f"users:revoked_token:{jti}"
+
+
+def _remember_revoked(token, revoked):
+    if revoked:
+        # Revocation is final; keep the answer for as long as it matters.
+        timeout = max(int(token["exp"] - timezone.now().timestamp()), 1)
+    else:
+        timeout = getattr(settings, "JWT_REVOKED_CACHE_SECONDS", 60)
+    _get_cache().set(_revoked_key(token["jti"]), revoked, timeout=timeout)
+
+
+def is_revoked(token):
+    """Return whether ``token`` was revoked, hitting the DB only on a cache miss."""
+    revoked = _get_cache().get(_revoked_key(token["jti"]))
+    if revoked is None:
+        revoked = RevokedToken.objects.filter(jti=token["jti"]).exists()
+        _remember_revoked(token, revoked)
+    return revoked
+
+
+def revoke(token):
+    """Revoke ``token``; return ``False`` if it already was.
+
+    The unique ``jti`` makes this the arbiter between concurrent uses of a
+    token, whatever stale answers ``is_revoked`` may still have cached.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=token["jti"], expires_at=datetime_from_epoch(token["exp"])
+            )
+    except IntegrityError:
+        _remember_revoked(token, True)
+        return False
+    _remember_revoked(token, True)
+    return True
+
+
+def check_current(token):
+    """Raise ``TokenError`` if ``token`` was issued before a revocation.
+
+    Claim changes, deactivation and deletion bump the user's token version;
+    refresh tokens can also be revoked one by one.
+    """
+    user_id = token.get(jwt_settings.api_settings.USER_ID_CLAIM)
+    try:
+        version = get_token_version(int(user_id))
+    except (TypeError, ValueError):
+        raise TokenError(_("Token contained no recognizable user identification"))
+    if token.get("token_version") != version:
+        raise TokenError(_("Token has been revoked."))
+    if token.get(jwt_settings.api_settings.TOKEN_TYPE_CLAIM) == "refresh" and is_revoked(token):
+        raise TokenError(_("Token has been revoked."))
+
+
+def refresh_tokens(raw_token):
+    """Exchange a refresh token for a new access token, without the password.
+
+    With ``ROTATE_REFRESH_TOKENS`` a new refresh token, valid for another
+    ``REFRESH_TOKEN_LIFETIME``, is returned too, and with
+    ``BLACKLIST_AFTER_ROTATION`` the old one is revoked: a second use of it
+    fails even if two requests race.
+    """
+    token = RoleRefreshToken(raw_token)
+    check_current(token)
+    data = {"access": str(token.access_token)}
+
+    api_settings = jwt_settings.api_settings
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION and not revoke(token):
+            raise TokenError(_("Token has been revoked."))
+        token.set_jti()
+        token.set_exp()
+        token.set_iat()
+        data["refresh"] = str(token)
+    return data
+
+
+def verify_token(raw_token):
+    """Raise ``TokenError`` unless ``raw_token`` is a valid, current token."""
+    check_current(UntypedToken(raw_token))
@@ -1,8 +1,17 @@
 from django.urls import path
-from .views import UserLoginView,AdminCreateEmployerView,EmployerManageEmployeeView
+from .views import (
+    UserLoginView,
+    TokenRefreshView,
+    TokenVerifyView,
+    AdminCreateEmployerView,
+    EmployerManageEmployeeView,
+    EmployerImportEmployeesView,
+)
 
 urlpatterns = [
     path("login/", UserLoginView.as_view(), name="login"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("token/verify/", TokenVerifyView.as_view(), name="token-verify"),
     path(
         "myadmin/create-employer/",
         AdminCreateEmployerView.as_view(),
@@ -13,6 +22,11 @@ urlpatterns = [
         EmployerManageEmployeeView.as_view(),
         name="manage-employee",
     ),  # for POST (create)
+    path(
+        "employer/employee/import/",
+        EmployerImportEmployeesView.as_view(),
+        name="import-employees",
+    ),
     path(
         "employer/employee/<int:employee_id>/",
         EmployerManageEmployeeView.as_view(),
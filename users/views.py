@@ -2,16 +2,27 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAdminUser,IsAuthenticated
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import TokenError
+
+from jobs import queue as jobs_queue
 
 from .permissions import IsEmployer
-from .serializers import EmployeerCreateSerializer,EmployeeSerializer
+from .importing import hash_passwords, read_csv_rows
+from .models import PendingImport
+from .serializers import EmployeerCreateSerializer,EmployeeSerializer,EmployeeImportSerializer
+from .throttling import LoginThrottle
+from .tokens import RoleRefreshToken, refresh_tokens, verify_token
 
 User = get_user_model()
 
 class UserLoginView(APIView):
+    # Runs before the password is hashed; see users/throttling.py.
+    throttle_classes = [LoginThrottle]
 
     def post(self, request, *args, **kwargs):
         phone_number = request.data.get("phone_number")
@@ -25,7 +36,7 @@ class UserLoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
 
         if user.role == "ADMIN":
             dashboard_url = "/admin/dashboard/"
@@ -52,6 +63,48 @@ class UserLoginView(APIView):
             status=status.HTTP_200_OK,
         )
 
+
+class TokenRefreshView(APIView):
+    """Trade a refresh token for a new access token instead of logging in again."""
+
+    # A client usually still sends its expired access token along.
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        raw_token = request.data.get("refresh")
+        if not raw_token:
+            return Response(
+                {"error": "refresh is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            data = refresh_tokens(str(raw_token))
+        except TokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class TokenVerifyView(APIView):
+    """Tell whether an access or refresh token is still accepted."""
+
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        raw_token = request.data.get("token")
+        if not raw_token:
+            return Response(
+                {"error": "token is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            verify_token(str(raw_token))
+        except TokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response({"message": "Token is valid."}, status=status.HTTP_200_OK)
+
+
 class AdminCreateEmployerView(APIView):
     permission_classes = [IsAdminUser]
 
@@ -146,7 +199,169 @@ class EmployerManageEmployeeView(APIView):
                 {"error": "Employee not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        employee.delete()
+        reassign_to = request.query_params.get("reassign_to")
+        if reassign_to:
+            try:
+                reassign_to = int(reassign_to)
+            except ValueError:
+                reassign_to = None
+            if reassign_to == employee.id or not User.objects.filter(
+                id=reassign_to, role="EMPLOYEE", is_active=True
+            ).exists():
+                return Response(
+                    {"error": "reassign_to must be the id of another active employee."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        # Locked out at once; their tasks are released in batches by a job.
+        with transaction.atomic():
+            if employee.is_active:
+                employee.is_active = False
+                employee.save(update_fields=["is_active"])
+            job = jobs_queue.submit(
+                "users.delete_employee",
+                {"employee_id": employee.id, "employer_id": user.id, "reassign_to": reassign_to},
+                created_by_id=user.id,
+            )
         return Response(
-            {"message": "Employee deleted successfully!"}, status=status.HTTP_200_OK
+            {
+                "message": "Employee deactivated; their tasks are being removed.",
+                "job_id": job.id,
+                "status_url": reverse("job-detail", args=[job.id]),
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
+
+
+class EmployerImportEmployeesView(APIView):
+    permission_classes = [IsAuthenticated,IsEmployer]
+
+    def post(self, request, *args, **kwargs):
+        """Create many employees from a JSON list or an uploaded CSV file."""
+        user = request.user
+
+        if user.role != "EMPLOYER":
+            return Response(
+                {"error": "Only employers can create employees."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if "file" in request.FILES:
+            try:
+                rows = read_csv_rows(request.FILES["file"])
+            except (UnicodeDecodeError, ValueError):
+                return Response(
+                    {"error": "Could not read the uploaded CSV file."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            rows = request.data
+
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"error": "Expected a non-empty list of employees or a CSV file."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_rows = getattr(settings, "EMPLOYEE_IMPORT_MAX_ROWS", 10000)
+        if len(rows) > max_rows:
+            return Response(
+                {"error": f"At most {max_rows} employees can be imported per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        errors = {}
+        valid = {}
+        first_row_by_phone = {}
+        for number, row in enumerate(rows, start=1):
+            serializer = EmployeeImportSerializer(data=row)
+            if not serializer.is_valid():
+                errors[number] = serializer.errors
+                continue
+            phone_number = serializer.validated_data["phone_number"]
+            if phone_number in first_row_by_phone:
+                errors[number] = {
+                    "phone_number": [
+                        f"Duplicate of row {first_row_by_phone[phone_number]}."
+                    ]
+                }
+                continue
+            first_row_by_phone[phone_number] = number
+            valid[number] = serializer.validated_data
+
+        for phone_number in self.get_existing_phone_numbers(list(first_row_by_phone)):
+            errors[first_row_by_phone[phone_number]] = {
+                "phone_number": ["Phone number already in use."]
+            }
+
+        if errors:
+            return Response(
+                {
+                    "error": "No employees were imported.",
+                    "errors": [
+                        {"row": number, "errors": errors[number]}
+                        for number in sorted(errors)
+                    ],
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        records = list(valid.values())
+        if len(records) >= getattr(settings, "EMPLOYEE_IMPORT_BACKGROUND_ROWS", 1000):
+            # The rows hold plain passwords, so they go beside the job rather
+            # than in its payload; the job hashes them.
+            with transaction.atomic():
+                job = jobs_queue.submit(
+                    "users.import_employees",
+                    {"employee_count": len(records)},
+                    created_by_id=user.id,
+                )
+                PendingImport.objects.create(job=job, employees=records)
+            return Response(
+                {
+                    "message": f"Importing {len(records)} employees.",
+                    "job_id": job.id,
+                    "status_url": reverse("job-detail", args=[job.id]),
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        passwords = hash_passwords(data.pop("password", None) for data in records)
+        employees = [
+            User(
+                role="EMPLOYEE",
+                is_staff=False,
+                is_superuser=False,
+                password=password,
+                **data,
+            )
+            for data, password in zip(records, passwords)
+        ]
+
+        try:
+            with transaction.atomic():
+                employees = User.objects.bulk_create(employees, batch_size=500)
+        except IntegrityError:
+            return Response(
+                {"error": "Some phone numbers were registered concurrently. Please retry."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            {
+                "message": f"{len(employees)} employees imported successfully!",
+                "employee_ids": [employee.id for employee in employees],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_existing_phone_numbers(self, phone_numbers):
+        batch_size = connection.features.max_query_params or len(phone_numbers) or 1
+        existing = []
+        for start in range(0, len(phone_numbers), batch_size):
+            existing.extend(
+                User.objects.filter(
+                    phone_number__in=phone_numbers[start : start + batch_size]
+                ).values_list("phone_number", flat=True)
+            )
+        return existing